@@ -140,7 +140,9 @@ for interval in get_test_intervals(number=1000):
     market.set_tie_break_constraints(cost)
 
     # Get unit dispatch without fast start constraints and use it to
-    # make fast start unit commitment decisions.
+    # make fast start unit commitment decisions. The solver model is
+    # kept so the second run only applies the changed constraints.
+    market.keep_solver_model = True
     market.dispatch()
     dispatch = market.get_unit_dispatch()
 
@@ -0,0 +1,71 @@
+# Compares the time taken to dispatch a sequence of intervals when a new solver model is built for each interval,
+# against reusing one PersistentInterfaceToSolver across the intervals. The intervals are synthetic two region markets
+# with an interconnector, where bid prices, unit capacities and demand change from one interval to the next, so no
+# historical data is needed. The results of the two approaches are also checked to be the same.
+
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+from nempy import markets
+from nempy.spot_market_backend.solver_interface import PersistentInterfaceToSolver
+
+number_of_units = 400
+number_of_bands = 10
+number_of_intervals = 10
+
+rng = np.random.default_rng(0)
+units = ['U{}'.format(i) for i in range(number_of_units)]
+regions = rng.choice(['NSW', 'VIC'], number_of_units)
+volumes = rng.uniform(0.0, 20.0, (number_of_units, number_of_bands))
+prices = np.sort(rng.uniform(0.0, 300.0, (number_of_units, number_of_bands)), axis=1)
+
+
+def losses(flow):
+    return abs(flow) * 0.05
+
+
+def build_market(interval):
+    bands = [str(band) for band in range(1, number_of_bands + 1)]
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': units, 'region': regions}),
+                                market_regions=['NSW', 'VIC'])
+    market.set_unit_volume_bids(pd.DataFrame(volumes, columns=bands).assign(unit=units))
+    market.set_unit_price_bids(pd.DataFrame(prices + interval, columns=bands).assign(unit=units))
+    market.set_unit_bid_capacity_constraints(pd.DataFrame({
+        'unit': units,
+        'capacity': np.random.default_rng(interval).uniform(50.0, 200.0, number_of_units)}), 14000.0)
+    market.set_demand_constraints(pd.DataFrame({
+        'region': ['NSW', 'VIC'],
+        'demand': [6000.0 + 50.0 * interval, 5000.0 - 30.0 * interval]}))
+    market.set_interconnectors(pd.DataFrame({
+        'interconnector': ['I'], 'to_region': ['VIC'], 'from_region': ['NSW'], 'max': [1000.0], 'min': [-1000.0]}))
+    market.set_interconnector_losses(
+        pd.DataFrame({'interconnector': ['I'], 'from_region_loss_share': [0.5], 'loss_function': [losses]}),
+        pd.DataFrame({'interconnector': ['I'] * 21, 'loss_segment': range(1, 22),
+                      'break_point': np.linspace(-1000.0, 1000.0, 21)}))
+    return market
+
+
+def run(persistent_solver_interface=None):
+    dispatch_time = 0.0
+    results = []
+    for interval in range(number_of_intervals):
+        market = build_market(interval)
+        market.persistent_solver_interface = persistent_solver_interface
+        start = perf_counter()
+        market.dispatch()
+        dispatch_time += perf_counter() - start
+        results.append((market.get_energy_prices(), market.get_unit_dispatch()))
+    return dispatch_time / number_of_intervals, results
+
+
+fresh_time, fresh_results = run()
+persistent_time, persistent_results = run(PersistentInterfaceToSolver())
+
+for (fresh_prices, fresh_dispatch), (persistent_prices, persistent_dispatch) in zip(fresh_results,
+                                                                                  persistent_results):
+    pd.testing.assert_frame_equal(fresh_prices, persistent_prices)
+    pd.testing.assert_frame_equal(fresh_dispatch, persistent_dispatch)
+
+print('New solver model each interval: {:.3f} s per dispatch'.format(fresh_time))
+print('Persistent solver model: {:.3f} s per dispatch'.format(persistent_time))
@@ -0,0 +1,87 @@
+# Compares the time taken to dispatch identical markets with each of the solver backends registered in
+# nempy.spot_market_backend.solver_interface. The markets are synthetic two region markets with an interconnector, so
+# no historical data is needed. The results of each backend are checked against those of the first backend. Backends
+# whose solver isn't installed, e.g. GUROBI without a licence or HIGHS without highspy, are skipped.
+
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+from nempy import markets
+from nempy.spot_market_backend.solver_interface import create_solver_interface
+
+solver_names = ['CBC', 'HIGHS', 'GUROBI']
+number_of_units = 400
+number_of_bands = 10
+number_of_intervals = 10
+with_interconnector = True
+
+rng = np.random.default_rng(0)
+units = ['U{}'.format(i) for i in range(number_of_units)]
+regions = rng.choice(['NSW', 'VIC'], number_of_units)
+volumes = rng.uniform(0.0, 20.0, (number_of_units, number_of_bands))
+prices = np.sort(rng.uniform(0.0, 300.0, (number_of_units, number_of_bands)), axis=1)
+
+
+def losses(flow):
+    return abs(flow) * 0.05
+
+
+def build_market(interval, solver_name):
+    bands = [str(band) for band in range(1, number_of_bands + 1)]
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': units, 'region': regions}),
+                                market_regions=['NSW', 'VIC'])
+    market.solver_name = solver_name
+    market.set_unit_volume_bids(pd.DataFrame(volumes, columns=bands).assign(unit=units))
+    market.set_unit_price_bids(pd.DataFrame(prices + interval, columns=bands).assign(unit=units))
+    market.set_unit_bid_capacity_constraints(pd.DataFrame({
+        'unit': units,
+        'capacity': np.random.default_rng(interval).uniform(50.0, 200.0, number_of_units)}), 14000.0)
+    market.set_demand_constraints(pd.DataFrame({
+        'region': ['NSW', 'VIC'],
+        'demand': [6000.0 + 50.0 * interval, 5000.0 - 30.0 * interval]}))
+    if with_interconnector:
+        market.set_interconnectors(pd.DataFrame({
+            'interconnector': ['I'], 'to_region': ['VIC'], 'from_region': ['NSW'], 'max': [1000.0],
+            'min': [-1000.0]}))
+        market.set_interconnector_losses(
+            pd.DataFrame({'interconnector': ['I'], 'from_region_loss_share': [0.5], 'loss_function': [losses]}),
+            pd.DataFrame({'interconnector': ['I'] * 21, 'loss_segment': range(1, 22),
+                          'break_point': np.linspace(-1000.0, 1000.0, 21)}))
+    return market
+
+
+def run(solver_name):
+    dispatch_time = 0.0
+    results = []
+    for interval in range(number_of_intervals):
+        market = build_market(interval, solver_name)
+        start = perf_counter()
+        market.dispatch()
+        dispatch_time += perf_counter() - start
+        results.append((market.get_energy_prices(), market.get_unit_dispatch()))
+    return dispatch_time / number_of_intervals, results
+
+
+def available(solver_name):
+    try:
+        create_solver_interface(solver_name)
+    except Exception:
+        return False
+    return True
+
+
+times = {}
+reference_results = None
+for solver_name in [name for name in solver_names if available(name)]:
+    times[solver_name], results = run(solver_name)
+    if reference_results is None:
+        reference_results = results
+        continue
+    for (reference_prices, reference_dispatch), (backend_prices, backend_dispatch) in zip(reference_results,
+                                                                                          results):
+        pd.testing.assert_frame_equal(reference_prices, backend_prices, atol=1e-4)
+        pd.testing.assert_frame_equal(reference_dispatch, backend_dispatch, atol=1e-4)
+
+for solver_name, dispatch_time in times.items():
+    print('{}: {:.3f} s per dispatch'.format(solver_name, dispatch_time))
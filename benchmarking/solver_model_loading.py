@@ -0,0 +1,115 @@
+# Compares the time taken to load constraints into the solver interface using the matrix based path in
+# InterfaceToSolver.add_constraints against the previous approach of building a mip expression for each row from
+# arrays of mip variable objects. A synthetic model roughly the size of a full NEM dispatch interval is used, so this
+# script doesn't need any historical data.
+
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from mip import xsum
+
+from nempy.spot_market_backend import solver_interface
+
+rng = np.random.default_rng(1)
+
+number_of_units = 500
+number_of_bands = 10
+number_of_regions = 5
+number_of_fcas_constraints = 4000
+number_of_generic_constraints = 1200
+
+
+def build_synthetic_model():
+    number_of_variables = number_of_units * number_of_bands
+    decision_variables = pd.DataFrame({
+        'variable_id': np.arange(number_of_variables),
+        'lower_bound': 0.0,
+        'upper_bound': rng.uniform(0.0, 100.0, number_of_variables),
+        'type': 'continuous'})
+    unit_of_variable = np.repeat(np.arange(number_of_units), number_of_bands)
+    region_of_unit = rng.integers(0, number_of_regions, number_of_units)
+
+    lhs = []
+    rhs = []
+    next_constraint_id = 0
+
+    # Unit level constraints, capacity and ramp rates, with one term for each bid band of the unit.
+    for constraint_type in ['<=', '<=', '>=']:
+        constraint_ids = next_constraint_id + unit_of_variable
+        lhs.append(pd.DataFrame({'constraint_id': constraint_ids, 'variable_id': decision_variables['variable_id'],
+                                 'coefficient': 1.0}))
+        rhs.append(pd.DataFrame({'constraint_id': next_constraint_id + np.arange(number_of_units),
+                                 'type': constraint_type, 'rhs': rng.uniform(0.0, 500.0, number_of_units)}))
+        next_constraint_id += number_of_units
+
+    # Regional demand constraints, with a term for every bid in the region.
+    lhs.append(pd.DataFrame({'constraint_id': next_constraint_id + region_of_unit[unit_of_variable],
+                             'variable_id': decision_variables['variable_id'], 'coefficient': 1.0}))
+    rhs.append(pd.DataFrame({'constraint_id': next_constraint_id + np.arange(number_of_regions),
+                             'type': '=', 'rhs': 1000.0}))
+    next_constraint_id += number_of_regions
+
+    # FCAS style unit constraints with a handful of terms, and generic constraints with a few tens of terms.
+    for number_of_constraints, terms_per_constraint in [(number_of_fcas_constraints, 4),
+                                                        (number_of_generic_constraints, 30)]:
+        constraint_ids = next_constraint_id + np.repeat(np.arange(number_of_constraints), terms_per_constraint)
+        lhs.append(pd.DataFrame({
+            'constraint_id': constraint_ids,
+            'variable_id': rng.integers(0, number_of_variables, len(constraint_ids)),
+            'coefficient': rng.uniform(-1.0, 1.0, len(constraint_ids))}))
+        rhs.append(pd.DataFrame({'constraint_id': next_constraint_id + np.arange(number_of_constraints),
+                                 'type': '<=', 'rhs': 1000.0}))
+        next_constraint_id += number_of_constraints
+
+    return decision_variables, pd.concat(lhs), pd.concat(rhs)
+
+
+def add_constraints_row_by_row(si, constraints_lhs, constraints_type_and_rhs):
+    """The previous implementation of InterfaceToSolver.add_constraints, kept here for comparison."""
+    constraints_lhs = constraints_lhs.groupby(['constraint_id', 'variable_id'], as_index=False).agg(
+        {'coefficient': 'sum'})
+    rows = constraints_lhs.groupby(['constraint_id'], as_index=False)
+    rhs = dict(zip(constraints_type_and_rhs['constraint_id'], constraints_type_and_rhs['rhs']))
+    enq_type = dict(zip(constraints_type_and_rhs['constraint_id'], constraints_type_and_rhs['type']))
+    var_ids = constraints_lhs['variable_id'].to_numpy()
+    vars = np.asarray(
+        [si.variables[k] if k in si.variables.keys() else None for k in range(0, max(var_ids) + 1)])
+    coefficients = constraints_lhs['coefficient'].to_numpy()
+    for row_id, row in rows.indices.items():
+        exp = xsum((vars[var_ids[row]] * coefficients[row]).tolist())
+        if enq_type[row_id] == '<=':
+            new_constraint = exp <= rhs[row_id]
+        elif enq_type[row_id] == '>=':
+            new_constraint = exp >= rhs[row_id]
+        else:
+            new_constraint = exp == rhs[row_id]
+        si.mip_model.add_constr(new_constraint, name=str(row_id))
+
+
+def time_loading(add_constraints, decision_variables, constraints_lhs, constraints_type_and_rhs, repeats=3):
+    times = []
+    for _ in range(repeats):
+        si = solver_interface.InterfaceToSolver(single_model=True)
+        si.add_variables(decision_variables)
+        start = perf_counter()
+        add_constraints(si, constraints_lhs, constraints_type_and_rhs)
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+decision_variables, constraints_lhs, constraints_type_and_rhs = build_synthetic_model()
+print('Variables: {}, constraints: {}, lhs terms: {}'.format(len(decision_variables), len(constraints_type_and_rhs),
+                                                             len(constraints_lhs)))
+
+start = perf_counter()
+solver_interface.create_constraint_matrix(constraints_lhs, constraints_type_and_rhs)
+print('Assembling the constraint matrix: {:.3f} s'.format(perf_counter() - start))
+
+row_by_row = time_loading(add_constraints_row_by_row, decision_variables, constraints_lhs,
+                          constraints_type_and_rhs)
+matrix = time_loading(lambda si, lhs, rhs: si.add_constraints(lhs, rhs), decision_variables, constraints_lhs,
+                      constraints_type_and_rhs)
+
+print('Row by row expression building: {:.3f} s'.format(row_by_row))
+print('Matrix based loading: {:.3f} s'.format(matrix))
+print('Speed up: {:.1f}x'.format(row_by_row / matrix))
@@ -0,0 +1,49 @@
+# Compares the time taken to create tie break constraints, and dispatch, with n - 1 constraints for each group of n
+# equally priced bids and with a constraint for every pair of bids from different units. The markets are synthetic,
+# with most units bidding some volume at the market floor price and at $0/MWh, so the tie groups have hundreds of
+# members, as in historical intervals.
+
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+from nempy import markets
+
+number_of_units = 300
+number_of_bands = 10
+number_of_intervals = 5
+tie_break_cost = 1e-3
+
+
+def build_market(interval):
+    rng = np.random.default_rng(interval)
+    units = ['U{}'.format(i) for i in range(number_of_units)]
+    bands = [str(band) for band in range(1, number_of_bands + 1)]
+    prices = np.sort(rng.choice([-1000.0, 0.0, 35.0, 80.0, 300.0, 15000.0], (number_of_units, number_of_bands)),
+                     axis=1)
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': units, 'region': rng.choice(['NSW', 'VIC'],
+                                                                                            number_of_units)}),
+                                market_regions=['NSW', 'VIC'])
+    market.set_unit_volume_bids(pd.DataFrame(rng.uniform(0.0, 30.0, (number_of_units, number_of_bands)),
+                                             columns=bands).assign(unit=units))
+    market.set_unit_price_bids(pd.DataFrame(prices, columns=bands).assign(unit=units))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': rng.uniform(5000.0, 8000.0, 2)}))
+    return market
+
+
+for all_pairs in [True, False]:
+    constraint_time = 0.0
+    dispatch_time = 0.0
+    number_of_constraints = 0
+    for interval in range(number_of_intervals):
+        market = build_market(interval)
+        start = perf_counter()
+        market.set_tie_break_constraints(tie_break_cost, all_pairs=all_pairs)
+        constraint_time += perf_counter() - start
+        number_of_constraints += len(market._constraints_rhs_and_type['tie_break'])
+        start = perf_counter()
+        market.dispatch()
+        dispatch_time += perf_counter() - start
+    print('all_pairs={}: {} constraints, {:.3f} s creating constraints, {:.3f} s dispatching, per interval'.format(
+        all_pairs, number_of_constraints // number_of_intervals, constraint_time / number_of_intervals,
+        dispatch_time / number_of_intervals))
@@ -8,6 +8,7 @@
 import sqlite3
 import pandas as pd
 from nempy import markets, time_sequential
+from nempy.spot_market_backend.solver_interface import PersistentInterfaceToSolver
 from nempy.historical_inputs import loaders, mms_db, \
     xml_cache, units, demand, interconnectors, constraints
 
@@ -46,6 +47,10 @@ dispatch_intervals = ['2019/01/01 12:00:00',
 outputs = []
 
 unit_dispatch = None
+
+# Keep the solver model alive between intervals, so each dispatch only applies
+# the changes from the previous interval.
+persistent_solver_interface = PersistentInterfaceToSolver()
 from time import time
 
 t0 = time()
@@ -64,6 +69,7 @@ for interval in dispatch_intervals:
     market = markets.SpotMarket(market_regions=['QLD1', 'NSW1', 'VIC1',
                                                 'SA1', 'TAS1'],
                                 unit_info=unit_info)
+    market.persistent_solver_interface = persistent_solver_interface
 
     volume_bids, price_bids = unit_inputs.get_processed_bids()
     market.set_unit_volume_bids(volume_bids)
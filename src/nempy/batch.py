@@ -0,0 +1,233 @@
+import os
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+
+class IntervalResult:
+    """The outcome of dispatching one interval with dispatch_many.
+
+    Attributes
+    ----------
+    interval
+        The interval, as given to dispatch_many.
+
+    results
+        The value returned by the extract function, None if the interval failed.
+
+    error : str
+        The traceback of the exception raised while building, dispatching or extracting results for the interval, None
+        if the interval succeeded.
+    """
+
+    def __init__(self, interval, results=None, error=None):
+        self.interval = interval
+        self.results = results
+        self.error = error
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+
+def market_results(market):
+    """The default results extracted from each market by dispatch_many.
+
+    Returns
+    -------
+    dict[str, pd.DataFrame]
+        With the keys 'energy_prices' and 'unit_dispatch', and 'interconnector_flows' if the market has
+        interconnectors.
+    """
+    results = {'energy_prices': market.get_energy_prices(),
+               'unit_dispatch': market.get_unit_dispatch()}
+    if 'interconnectors' in market.get_variable_set_names():
+        results['interconnector_flows'] = market.get_interconnector_flows()
+    return results
+
+
+def dispatch_many(intervals, builder, workers=None, extract=market_results, dispatch_kwargs=None, chunksize=1,
+                  max_pending=None):
+    """Build, dispatch and extract results for many independent intervals, in parallel on a process pool.
+
+    For each interval, builder(interval) is called to create a SpotMarket, which is then dispatched, and extract(market)
+    is called to get the results to return. Each worker process builds and solves one market at a time, and a new
+    solver model is built for each interval, so the throughput scales with the number of workers, up to the number of
+    cores. Only the intervals, and the extracted results, are sent between processes, so builder and extract need to
+    be picklable, e.g. module level functions, or instances of module level classes. A builder that needs expensive
+    set up, such as a connection to a historical inputs database, can do the set up the first time it is called in
+    each worker.
+
+    Intervals are read from the iterable, and sent to the workers, as the results are consumed, with at most
+    max_pending chunks of intervals waiting on the pool at a time, so long or lazily generated batches can be used.
+    Results are yielded in the same order as the intervals, as soon as they, and all the results before them, are
+    ready. If building, dispatching or extracting results for an interval raises an exception, then the traceback is
+    recorded in the IntervalResult for that interval, and the rest of the batch carries on. If a worker process dies,
+    e.g. because the solver crashed or the process ran out of memory, the pool is restarted, and the intervals that
+    were waiting on the pool are re-run one at a time, so that the interval that killed the worker is recorded as
+    failed, and the rest of the batch carries on.
+
+    Examples
+    --------
+
+    >>> import pandas as pd
+    >>> from nempy import markets
+
+    >>> def builder(demand):
+    ...     market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}),
+    ...                                 market_regions=['NSW'])
+    ...     market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [20.0, 50.0]}))
+    ...     market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+    ...     market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [demand]}))
+    ...     return market
+
+    With workers=1 the intervals are dispatched in this process, functions defined interactively, like the builder
+    above, can then be used.
+
+    >>> for result in dispatch_many([10.0, 30.0, 100.0], builder, workers=1):
+    ...     if result.failed:
+    ...         print(result.interval, 'failed')
+    ...     else:
+    ...         print(result.interval, result.results['energy_prices']['price'].iloc[0])
+    10.0 50.0
+    30.0 100.0
+    100.0 failed
+
+    Parameters
+    ----------
+    intervals : iterable
+        The intervals to dispatch, these can be any picklable objects understood by builder, e.g. interval date time
+        strings, or scenario definitions.
+
+    builder : callable
+        Takes an interval and returns a SpotMarket ready for dispatch.
+
+    workers : int
+        The number of worker processes, default None, one per core. If 1 then the intervals are dispatched in this
+        process.
+
+    extract : callable
+        Takes a dispatched SpotMarket and returns the results to keep, default market_results.
+
+    dispatch_kwargs : dict
+        Keyword arguments passed to SpotMarket.dispatch, default None.
+
+    chunksize : int
+        The number of intervals sent to a worker at a time, larger values reduce the communication overhead for large
+        batches of quick intervals.
+
+    max_pending : int
+        The most chunks of intervals waiting on the pool at a time, default None, twice the number of workers.
+
+    Yields
+    ------
+    IntervalResult
+    """
+    task = _DispatchTask(builder, extract, dispatch_kwargs or {})
+    if workers == 1:
+        yield from map(task, intervals)
+        return
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    intervals = iter(intervals)
+    pool = _WorkerPool(workers, task)
+    try:
+        pending = deque()
+        while True:
+            while len(pending) < max_pending:
+                chunk = list(islice(intervals, chunksize))
+                if not chunk:
+                    break
+                pending.append((chunk, pool.submit(chunk)))
+            if not pending:
+                return
+            chunk, future = pending.popleft()
+            try:
+                yield from _chunk_results(chunk, future)
+            except BrokenProcessPool:
+                # The worker running one of the pending chunks died, taking the pool with it, so find the interval
+                # responsible by re-running the unfinished chunks one interval at a time on a new pool.
+                waiting = [(chunk, future)] + list(pending)
+                pending.clear()
+                pool.restart()
+                for chunk, future in waiting:
+                    if _finished(future):
+                        yield from _chunk_results(chunk, future)
+                    else:
+                        for interval in chunk:
+                            yield pool.run_alone(interval)
+    finally:
+        pool.shutdown()
+
+
+def _finished(future):
+    """Whether the future completed without being cancelled or losing its worker, so its outcome can be kept."""
+    return future.done() and not future.cancelled() and not isinstance(future.exception(), BrokenProcessPool)
+
+
+def _chunk_results(chunk, future):
+    """The results of a chunk of intervals, with the error recorded for each interval if the chunk could not be sent
+    to, or its results returned from, a worker, e.g. because the builder, or the extracted results, can't be pickled.
+
+    Raises
+    ------
+        BrokenProcessPool
+            If the worker process running the chunk died.
+    """
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        raise
+    except Exception:
+        error = traceback.format_exc()
+        return [IntervalResult(interval, error=error) for interval in chunk]
+
+
+class _DispatchTask:
+    """Build, dispatch and extract results for an interval, catching any exception."""
+
+    def __init__(self, builder, extract, dispatch_kwargs):
+        self.builder = builder
+        self.extract = extract
+        self.dispatch_kwargs = dispatch_kwargs
+
+    def __call__(self, interval):
+        try:
+            market = self.builder(interval)
+            market.dispatch(**self.dispatch_kwargs)
+            return IntervalResult(interval, results=self.extract(market))
+        except Exception:
+            return IntervalResult(interval, error=traceback.format_exc())
+
+    def run_chunk(self, intervals):
+        return [self(interval) for interval in intervals]
+
+
+class _WorkerPool:
+    """A process pool running _DispatchTask chunks, that can be restarted if a worker process dies."""
+
+    def __init__(self, workers, task):
+        self.workers = workers
+        self.task = task
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(self, intervals):
+        return self.executor.submit(self.task.run_chunk, intervals)
+
+    def restart(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def run_alone(self, interval):
+        """Run an interval with nothing else waiting on the pool, so if a worker dies this interval is the cause."""
+        try:
+            return _chunk_results([interval], self.submit([interval]))[0]
+        except BrokenProcessPool:
+            error = 'The worker process dispatching the interval died.\n' + traceback.format_exc()
+            self.restart()
+            return IntervalResult(interval, error=error)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
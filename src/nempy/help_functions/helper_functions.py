@@ -1,7 +1,26 @@
+from functools import wraps
+
 import numpy as np
 import pandas as pd
 
 
+def cached_result(get_result):
+    """Decorate a getter method so its result is calculated once, and kept in the object's _results dict, returning a
+    copy of the cached result on each call. Clearing _results, e.g. when new inputs are loaded, recalculates it."""
+    @wraps(get_result)
+    def get_cached_result(self):
+        return shared_result(self, get_result.__name__).copy()
+    return get_cached_result
+
+
+def shared_result(obj, getter):
+    """The cached result of a getter decorated with cached_result, calculating it if needed, without copying it. The
+    result is shared with later calls, so it must not be modified."""
+    if getter not in obj._results:
+        obj._results[getter] = getattr(type(obj), getter).__wrapped__(obj)
+    return obj._results[getter]
+
+
 def save_index(dataframe, new_col_name, offset=0):
     # Make sure index starts at zero.
     dataframe = dataframe.reset_index(drop=True)
@@ -14,6 +33,14 @@ def save_index(dataframe, new_col_name, offset=0):
     return dataframe
 
 
+def concat_columns(data_frames, columns):
+    # Concatenate the given columns of a list of data frames, column by column as numpy arrays. This skips the index
+    # and dtype alignment done by pd.concat, and the copying of columns that aren't needed.
+    if len(data_frames) == 0:
+        return pd.DataFrame({col: [] for col in columns})
+    return pd.DataFrame({col: np.concatenate([df[col].to_numpy() for df in data_frames]) for col in columns})
+
+
 def max_constraint_index(newest_variable_data):
     # Find the maximum constraint index already in use in the constraint matrix.
     max_index = newest_variable_data['ROWINDEX'].max()
@@ -2,15 +2,50 @@ import xmltodict
 import pandas as pd
 import requests
 import zipfile
-import io
 import os
+import random
+import threading
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta, time
 from time import sleep
+from xml.parsers import expat
+from nempy.help_functions import helper_functions as hf
 
 pd.set_option('display.width', None)
 
+# The file in each cache folder listing the daily zip files that have been downloaded and checked, and the lock
+# serialising writes to it.
+_manifest_file_name = 'nemde_download_manifest.txt'
+_manifest_lock = threading.Lock()
+
+# The tables read from NEMDE files by XMLCacheManager, the path to the elements that make up the rows of each table, and
+# the attributes of their ancestors to include, see read_xml_tables.
+_trader = 'NemSpdInputs/TraderCollection/Trader'
+_period = 'NemSpdInputs/PeriodCollection/Period'
+_lhs = 'NemSpdInputs/GenericConstraintCollection/GenericConstraint/LHSFactorCollection'
+_nemde_tables = {
+    'case': ('NemSpdInputs/Case', []),
+    'traders': (_trader, []),
+    'trader_initial_conditions': (_trader + '/TraderInitialConditionCollection/TraderInitialCondition',
+                                  ['TraderID']),
+    'price_bids': (_trader + '/TradePriceStructureCollection/TradePriceStructure/TradeTypePriceStructureCollection/'
+                             'TradeTypePriceStructure', ['TraderID', 'TraderType']),
+    'trader_periods': (_period + '/TraderPeriodCollection/TraderPeriod', []),
+    'volume_bids': (_period + '/TraderPeriodCollection/TraderPeriod/TradeCollection/Trade', ['TraderID']),
+    'mnsp_offers': (_period + '/InterconnectorPeriodCollection/InterconnectorPeriod/MNSPOfferCollection/MNSPOffer',
+                    ['InterconnectorID', 'MNSP']),
+    'generic_constraints': ('NemSpdInputs/GenericConstraintCollection/GenericConstraint', []),
+    'region_factors': (_lhs + '/RegionFactor', ['ConstraintID']),
+    'trader_factors': (_lhs + '/TraderFactor', ['ConstraintID']),
+    'interconnector_factors': (_lhs + '/InterconnectorFactor', ['ConstraintID']),
+    'case_solution': ('NemSpdOutputs/CaseSolution', []),
+    'period_solution': ('NemSpdOutputs/PeriodSolution', []),
+    'region_solution': ('NemSpdOutputs/RegionSolution', []),
+    'constraint_solution': ('NemSpdOutputs/ConstraintSolution', []),
+}
+
 
 class XMLCacheManager:
     """Class for accessing data stored in AEMO's NEMDE output files.
@@ -22,19 +57,80 @@ class XMLCacheManager:
 
     >>> manager = XMLCacheManager('test_nemde_cache')
 
+    Alternatively, the cache can store the daily zip files AEMO publishes the NEMDE files in, rather than extracting
+    them. Each interval's file is then read directly from its zip file, which uses several times less disk space.
+
+    >>> manager = XMLCacheManager('test_nemde_cache', zipped=True)
+
     Parameters
     ----------
     cache_folder : str
+
+    extract_cache : bool or None
+        If True, the tables read from each NEMDE file are also saved to a compressed extract file next to it, and are
+        read from the extract, rather than the much larger XML file, the next time the interval is loaded. An extract
+        is only used while the NEMDE file's size and modification time, or for a zipped file its size and checksum,
+        match those it was made from. The default, None, uses extracts only if the cache isn't zipped, so a zipped
+        cache holds just the daily zip files. Passing extract_cache=True with zipped=True writes an extract per
+        interval, 288 files per day, next to the day's zip file, which costs some of the disk space, and file count,
+        zipping saves, in exchange for faster repeat loads of intervals.
+
+    zipped : bool
+        If True, the daily zip files are stored in the cache without extracting them, default False. The index of the
+        zip file for the day of the loaded interval is kept in memory, so loading intervals from the same day only
+        reads their own files from the zip file.
+
+    Attributes
+    ----------
+    nemweb_url : str
+        The address daily zip files are downloaded from, default 'https://www.nemweb.com.au'.
+
+    download_attempts : int
+        The number of times downloading a daily zip file is attempted before giving up, default 5.
+
+    download_backoff : float
+        The maximum wait, in seconds, before the second attempt to download a daily zip file, default 10.0. The maximum
+        doubles for each later attempt, and the actual wait is chosen at random up to the maximum, so that many
+        failed downloads aren't all retried at the same time.
     """
 
-    def __init__(self, cache_folder):
+    nemweb_url = 'https://www.nemweb.com.au'
+    download_attempts = 5
+    download_backoff = 10.0
+
+    def __init__(self, cache_folder, extract_cache=None, zipped=False):
         self.cache_folder = cache_folder
+        self.extract_cache = not zipped if extract_cache is None else extract_cache
+        self.zipped = zipped
         self.interval = None
-        self.xml = None
+        self._xml = None
+        self._tables = {}
+        self._results = {}
+        self._archive = None
+        self._failed_downloads = {}
         Path(cache_folder).mkdir(parents=False, exist_ok=True)
 
-    def populate(self, start_year, start_month, end_year, end_month, verbose=True):
-        """Download data to the cache from the AEMO website. Data downloaded is inclusive of the start and end month."""
+    def __getstate__(self):
+        # The open zip file can't be pickled, it is opened again when needed.
+        state = self.__dict__.copy()
+        state['_archive'] = None
+        return state
+
+    @property
+    def xml(self):
+        """The whole NEMDE file of the loaded interval as nested dictionaries, as parsed by xmltodict.
+
+        The getter methods only read the parts of the file they need, so the file is parsed into dictionaries the first
+        time this attribute is used for each interval."""
+        if self._xml is None and self.interval is not None:
+            with self._open_file() as file:
+                self._xml = xmltodict.parse(file)
+        return self._xml
+
+    def populate(self, start_year, start_month, end_year, end_month, verbose=True, workers=4):
+        """Download data to the cache from the AEMO website. Data downloaded is inclusive of the start and end month.
+
+        See populate_by_day."""
 
         if end_month == 12:
             end_month = 1
@@ -43,28 +139,66 @@ class XMLCacheManager:
             end_month += 1
 
         self.populate_by_day(start_year=start_year, start_month=start_month, start_day=1,
-                             end_year=end_year, end_month=end_month, end_day=1, verbose=verbose)
+                             end_year=end_year, end_month=end_month, end_day=1, verbose=verbose, workers=workers)
 
-    def populate_by_day(self, start_year, start_month, end_year, end_month, start_day, end_day, verbose=True):
+    def populate_by_day(self, start_year, start_month, end_year, end_month, start_day, end_day, verbose=True,
+                        workers=4):
         """Download data to the cache from the AEMO website. Data downloaded is inclusive of the start and end date.
+
+        The daily zip files are downloaded in parallel by a pool of threads. Failed downloads are retried with a
+        random, exponentially increasing, wait between attempts, see the download_attempts and download_backoff
+        attributes. Each zip file is checked before its files are added to the cache, and once they are the day is
+        recorded in a manifest in the cache folder. Days already in the manifest are skipped, so an interrupted
+        download can be resumed by running it again.
+
+        Parameters
+        ----------
+        workers : int
+            The number of days downloaded at a time, default 4.
+
+        Raises
+        ------
+        DownloadError
+            If downloading any of the days failed on every attempt, e.g. because NEMWeb can't be reached, after all the
+            other days have been downloaded.
+        MissingDataError
+            If NEMWeb doesn't have any of the days, and all the other days were downloaded.
         """
 
         start = datetime(year=start_year, month=start_month, day=start_day) - timedelta(days=1)
         end = datetime(year=end_year, month=end_month, day=end_day)
+        days = []
         download_date = start
         while download_date <= end:
-            if verbose:
-                print('Downloading NEMDE XML file for year={}, month={}, day={}'.format(download_date.year,
-                                                                                        download_date.month,
-                                                                                        download_date.day))
-            download_date_str = download_date.isoformat().replace('T', ' ').replace('-', '/')
-            self.load_interval(download_date_str)
+            day = _get_market_day(download_date)
+            if day not in days:
+                days.append(day)
             download_date += timedelta(days=1)
 
+        downloaded = self._read_manifest()
+        days = [day for day in days if not self._day_in_cache(day, downloaded)]
+        errors = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            downloads = [executor.submit(self._download_day, day, verbose) for day in days]
+            for download in downloads:
+                try:
+                    download.result()
+                except (DownloadError, MissingDataError) as error:
+                    errors.append(error)
+        if errors:
+            message = '\n'.join(str(error) for error in errors)
+            if any(isinstance(error, DownloadError) for error in errors):
+                raise DownloadError(message)
+            raise MissingDataError(message)
+
     def load_interval(self, interval):
         """Load the data for particular 5 min dispatch interval into memory.
 
         If the file intervals data is not on disk then an attempt to download it from AEMO's NEMweb portal is made.
+        If downloading a day fails, the error is raised again for the day's other intervals without another attempt,
+        use populate_by_day to retry the download.
+        The results of the getter methods are calculated once per loaded interval, and each call returns a copy of
+        them, so they can be modified without changing the results of later calls.
 
         Examples
         --------
@@ -80,8 +214,11 @@ class XMLCacheManager:
 
         Raises
         ------
+        DownloadError
+            If the data for an interval is not in the cache and downloading it failed, e.g. because NEMWeb can't be
+            reached.
         MissingDataError
-            If the data for an interval is not in the cache and cannot be downloaded from NEMWeb.
+            If the data for an interval is not in the cache and NEMWeb doesn't have it.
         """
         self.interval = interval
         if not self.interval_inputs_in_cache():
@@ -90,9 +227,67 @@ class XMLCacheManager:
                 raise MissingDataError(
                     'File not downloaded, check internet connection and that NEMWeb contains data for interval {}.'.format(
                         self.interval))
-        with open(self.get_file_path()) as file:
-            read = file.read()
-            self.xml = xmltodict.parse(read)
+        self._xml = None
+        self._tables = {}
+        self._results = {}
+
+    def _read_tables(self, *names):
+        """Get tables from the loaded interval's NEMDE file, all the tables used by the getters are read in one pass
+        of the file the first time any of them are needed."""
+        if not self._tables:
+            extract = self.get_file_path().with_suffix('.npz')
+            source_key = self._get_source_key()
+            tables = _load_extract(extract, source_key) if self.extract_cache else None
+            if tables is None:
+                with self._open_file() as file:
+                    tables = read_xml_tables(file, _nemde_tables)
+                if self.extract_cache:
+                    _save_extract(extract, source_key, tables)
+            self._tables = tables
+        tables = [self._tables[name] for name in names]
+        return tables[0] if len(tables) == 1 else tables
+
+    def _open_file(self):
+        """Open the loaded interval's NEMDE file for reading in binary mode."""
+        if self.zipped:
+            return self._get_archive().open(self.get_file_name())
+        return open(self.get_file_path(), 'rb')
+
+    def _get_source_key(self):
+        """Identify the version of the loaded interval's NEMDE file."""
+        if self.zipped:
+            info = self._get_archive().getinfo(self.get_file_name())
+            return [info.file_size, info.CRC]
+        stat = os.stat(self.get_file_path())
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _get_archive(self):
+        """The zip file for the market day of the loaded interval, None if it's not in the cache. The zip file is kept
+        open, with its index in memory, until an interval from a different day is used."""
+        path = Path(self.cache_folder) / self._get_zip_file_name()
+        if self._archive is not None and self._archive.filename == str(path):
+            return self._archive
+        self._close_archive()
+        if os.path.exists(path):
+            self._archive = zipfile.ZipFile(path)
+        return self._archive
+
+    def _close_archive(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def _in_cache(self, name):
+        if self.zipped:
+            archive = self._get_archive()
+            if archive is None:
+                return False
+            try:
+                archive.getinfo(name)
+            except KeyError:
+                return False
+            return True
+        return os.path.exists(Path(self.cache_folder) / name)
 
     def interval_inputs_in_cache(self):
         """Check if the cache contains the data for the loaded interval, primarily for debugging.
@@ -111,11 +306,13 @@ class XMLCacheManager:
         -------
         bool
         """
-        return os.path.exists(self.get_file_path())
+        return self._in_cache(self.get_file_name())
 
     def get_file_path(self):
         """Get the file path to the currently loaded interval.
 
+        If the cache is zipped, the file is read from the day's zip file rather than from this path.
+
         Examples
         --------
         >>> manager = XMLCacheManager('test_nemde_cache')
@@ -148,44 +345,100 @@ class XMLCacheManager:
         interval_number = self._get_interval_number_as_str()
         base_name = "NEMSPDOutputs_{year}{month}{day}{interval_number}00.loaded"
         name = base_name.format(year=year, month=month, day=day, interval_number=interval_number)
-        path_name = Path(self.cache_folder) / name
         name_OCD = name.replace('.loaded', '_OCD.loaded')
-        path_name_OCD = Path(self.cache_folder) / name_OCD
-        if os.path.exists(path_name):
+        if self._in_cache(name):
             return name
-        elif path_name_OCD:
+        elif self._in_cache(name_OCD):
             return name_OCD
         else:
             return name
 
+    def _get_zip_file_name(self, day=None):
+        """The name of the daily zip file for a market day, by default the day of the loaded interval."""
+        if day is None:
+            day = _get_market_day(self._get_interval_datetime_object())
+        return "NemSpdOutputs_{day:%Y%m%d}_loaded.zip".format(day=day)
+
     def _download_xml_from_nemweb(self):
-        year, month, day = self._get_market_year_month_day_as_str()
-        base_url = "https://www.nemweb.com.au/Data_Archive/Wholesale_Electricity/NEMDE/{year}/NEMDE_{year}_{month}/NEMDE_Market_Data/NEMDE_Files/NemSpdOutputs_{year}{month}{day}_loaded.zip"
-        url = base_url.format(year=year, month=month, day=day)
+        self._close_archive()
+        day = _get_market_day(self._get_interval_datetime_object())
+        if day in self._failed_downloads:
+            error = self._failed_downloads[day]
+            raise type(error)(str(error))
+        try:
+            self._download_day(day)
+        except (DownloadError, MissingDataError) as error:
+            self._failed_downloads[day] = error
+            raise
+
+    def _download_day(self, day, verbose=False):
+        """Download the zip file for a market day, and add its files to the cache, either by saving the zip file, if
+        the cache is zipped, or by extracting them."""
+        if verbose:
+            print('Downloading NEMDE XML file for year={}, month={}, day={}'.format(day.year, day.month, day.day))
+        zip_file_name = self._get_zip_file_name(day)
+        base_url = "{nemweb_url}/Data_Archive/Wholesale_Electricity/NEMDE/{day:%Y}/NEMDE_{day:%Y_%m}/NEMDE_Market_Data/NEMDE_Files/{zip_file_name}"
+        url = base_url.format(nemweb_url=self.nemweb_url, day=day, zip_file_name=zip_file_name)
+        path = Path(self.cache_folder) / zip_file_name
+        temporary = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
         try:
-            r = requests.get(url)
-            z = zipfile.ZipFile(io.BytesIO(r.content))
-            z.extractall(self.cache_folder)
-        except zipfile.BadZipFile:
-            sleep(200)
-            r = requests.get(url)
-            z = zipfile.ZipFile(io.BytesIO(r.content))
-            z.extractall(self.cache_folder)
+            self._download_zip(url, temporary)
+            if self.zipped:
+                os.replace(temporary, path)
+            else:
+                with zipfile.ZipFile(temporary) as z:
+                    z.extractall(self.cache_folder)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self._record_download(zip_file_name)
+
+    def _download_zip(self, url, path):
+        """Download a zip file to path, retrying with backoff until a complete zip file, with no corrupt members, has
+        been downloaded."""
+        error = None
+        for attempt in range(self.download_attempts):
+            if attempt > 0:
+                sleep(random.uniform(0, self.download_backoff * 2 ** (attempt - 1)))
+            try:
+                with requests.get(url, stream=True, timeout=60) as r:
+                    if r.status_code == 404:
+                        raise MissingDataError('NEMWeb has no file {}.'.format(url))
+                    r.raise_for_status()
+                    with open(path, 'wb') as file:
+                        for chunk in r.iter_content(chunk_size=2 ** 20):
+                            file.write(chunk)
+                with zipfile.ZipFile(path) as z:
+                    corrupt_file = z.testzip()
+                if corrupt_file is not None:
+                    raise zipfile.BadZipFile('Corrupt file {} in download.'.format(corrupt_file))
+                return
+            except (requests.RequestException, zipfile.BadZipFile) as download_error:
+                error = download_error
+        raise DownloadError('Download of {} failed after {} attempts, last error: {}'.format(
+            url, self.download_attempts, error))
+
+    def _read_manifest(self):
+        """The names of the daily zip files that have been downloaded to the cache."""
+        path = Path(self.cache_folder) / _manifest_file_name
+        if not os.path.exists(path):
+            return set()
+        with open(path) as file:
+            return set(line.strip() for line in file)
+
+    def _record_download(self, zip_file_name):
+        with _manifest_lock:
+            with open(Path(self.cache_folder) / _manifest_file_name, 'a') as file:
+                file.write(zip_file_name + '\n')
+
+    def _day_in_cache(self, day, downloaded):
+        zip_file_name = self._get_zip_file_name(day)
+        # Zip files are only saved to a zipped cache once they have been checked.
+        return zip_file_name in downloaded or (self.zipped and os.path.exists(Path(self.cache_folder) / zip_file_name))
 
     def _get_market_year_month_day(self):
-        date_time = self._get_interval_datetime_object()
-        hour = date_time.hour
-        minute = date_time.minute
-        start_market_day = time(hour=4, minute=5)
-        interval_time = time(hour=hour, minute=minute)
-        if interval_time < start_market_day:
-            date_time_for_date = date_time - timedelta(days=1)
-        else:
-            date_time_for_date = date_time
-        year = date_time_for_date.year
-        month = date_time_for_date.month
-        day = date_time_for_date.day
-        return year, month, day
+        day = _get_market_day(self._get_interval_datetime_object())
+        return day.year, day.month, day.day
 
     def _get_interval_number_as_str(self):
         return str(self._get_interval_number()).zfill(3)
@@ -208,6 +461,7 @@ class XMLCacheManager:
     def _get_interval_datetime_object(self):
         return datetime.strptime(self.interval, '%Y/%m/%d %H:%M:%S')
 
+    @hf.cached_result
     def get_unit_initial_conditions(self):
         """Get the initial conditions of units at the start of the dispatch interval.
 
@@ -257,29 +511,27 @@ class XMLCacheManager:
             ================  ========================================
 
         """
-        traders = self.xml['NEMSPDCaseFile']['NemSpdInputs']['TraderCollection']['Trader']
-        initial_conditions = dict(DUID=[], TRADERTYPE=[], INITIALMW=[], RAMPUPRATE=[], RAMPDOWNRATE=[], AGCSTATUS=[])
+        traders, initial_conditions = self._read_tables('traders', 'trader_initial_conditions')
         if self.is_intervention_period():
             INITIALMW_name = 'WhatIfInitialMW'
         else:
             INITIALMW_name = 'InitialMW'
         name_map = dict(INITIALMW=INITIALMW_name, RAMPUPRATE='SCADARampUpRate', RAMPDOWNRATE='SCADARampDnRate',
                         AGCSTATUS='AGCStatus')
-        for trader in traders:
-            initial_conditions['DUID'].append(trader['@TraderID'])
-            initial_conditions['TRADERTYPE'].append(trader['@TraderType'])
-            initial_cons = trader['TraderInitialConditionCollection']['TraderInitialCondition']
-            for our_name, aemo_name in name_map.items():
-                for con in initial_cons:
-                    if con['@InitialConditionID'] == aemo_name:
-                        value = float(con['@Value'])
-                        break
-                    else:
-                        value = np.nan
-                initial_conditions[our_name].append(value)
-        initial_conditions = pd.DataFrame(initial_conditions)
-        return initial_conditions
+        # Where a trader has more than one value for an initial condition the first is used.
+        values = initial_conditions.reindex(columns=['TraderID', 'InitialConditionID', 'Value'])
+        values = values.drop_duplicates(['TraderID', 'InitialConditionID'])
+        values = values.pivot(index='TraderID', columns='InitialConditionID', values='Value')
+        traders = traders.reindex(columns=['TraderID', 'TraderType'])
+        unit_initial_conditions = pd.DataFrame({'DUID': traders['TraderID'], 'TRADERTYPE': traders['TraderType']})
+        for our_name, aemo_name in name_map.items():
+            if aemo_name in values.columns:
+                unit_initial_conditions[our_name] = traders['TraderID'].map(values[aemo_name]).astype(float)
+            else:
+                unit_initial_conditions[our_name] = np.nan
+        return unit_initial_conditions
 
+    @hf.cached_result
     def get_unit_fast_start_parameters(self):
         """Get the unit fast start dispatch inflexibility parameter values.
 
@@ -333,28 +585,19 @@ class XMLCacheManager:
 
 
         """
-        traders = self.xml['NEMSPDCaseFile']['NemSpdInputs']['TraderCollection']['Trader']
-        initial_conditions = dict(DUID=[], MinLoadingMW=[], CurrentMode=[], CurrentModeTime=[], T1=[], T2=[],
-                                  T3=[], T4=[])
-        cols = dict(MinLoadingMW='@MinLoadingMW', CurrentMode='@CurrentMode',
-                    CurrentModeTime='@CurrentModeTime', T1='@T1', T2='@T2', T3='@T3', T4='@T4')
-        for trader in traders:
-            row = False
-            if '@CurrentMode' in trader:
-                for key, name in cols.items():
-                    row = True
-                    value = int(trader[name])
-                    if name == '@CurrentMode' and '@WhatIfCurrentMode' in trader:
-                        value = int(trader['@WhatIfCurrentMode'])
-                    if name == '@CurrentModeTime' and '@WhatIfCurrentModeTime' in trader:
-                        value = int(trader['@WhatIfCurrentModeTime'])
-                    initial_conditions[key].append(value)
-            if row:
-                initial_conditions['DUID'].append(trader['@TraderID'])
-
-        initial_conditions = pd.DataFrame(initial_conditions)
-        return initial_conditions
-
+        traders = self._read_tables('traders')
+        traders = traders.reindex(columns=['TraderID', 'MinLoadingMW', 'CurrentMode', 'WhatIfCurrentMode',
+                                           'CurrentModeTime', 'WhatIfCurrentModeTime', 'T1', 'T2', 'T3', 'T4'])
+        # Only fast start units have a current mode.
+        traders = traders[traders['CurrentMode'].notna()]
+        traders = traders.assign(CurrentMode=traders['WhatIfCurrentMode'].fillna(traders['CurrentMode']),
+                                 CurrentModeTime=traders['WhatIfCurrentModeTime'].fillna(traders['CurrentModeTime']))
+        fast_start_parameters = {'DUID': traders['TraderID']}
+        for column in ['MinLoadingMW', 'CurrentMode', 'CurrentModeTime', 'T1', 'T2', 'T3', 'T4']:
+            fast_start_parameters[column] = traders[column].astype(np.int64)
+        return pd.DataFrame(fast_start_parameters).reset_index(drop=True)
+
+    @hf.cached_result
     def get_unit_volume_bids(self):
         """Get the unit volume bids
 
@@ -416,52 +659,28 @@ class XMLCacheManager:
 
 
         """
-        traders = self.xml['NEMSPDCaseFile']['NemSpdInputs']['PeriodCollection']['Period']['TraderPeriodCollection'][
-            'TraderPeriod']
-        trades_by_unit_and_type = dict(DUID=[], BIDTYPE=[], DIRECTION=[], MAXAVAIL=[], ENABLEMENTMIN=[], ENABLEMENTMAX=[],
-                                       LOWBREAKPOINT=[], HIGHBREAKPOINT=[], BANDAVAIL1=[], BANDAVAIL2=[],
-                                       BANDAVAIL3=[], BANDAVAIL4=[], BANDAVAIL5=[], BANDAVAIL6=[], BANDAVAIL7=[],
-                                       BANDAVAIL8=[], BANDAVAIL9=[], BANDAVAIL10=[], RAMPDOWNRATE=[], RAMPUPRATE=[])
-        name_map = dict(BIDTYPE='@TradeType', DIRECTION='@Direction', MAXAVAIL='@MaxAvail', ENABLEMENTMIN='@EnablementMin',
-                        ENABLEMENTMAX='@EnablementMax', LOWBREAKPOINT='@LowBreakpoint',
-                        HIGHBREAKPOINT='@HighBreakpoint', BANDAVAIL1='@BandAvail1', BANDAVAIL2='@BandAvail2',
-                        BANDAVAIL3='@BandAvail3', BANDAVAIL4='@BandAvail4', BANDAVAIL5='@BandAvail5',
-                        BANDAVAIL6='@BandAvail6', BANDAVAIL7='@BandAvail7', BANDAVAIL8='@BandAvail8',
-                        BANDAVAIL9='@BandAvail9', BANDAVAIL10='@BandAvail10', RAMPDOWNRATE='@RampDnRate',
-                        RAMPUPRATE='@RampUpRate')
-
-        def append_values(trade, trades_by_unit_and_type):
-            trades_by_unit_and_type['DUID'].append(trader['@TraderID'])
-            for our_name, aemo_name in name_map.items():
-                if aemo_name in trade:
-                    if aemo_name in ['@TradeType', '@Direction']:
-                        value = trade[aemo_name]
-                    else:
-                        value = float(trade[aemo_name])
-                elif aemo_name == '@Direction':
-                    value = 'missing'
-                trades_by_unit_and_type[our_name].append(value)
-            return trades_by_unit_and_type
-
-        for trader in traders:
-            if type(trader['TradeCollection']['Trade']) != list:
-                trades = trader['TradeCollection']
-                for _, trade in trades.items():
-                    trades_by_unit_and_type = append_values(trade, trades_by_unit_and_type)
-            else:
-                for trade in trader['TradeCollection']['Trade']:
-                    trades_by_unit_and_type = append_values(trade, trades_by_unit_and_type)
-
-        trades_by_unit_and_type = pd.DataFrame(trades_by_unit_and_type)
+        trades = self._read_tables('volume_bids')
+        name_map = dict(MAXAVAIL='MaxAvail', ENABLEMENTMIN='EnablementMin', ENABLEMENTMAX='EnablementMax',
+                        LOWBREAKPOINT='LowBreakpoint', HIGHBREAKPOINT='HighBreakpoint', BANDAVAIL1='BandAvail1',
+                        BANDAVAIL2='BandAvail2', BANDAVAIL3='BandAvail3', BANDAVAIL4='BandAvail4',
+                        BANDAVAIL5='BandAvail5', BANDAVAIL6='BandAvail6', BANDAVAIL7='BandAvail7',
+                        BANDAVAIL8='BandAvail8', BANDAVAIL9='BandAvail9', BANDAVAIL10='BandAvail10',
+                        RAMPDOWNRATE='RampDnRate', RAMPUPRATE='RampUpRate')
         bid_type_map = dict(ENOF='ENERGY', LDOF='ENERGY', DROF='ENERGY', BDOF='ENERGY', L5RE='LOWERREG', R5RE='RAISEREG',
                             R5MI='RAISE5MIN', L5MI='LOWER5MIN', R60S='RAISE60SEC', L60S='LOWER60SEC', R6SE='RAISE6SEC',
                             L6SE='LOWER6SEC', R1SE='RAISE1SEC', L1SE='LOWER1SEC')
-        trades_by_unit_and_type["BIDTYPE"] = trades_by_unit_and_type["BIDTYPE"].apply(lambda x: bid_type_map[x])
-        direction_type_map = dict(GEN='GENERATOR', LOAD='LOAD', missing=None)
-        trades_by_unit_and_type["DIRECTION"] = (
-            trades_by_unit_and_type["DIRECTION"].apply(lambda x: direction_type_map[x]))
-        return trades_by_unit_and_type
-
+        direction_type_map = dict(GEN='GENERATOR', LOAD='LOAD')
+        trades = trades.reindex(columns=['TraderID', 'TradeType', 'Direction'] + list(name_map.values()))
+        direction = trades['Direction'].map(direction_type_map)
+        trades_by_unit_and_type = pd.DataFrame({'DUID': trades['TraderID'],
+                                                'BIDTYPE': trades['TradeType'].map(bid_type_map),
+                                                'DIRECTION': direction.astype(object).where(direction.notna(), None)})
+        # Values a trade doesn't have, e.g. the enablement limits of energy trades, take the value before them.
+        values = trades.loc[:, list(name_map.values())].astype(float).ffill(axis=1)
+        values.columns = list(name_map.keys())
+        return pd.concat([trades_by_unit_and_type, values], axis=1)
+
+    @hf.cached_result
     def get_unit_price_bids(self):
         """Get the unit volume bids
 
@@ -508,57 +727,29 @@ class XMLCacheManager:
 
 
         """
-        traders = self.xml['NEMSPDCaseFile']['NemSpdInputs']['TraderCollection']['Trader']
-        trades_by_unit_and_type = dict(DUID=[], BIDTYPE=[], DIRECTION=[], PRICEBAND1=[], PRICEBAND2=[], PRICEBAND3=[],
-                                       PRICEBAND4=[], PRICEBAND5=[], PRICEBAND6=[], PRICEBAND7=[], PRICEBAND8=[],
-                                       PRICEBAND9=[], PRICEBAND10=[])
-        name_map = dict(BIDTYPE='@TradeType', DIRECTION='@Direction', PRICEBAND1='@PriceBand1',
-                        PRICEBAND2='@PriceBand2', PRICEBAND3='@PriceBand3', PRICEBAND4='@PriceBand4',
-                        PRICEBAND5='@PriceBand5', PRICEBAND6='@PriceBand6', PRICEBAND7='@PriceBand7',
-                        PRICEBAND8='@PriceBand8', PRICEBAND9='@PriceBand9', PRICEBAND10='@PriceBand10')
-
-        def append_values(trade, trades_by_unit_and_type):
-            trades_by_unit_and_type['DUID'].append(trader['@TraderID'])
-            for our_name, aemo_name in name_map.items():
-                value = None
-                if aemo_name in trade:
-                    if aemo_name in ['@TradeType', '@Direction']:
-                        value = trade[aemo_name]
-                    else:
-                        value = float(trade[aemo_name])
-                elif '@Direction' not in trade:
-                    if trader['@TraderType'] in ["GENERATOR", "NORMALLY_ON_LOAD", "WDR", "BIDIRECTIONAL"]:
-                        value = "GEN"
-                    elif trader['@TraderType'] in ["LOAD"]:
-                        value = "LOAD"
-                trades_by_unit_and_type[our_name].append(value)
-            return trades_by_unit_and_type
-
-        for trader in traders:
-            if type(trader['TradePriceStructureCollection']['TradePriceStructure']['TradeTypePriceStructureCollection']
-                    ['TradeTypePriceStructure']) != list:
-                trades = trader['TradePriceStructureCollection']['TradePriceStructure'][
-                    'TradeTypePriceStructureCollection']
-                for _, trade in trades.items():
-                    trades_by_unit_and_type = append_values(trade, trades_by_unit_and_type)
-            else:
-                for trade in \
-                        trader['TradePriceStructureCollection']['TradePriceStructure'][
-                            'TradeTypePriceStructureCollection'][
-                            'TradeTypePriceStructure']:
-                    trades_by_unit_and_type = append_values(trade, trades_by_unit_and_type)
-
-        trades_by_unit_and_type = pd.DataFrame(trades_by_unit_and_type)
+        trades = self._read_tables('price_bids')
+        name_map = dict(PRICEBAND1='PriceBand1', PRICEBAND2='PriceBand2', PRICEBAND3='PriceBand3',
+                        PRICEBAND4='PriceBand4', PRICEBAND5='PriceBand5', PRICEBAND6='PriceBand6',
+                        PRICEBAND7='PriceBand7', PRICEBAND8='PriceBand8', PRICEBAND9='PriceBand9',
+                        PRICEBAND10='PriceBand10')
         bid_type_map = dict(ENOF='ENERGY', LDOF='ENERGY', DROF='ENERGY', BDOF='ENERGY', L5RE='LOWERREG',
                             R5RE='RAISEREG',
                             R5MI='RAISE5MIN', L5MI='LOWER5MIN', R60S='RAISE60SEC', L60S='LOWER60SEC', R6SE='RAISE6SEC',
                             L6SE='LOWER6SEC', R1SE='RAISE1SEC', L1SE='LOWER1SEC')
-        trades_by_unit_and_type["BIDTYPE"] = trades_by_unit_and_type["BIDTYPE"].apply(lambda x: bid_type_map[x])
+        trader_type_direction_map = dict(GENERATOR='GEN', NORMALLY_ON_LOAD='GEN', WDR='GEN', BIDIRECTIONAL='GEN',
+                                         LOAD='LOAD')
         direction_type_map = dict(GEN='GENERATOR', LOAD='LOAD')
-        trades_by_unit_and_type["DIRECTION"] = (
-            trades_by_unit_and_type["DIRECTION"].apply(lambda x: direction_type_map[x]))
-        return trades_by_unit_and_type
-
+        trades = trades.reindex(columns=['TraderID', 'TraderType', 'TradeType', 'Direction'] + list(name_map.values()))
+        # Trades without a direction take it from the type of trader.
+        direction = trades['Direction'].fillna(trades['TraderType'].map(trader_type_direction_map))
+        trades_by_unit_and_type = pd.DataFrame({'DUID': trades['TraderID'],
+                                                'BIDTYPE': trades['TradeType'].map(bid_type_map),
+                                                'DIRECTION': direction.map(direction_type_map)})
+        values = trades.loc[:, list(name_map.values())].astype(float)
+        values.columns = list(name_map.keys())
+        return pd.concat([trades_by_unit_and_type, values], axis=1)
+
+    @hf.cached_result
     def get_UIGF_values(self):
         """Get the unit unconstrained intermittent generation forecast.
 
@@ -598,16 +789,11 @@ class XMLCacheManager:
 
 
         """
-        traders = self.xml['NEMSPDCaseFile']['NemSpdInputs']['PeriodCollection']['Period']['TraderPeriodCollection'][
-            'TraderPeriod']
-        trades_by_unit_and_type = dict(DUID=[], UIGF=[])
-        for trader in traders:
-            if '@UIGF' in trader:
-                trades_by_unit_and_type['DUID'].append(trader['@TraderID'])
-                trades_by_unit_and_type['UIGF'].append(float(trader['@UIGF']))
-        trades_by_unit_and_type = pd.DataFrame(trades_by_unit_and_type)
-        return trades_by_unit_and_type
+        traders = self._read_tables('trader_periods').reindex(columns=['TraderID', 'UIGF'])
+        traders = traders[traders['UIGF'].notna()]
+        return pd.DataFrame({'DUID': traders['TraderID'], 'UIGF': traders['UIGF'].astype(float)}).reset_index(drop=True)
 
+    @hf.cached_result
     def get_violations(self):
         """Get the total volume violation of different constraint sets.
 
@@ -627,40 +813,34 @@ class XMLCacheManager:
         dict
 
         """
-        outputs = self.xml['NEMSPDCaseFile']['NemSpdOutputs']
-        name_map = dict(regional_demand='@TotalAreaGenViolation',
-                        interocnnector='@TotalInterconnectorViolation',
-                        generic_constraint='@TotalGenericViolation',
-                        ramp_rate='@TotalRampRateViolation',
-                        unit_capacity='@TotalUnitMWCapacityViolation',
-                        energy_constraint='@TotalEnergyConstrViolation',
-                        energy_offer='@TotalEnergyOfferViolation',
-                        fcas_profile='@TotalASProfileViolation',
-                        fast_start='@TotalFastStartViolation',
-                        mnsp_ramp_rate='@TotalMNSPRampRateViolation',
-                        msnp_offer='@TotalMNSPOfferViolation',
-                        mnsp_capacity='@TotalMNSPCapacityViolation',
-                        ugif='@TotalUIGFViolation')
+        case_solutions, period_solutions = self._read_tables('case_solution', 'period_solution')
+        name_map = dict(regional_demand='TotalAreaGenViolation',
+                        interocnnector='TotalInterconnectorViolation',
+                        generic_constraint='TotalGenericViolation',
+                        ramp_rate='TotalRampRateViolation',
+                        unit_capacity='TotalUnitMWCapacityViolation',
+                        energy_constraint='TotalEnergyConstrViolation',
+                        energy_offer='TotalEnergyOfferViolation',
+                        fcas_profile='TotalASProfileViolation',
+                        fast_start='TotalFastStartViolation',
+                        mnsp_ramp_rate='TotalMNSPRampRateViolation',
+                        msnp_offer='TotalMNSPOfferViolation',
+                        mnsp_capacity='TotalMNSPCapacityViolation',
+                        ugif='TotalUIGFViolation')
+        # In intervention periods the solutions of the run without intervention are used.
+        if self.is_intervention_period():
+            period_solutions = period_solutions[period_solutions['Intervention'] == '0']
+            case_solutions = case_solutions[case_solutions['Intervention'] == '0']
         violations = {}
-        if type(outputs['PeriodSolution']) == list:
-            for name, aemo_name in name_map.items():
-                for solution in outputs['PeriodSolution']:
-                    if solution['@Intervention'] == '0':
-                        if aemo_name in solution:
-                            violations[name] = float(solution[aemo_name])
-                for solution in outputs['CaseSolution']:
-                    if solution['@Intervention'] == '0':
-                        if name not in violations:
-                            violations[name] = float(solution[aemo_name])
-        else:
-            for name, aemo_name in name_map.items():
-                if aemo_name in outputs['PeriodSolution']:
-                    violations[name] = float(outputs['PeriodSolution'][aemo_name])
-                else:
-                    violations[name] = float(outputs['CaseSolution'][aemo_name])
-
+        for name, aemo_name in name_map.items():
+            values = period_solutions[aemo_name].dropna() if aemo_name in period_solutions.columns else []
+            if len(values) > 0:
+                violations[name] = float(values.iloc[-1])
+            else:
+                violations[name] = float(case_solutions[aemo_name].iloc[0])
         return violations
 
+    @hf.cached_result
     def get_constraint_violation_prices(self):
         """Get the price of violating different constraint sets.
 
@@ -679,27 +859,27 @@ class XMLCacheManager:
         -------
         dict
         """
-        inputs = self.xml['NEMSPDCaseFile']['NemSpdInputs']
-        name_map = dict(regional_demand='@EnergyDeficitPrice',
-                        interocnnector='@InterconnectorPrice',
-                        generic_constraint='@GenericConstraintPrice',
-                        ramp_rate='@RampRatePrice',
-                        unit_capacity='@CapacityPrice',
-                        energy_offer='@OfferPrice',
-                        fcas_profile='@ASProfilePrice',
-                        fcas_max_avail='@ASMaxAvailPrice',
-                        fcas_enablement_min='@ASEnablementMinPrice',
-                        fcas_enablement_max='@ASEnablementMaxPrice',
-                        fast_start='@FastStartPrice',
-                        mnsp_ramp_rate='@MNSPRampRatePrice',
-                        msnp_offer='@MNSPOfferPrice',
-                        mnsp_capacity='@MNSPCapacityPrice',
-                        uigf='@UIGFSurplusPrice',
-                        voll='@VoLL',
-                        tiebreak='@TieBreakPrice')
+        case = self._read_tables('case')
+        name_map = dict(regional_demand='EnergyDeficitPrice',
+                        interocnnector='InterconnectorPrice',
+                        generic_constraint='GenericConstraintPrice',
+                        ramp_rate='RampRatePrice',
+                        unit_capacity='CapacityPrice',
+                        energy_offer='OfferPrice',
+                        fcas_profile='ASProfilePrice',
+                        fcas_max_avail='ASMaxAvailPrice',
+                        fcas_enablement_min='ASEnablementMinPrice',
+                        fcas_enablement_max='ASEnablementMaxPrice',
+                        fast_start='FastStartPrice',
+                        mnsp_ramp_rate='MNSPRampRatePrice',
+                        msnp_offer='MNSPOfferPrice',
+                        mnsp_capacity='MNSPCapacityPrice',
+                        uigf='UIGFSurplusPrice',
+                        voll='VoLL',
+                        tiebreak='TieBreakPrice')
         violations = {}
         for name, aemo_name in name_map.items():
-            violations[name] = float(inputs['Case'][aemo_name])
+            violations[name] = float(case[aemo_name].iloc[0])
         return violations
 
     def is_intervention_period(self):
@@ -719,8 +899,9 @@ class XMLCacheManager:
         bool
 
         """
-        return type(self.xml['NEMSPDCaseFile']['NemSpdOutputs']['PeriodSolution']) == list
+        return len(self._read_tables('period_solution')) > 1
 
+    @hf.cached_result
     def get_constraint_rhs(self):
         """Get generic constraints rhs values.
 
@@ -759,14 +940,12 @@ class XMLCacheManager:
             ================  ========================================
 
         """
-        constraints = self.xml['NEMSPDCaseFile']['NemSpdOutputs']['ConstraintSolution']
-        rhs_values = dict(set=[], rhs=[])
-        for con in constraints:
-            if con['@Intervention'] == '0':
-                rhs_values['set'].append(con['@ConstraintID'])
-                rhs_values['rhs'].append(float(con['@RHS']))
-        return pd.DataFrame(rhs_values)
+        constraints = self._read_tables('constraint_solution').reindex(columns=['ConstraintID', 'Intervention', 'RHS'])
+        constraints = constraints[constraints['Intervention'] == '0']
+        return pd.DataFrame({'set': constraints['ConstraintID'],
+                             'rhs': constraints['RHS'].astype(float)}).reset_index(drop=True)
 
+    @hf.cached_result
     def get_constraint_type(self):
         """Get generic constraints type.
 
@@ -806,15 +985,12 @@ class XMLCacheManager:
                               (as `np.float64`)
             ================  ========================================
         """
+        constraints = self._read_tables('generic_constraints')
+        constraints = constraints.reindex(columns=['ConstraintID', 'Type', 'ViolationPrice'])
+        return pd.DataFrame({'set': constraints['ConstraintID'], 'type': constraints['Type'],
+                             'cost': constraints['ViolationPrice'].astype(float)})
 
-        constraints = self.xml['NEMSPDCaseFile']['NemSpdInputs']['GenericConstraintCollection']['GenericConstraint']
-        rhs_values = dict(set=[], type=[], cost=[])
-        for con in constraints:
-            rhs_values['set'].append(con['@ConstraintID'])
-            rhs_values['type'].append(con['@Type'])
-            rhs_values['cost'].append(float(con['@ViolationPrice']))
-        return pd.DataFrame(rhs_values)
-
+    @hf.cached_result
     def get_constraint_region_lhs(self):
         """Get generic constraints lhs term regional coefficients.
 
@@ -860,25 +1036,11 @@ class XMLCacheManager:
                               (as `np.float64`)
             ================  ========================================
         """
-        constraints = self.xml['NEMSPDCaseFile']['NemSpdInputs']['GenericConstraintCollection']['GenericConstraint']
-        lhs_values = dict(set=[], region=[], service=[], coefficient=[])
-        for con in constraints:
-            lhs = con['LHSFactorCollection']
-            if lhs is not None and 'RegionFactor' in lhs:
-                if type(lhs['RegionFactor']) == list:
-                    for term in lhs['RegionFactor']:
-                        lhs_values['set'].append(con['@ConstraintID'])
-                        lhs_values['region'].append(term['@RegionID'])
-                        lhs_values['service'].append(term['@TradeType'])
-                        lhs_values['coefficient'].append(float(term['@Factor']))
-                else:
-                    term = lhs['RegionFactor']
-                    lhs_values['set'].append(con['@ConstraintID'])
-                    lhs_values['region'].append(term['@RegionID'])
-                    lhs_values['service'].append(term['@TradeType'])
-                    lhs_values['coefficient'].append(float(term['@Factor']))
-        return pd.DataFrame(lhs_values)
+        terms = self._read_tables('region_factors').reindex(columns=['ConstraintID', 'RegionID', 'TradeType', 'Factor'])
+        return pd.DataFrame({'set': terms['ConstraintID'], 'region': terms['RegionID'], 'service': terms['TradeType'],
+                             'coefficient': terms['Factor'].astype(float)})
 
+    @hf.cached_result
     def get_constraint_unit_lhs(self):
         """Get generic constraints lhs term unit coefficients.
 
@@ -924,25 +1086,11 @@ class XMLCacheManager:
                               (as `np.float64`)
             ================  ========================================
         """
-        constraints = self.xml['NEMSPDCaseFile']['NemSpdInputs']['GenericConstraintCollection']['GenericConstraint']
-        lhs_values = dict(set=[], unit=[], service=[], coefficient=[])
-        for con in constraints:
-            lhs = con['LHSFactorCollection']
-            if lhs is not None and 'TraderFactor' in lhs:
-                if type(lhs['TraderFactor']) == list:
-                    for term in lhs['TraderFactor']:
-                        lhs_values['set'].append(con['@ConstraintID'])
-                        lhs_values['unit'].append(term['@TraderID'])
-                        lhs_values['service'].append(term['@TradeType'])
-                        lhs_values['coefficient'].append(float(term['@Factor']))
-                else:
-                    term = lhs['TraderFactor']
-                    lhs_values['set'].append(con['@ConstraintID'])
-                    lhs_values['unit'].append(term['@TraderID'])
-                    lhs_values['service'].append(term['@TradeType'])
-                    lhs_values['coefficient'].append(float(term['@Factor']))
-        return pd.DataFrame(lhs_values)
+        terms = self._read_tables('trader_factors').reindex(columns=['ConstraintID', 'TraderID', 'TradeType', 'Factor'])
+        return pd.DataFrame({'set': terms['ConstraintID'], 'unit': terms['TraderID'], 'service': terms['TradeType'],
+                             'coefficient': terms['Factor'].astype(float)})
 
+    @hf.cached_result
     def get_constraint_interconnector_lhs(self):
         """Get generic constraints lhs term interconnector coefficients.
 
@@ -982,23 +1130,12 @@ class XMLCacheManager:
                               (as `np.float64`)
             ================  ========================================
         """
-        constraints = self.xml['NEMSPDCaseFile']['NemSpdInputs']['GenericConstraintCollection']['GenericConstraint']
-        lhs_values = dict(set=[], interconnector=[], coefficient=[])
-        for con in constraints:
-            lhs = con['LHSFactorCollection']
-            if lhs is not None and 'InterconnectorFactor' in lhs:
-                if type(lhs['InterconnectorFactor']) == list:
-                    for term in lhs['InterconnectorFactor']:
-                        lhs_values['set'].append(con['@ConstraintID'])
-                        lhs_values['interconnector'].append(term['@InterconnectorID'])
-                        lhs_values['coefficient'].append(float(term['@Factor']))
-                else:
-                    term = lhs['InterconnectorFactor']
-                    lhs_values['set'].append(con['@ConstraintID'])
-                    lhs_values['interconnector'].append(term['@InterconnectorID'])
-                    lhs_values['coefficient'].append(float(term['@Factor']))
-        return pd.DataFrame(lhs_values)
+        terms = self._read_tables('interconnector_factors').reindex(columns=['ConstraintID', 'InterconnectorID',
+                                                                             'Factor'])
+        return pd.DataFrame({'set': terms['ConstraintID'], 'interconnector': terms['InterconnectorID'],
+                             'coefficient': terms['Factor'].astype(float)})
 
+    @hf.cached_result
     def get_market_interconnector_link_bid_availability(self):
         """Get the bid availability of market interconnectors.
 
@@ -1027,18 +1164,10 @@ class XMLCacheManager:
                               interconnector, (as `str`)
             ================  ========================================
         """
-        inters = \
-            self.xml['NEMSPDCaseFile']['NemSpdInputs']['PeriodCollection']['Period']['InterconnectorPeriodCollection'][
-                'InterconnectorPeriod']
-        bid_availability = dict(interconnector=[], to_region=[], availability=[])
-        for inter in inters:
-            if inter['@MNSP'] == '1':
-                for offer in inter['MNSPOfferCollection']['MNSPOffer']:
-                    bid_availability['interconnector'].append(inter['@InterconnectorID'])
-                    bid_availability['to_region'].append(offer['@RegionID'])
-                    bid_availability['availability'].append(float(offer['@MaxAvail']))
-        bid_availability = pd.DataFrame(bid_availability)
-        return bid_availability
+        offers = self._read_tables('mnsp_offers').reindex(columns=['InterconnectorID', 'MNSP', 'RegionID', 'MaxAvail'])
+        offers = offers[offers['MNSP'] == '1']
+        return pd.DataFrame({'interconnector': offers['InterconnectorID'], 'to_region': offers['RegionID'],
+                             'availability': offers['MaxAvail'].astype(float)}).reset_index(drop=True)
 
     def find_intervals_with_violations(self, limit, start_year, start_month, end_year, end_month):
         """Find the set of dispatch intervals where the non-intervention dispatch runs had constraint violations.
@@ -1069,6 +1198,11 @@ class XMLCacheManager:
         -------
         dict
 
+        Raises
+        ------
+        DownloadError
+            If an interval isn't in the cache and downloading it failed, e.g. because NEMWeb can't be reached.
+            Intervals that NEMWeb doesn't have are skipped.
         """
         if end_month == 12:
             start = datetime(year=start_year, month=start_month, day=1)
@@ -1094,6 +1228,7 @@ class XMLCacheManager:
             check_time += timedelta(minutes=5)
         return intervals
 
+    @hf.cached_result
     def get_service_prices(self):
         """Get the energy market and FCAS prices by region.
 
@@ -1160,19 +1295,227 @@ class XMLCacheManager:
             ================  ========================================
         """
         service_type_map = \
-            {'@EnergyPrice': 'ENERGY', '@LRegPrice': 'LOWERREG', '@RRegPrice': 'RAISEREG', '@R5Price': 'RAISE5MIN',
-             '@RL5Price': 'LOWER5MIN', '@R60Price': 'RAISE60SEC', '@L60Price': 'LOWER60SEC', '@R6Price': 'RAISE6SEC',
-             '@L6Price': 'LOWER6SEC', '@R1Price': 'RAISE1SEC', '@L1Price': 'LOWER1SEC'}
-        prices = dict(region=[], service=[], price=[])
-        regions = self.xml['NEMSPDCaseFile']['NemSpdOutputs']['RegionSolution']
-        for region in regions:
-            for xml_service, mms_service in service_type_map.items():
-                if xml_service in region:
-                    prices['region'].append(region['@RegionID'])
-                    prices['service'].append(mms_service)
-                    prices['price'].append(region[xml_service])
-        return pd.DataFrame(prices)
+            {'EnergyPrice': 'ENERGY', 'LRegPrice': 'LOWERREG', 'RRegPrice': 'RAISEREG', 'R5Price': 'RAISE5MIN',
+             'RL5Price': 'LOWER5MIN', 'R60Price': 'RAISE60SEC', 'L60Price': 'LOWER60SEC', 'R6Price': 'RAISE6SEC',
+             'L6Price': 'LOWER6SEC', 'R1Price': 'RAISE1SEC', 'L1Price': 'LOWER1SEC'}
+        regions = self._read_tables('region_solution').reindex(columns=['RegionID'] + list(service_type_map.keys()))
+        # One row per region and service, in region order, leaving out the services a region has no price for.
+        prices = regions.loc[:, list(service_type_map.keys())].to_numpy()
+        has_price = pd.notna(prices)
+        return pd.DataFrame({'region': np.repeat(regions['RegionID'].to_numpy(), has_price.sum(axis=1)),
+                             'service': np.tile(list(service_type_map.values()), len(regions))[has_price.ravel()],
+                             'price': prices[has_price]})
+
+
+def read_xml_tables(source, tables):
+    """Stream a XML file, collecting the attributes of the elements at the given paths into tables.
+
+    The file is streamed through expat, and no document tree is built, so only the requested tables are held in
+    memory. Elements outside the requested paths are skipped, and parsing stops once the last top level section of the
+    file containing a requested path has been read.
+
+    Examples
+    --------
+
+    >>> import io
+
+    >>> xml = io.BytesIO(
+    ...     b'<NEMSPDCaseFile>'
+    ...     b'  <NemSpdInputs>'
+    ...     b'    <TraderCollection>'
+    ...     b'      <Trader TraderID="A" TraderType="GENERATOR">'
+    ...     b'        <TraderInitialConditionCollection>'
+    ...     b'          <TraderInitialCondition InitialConditionID="InitialMW" Value="10.5"/>'
+    ...     b'          <TraderInitialCondition InitialConditionID="AGCStatus" Value="1"/>'
+    ...     b'        </TraderInitialConditionCollection>'
+    ...     b'      </Trader>'
+    ...     b'      <Trader TraderID="B" TraderType="LOAD" CurrentMode="0"/>'
+    ...     b'    </TraderCollection>'
+    ...     b'  </NemSpdInputs>'
+    ...     b'</NEMSPDCaseFile>')
+
+    >>> tables = read_xml_tables(xml, {
+    ...     'traders': ('NemSpdInputs/TraderCollection/Trader', []),
+    ...     'initial_conditions': ('NemSpdInputs/TraderCollection/Trader/TraderInitialConditionCollection/'
+    ...                            'TraderInitialCondition', ['TraderID'])})
+
+    >>> print(tables['traders'])
+      TraderID TraderType CurrentMode
+    0        A  GENERATOR        None
+    1        B       LOAD           0
+
+    >>> print(tables['initial_conditions'])
+      TraderID InitialConditionID Value
+    0        A          InitialMW  10.5
+    1        A          AGCStatus     1
+
+    Parameters
+    ----------
+    source : str or file-like
+        The path to the file, or the file opened in binary mode.
+
+    tables : dict[str, tuple[str, list[str]]]
+        For each table to read, the path to the elements that make up its rows, as element tags separated by '/',
+        starting below the root element, and the attributes of the rows' ancestor elements to include in the table,
+        taken from the nearest ancestor that has them.
+
+    Returns
+    -------
+    dict[str, pd.DataFrame]
+        The tables, with a column for each ancestor attribute, followed by a column for each attribute of the rows, in
+        the order they are first found. Values are strings, or None where a row doesn't have an attribute.
+    """
+    reader = _TableReader(tables)
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = reader.start
+    parser.EndElementHandler = reader.end
+    try:
+        if isinstance(source, (str, Path)):
+            with open(source, 'rb') as file:
+                parser.ParseFile(file)
+        else:
+            parser.ParseFile(source)
+    except _AllTablesRead:
+        pass
+    return {name: pd.DataFrame(table.columns) for name, table in reader.tables.items()}
+
+
+def _get_market_day(date_time):
+    """The market day an interval belongs to, market days start with the interval ending at 04:05."""
+    if date_time.time() < time(hour=4, minute=5):
+        date_time = date_time - timedelta(days=1)
+    return date_time.date()
+
+
+def _extract_key(source_key):
+    """Identify the version of the source file, and the tables read from it, an extract was made from."""
+    return np.array([str(value) for value in source_key] + [repr(sorted(_nemde_tables.items()))])
+
+
+def _save_extract(extract, source_key, tables):
+    """Save tables read from a source file to an extract file, as numpy string arrays, one per column, with a mask of
+    the missing values. The file is written under a temporary name and then renamed, so other processes never see a
+    partly written extract. If the extract can't be written, e.g. the cache is read only, then it is skipped."""
+    arrays = {'key': _extract_key(source_key)}
+    for name, table in tables.items():
+        arrays[name] = np.array(table.columns, dtype=str)
+        for i, column in enumerate(table.columns):
+            values = table[column].to_numpy()
+            missing = pd.isna(values)
+            arrays['{}/{}'.format(name, i)] = np.where(missing, '', values).astype(str)
+            if missing.any():
+                arrays['{}/{}/missing'.format(name, i)] = missing
+    temporary = '{}.{}.tmp'.format(extract, os.getpid())
+    try:
+        with open(temporary, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(temporary, extract)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _load_extract(extract, source_key):
+    """Load the tables saved by _save_extract, None if there is no extract, or it wasn't made from the current
+    version of the source file."""
+    if not os.path.exists(extract):
+        return None
+    try:
+        with np.load(extract) as arrays:
+            if not np.array_equal(arrays['key'], _extract_key(source_key)):
+                return None
+            tables = {}
+            for name in _nemde_tables:
+                columns = {}
+                for i, column in enumerate(arrays[name]):
+                    values = arrays['{}/{}'.format(name, i)].astype(object)
+                    missing_key = '{}/{}/missing'.format(name, i)
+                    if missing_key in arrays:
+                        values[arrays[missing_key]] = None
+                    columns[str(column)] = values
+                tables[name] = pd.DataFrame(columns)
+            return tables
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        # A corrupt extract is replaced by reading the source again.
+        return None
+
+
+class _AllTablesRead(Exception):
+    """Raised to stop parsing once all the requested tables have been read."""
+
+
+class _TableReader:
+    """Expat handlers that collect the attributes of elements at the requested paths into tables."""
+
+    def __init__(self, tables):
+        self.tables = {name: _Columns(inherited) for name, (path, inherited) in tables.items()}
+        # A tree of the requested paths, each node maps the tags of the child elements on a requested path to their
+        # nodes, and the key '' to the name of the table the element is a row of, if it is.
+        self.root = {}
+        for name, (path, inherited) in tables.items():
+            node = self.root
+            for tag in path.split('/'):
+                node = node.setdefault(tag, {})
+            node[''] = name
+        self.sections_to_read = set(self.root.keys())
+        # The node and attributes of each element on the current path, the node is None for elements that aren't on a
+        # requested path.
+        self.nodes = []
+        self.ancestors = []
+
+    def start(self, tag, attributes):
+        if not self.nodes:
+            node = self.root
+        else:
+            parent = self.nodes[-1]
+            node = parent.get(tag) if parent is not None else None
+        self.nodes.append(node)
+        self.ancestors.append(attributes)
+        if node is not None and '' in node:
+            self.tables[node['']].append(self.ancestors)
+
+    def end(self, tag):
+        self.nodes.pop()
+        self.ancestors.pop()
+        # The end of a top level section.
+        if len(self.nodes) == 1:
+            self.sections_to_read.discard(tag)
+            if not self.sections_to_read:
+                raise _AllTablesRead()
+
+
+class _Columns:
+    """Collects the attributes of elements into columns of equal length."""
+
+    def __init__(self, inherited):
+        self.inherited = inherited
+        self.columns = {attribute: [] for attribute in inherited}
+        self.rows = 0
+
+    def append(self, ancestors):
+        """Add a row with the attributes of the last element in ancestors, and the inherited attributes of the
+        others."""
+        values = {}
+        for attribute in self.inherited:
+            for attributes in reversed(ancestors[:-1]):
+                if attribute in attributes:
+                    values[attribute] = attributes[attribute]
+                    break
+        values.update(ancestors[-1])
+        for attribute, value in values.items():
+            column = self.columns.get(attribute)
+            if column is None:
+                column = self.columns[attribute] = [None] * self.rows
+            column.append(value)
+        self.rows += 1
+        for column in self.columns.values():
+            if len(column) < self.rows:
+                column.append(None)
 
 
 class MissingDataError(Exception):
     """Raise for unable to downloaded data from NEMWeb."""
+
+
+class DownloadError(Exception):
+    """Raise for downloads from NEMWeb that failed on every attempt, e.g. because NEMWeb couldn't be reached."""
@@ -1,14 +1,32 @@
+from time import perf_counter
+
 import numpy as np
 import pandas as pd
 
 from nempy.help_functions import helper_functions as hf
 from nempy.spot_market_backend import elastic_constraints, fcas_constraints, interconnectors as inter, \
     market_constraints, objective_function, solver_interface, unit_constraints, variable_ids, check, \
-    dataframe_validator as dv, ramp_rate_processing as rrp
+    dataframe_validator as dv, ramp_rate_processing as rrp, model_store
 
 pd.set_option('display.width', None)
 
 
+# SpotMarket attributes saved in snapshots, and those left out, see SpotMarket.snapshot. A snapshot is only restored if
+# it holds exactly the attributes saved, _snapshot_version should be increased if their contents change.
+_snapshot_attributes = [
+    'dispatch_interval', '_unit_info', '_key_codes', '_decision_variables', '_variable_to_constraint_map',
+    '_constraint_to_variable_map', '_lhs_coefficients', '_generic_constraint_lhs', '_constraints_rhs_and_type',
+    '_constraints_dynamic_rhs_and_type', '_market_constraints_rhs_and_type', '_objective_function_components',
+    '_interconnector_directions', '_interconnector_loss_shares', '_next_variable_id', '_next_constraint_id',
+    'validate_inputs', 'check', '_market_regions', '_allowed_dispatch_types', '_allowed_services',
+    '_allowed_fcas_services', '_allowed_contingency_fcas_services', '_allowed_regulation_fcas_services',
+    '_allowed_constraint_types', 'solver_name', 'single_solver_model', 'lp_first_interconnector_losses',
+    'keep_solver_model', 'objective_value', 'dispatch_type_required', '_bidirectional_units']
+_not_in_snapshot = ['persistent_solver_interface', 'last_dispatch_stats', '_results']
+_snapshot_format = 'nempy.SpotMarket'
+_snapshot_version = 3
+
+
 # noinspection PyProtectedMember
 class SpotMarket:
     """Class for constructing and dispatching the spot market on an interval basis.
@@ -72,9 +90,45 @@ class SpotMarket:
     Attributes
     ----------
     solver_name : str
-        The solver to use must be one of solver options of the mip-python package that is used to interface to solvers.
-        Currently, the only supported solvers are CBC and Gurobi, so allowed solver names are 'CBC' and 'GUROBI'. Default
-        value is CBC, CBC works out of the box after installing Nempy, but Gurobi must be installed separately.
+        The solver to use, must be the name of a backend registered with
+        nempy.spot_market_backend.solver_interface.register_solver_backend. The backends available by default are 'CBC'
+        and 'GUROBI', which are interfaced to through the mip-python package, and 'HIGHS', which is interfaced to through
+        the highspy package and uses the HiGHS dual simplex for the pricing linear program. Default value is CBC, CBC
+        works out of the box after installing Nempy, but Gurobi must be installed separately and HiGHS needs highspy to
+        be installed.
+
+    single_solver_model : bool
+        If True only one solver model is built during dispatch, and the linear program used for pricing is derived from
+        it after the mixed integer solve, by fixing unused interpolation weights and relaxing the special ordered sets
+        in place. This roughly halves the time and memory used building the solver model. Default value is False, in
+        which case a separate linear model is built in lockstep with the mixed integer model.
+
+    lp_first_interconnector_losses : bool
+        If True, and the market has interconnector losses, dispatch first solves the linear relaxation of the model,
+        which ignores the special ordered sets used to model losses. If at most two adjacent interpolation weights are
+        used for each interconnector, and at most one link of each interconnector has flow, then the relaxed solution
+        is also the optimal mixed integer solution and is used as the dispatch, otherwise the mixed integer model is
+        solved as usual. For convex loss functions the relaxation usually meets these conditions, so the mixed integer
+        solve can be skipped for most intervals. Default value is False.
+
+    last_dispatch_stats : DispatchStats
+        Timing, model size and solver status information from the last call to dispatch, if it was called with
+        profile=True, otherwise None. Default value is None.
+
+    keep_solver_model : bool
+        If True, the first call to dispatch creates a PersistentInterfaceToSolver, using solver_name, and stores it in
+        persistent_solver_interface, so later calls to dispatch on the same market only apply the constraints and
+        variables that changed. With Gurobi the previous solution is also used as a warm start. This suits the fast
+        start workflow, where dispatch is run, fast start and ramp rate constraints are reset, and dispatch is run
+        again. Only the mip based solvers, 'CBC' and 'GUROBI', are supported, with other solvers dispatch raises a
+        ValueError. Default value is False.
+
+    persistent_solver_interface : nempy.spot_market_backend.solver_interface.PersistentInterfaceToSolver
+        A solver interface that is kept alive between dispatch runs. When a sequence of markets, such as consecutive
+        dispatch intervals, are given the same persistent interface, each dispatch only applies the differences from
+        the previous model to the solver, rather than building a new model. With Gurobi the previous solution is also
+        used as a warm start. The persistent interface's own solver_name is used. Default value is None, in which case
+        a new solver model is built for each dispatch.
 
     Raises
     ------
@@ -92,15 +146,23 @@ class SpotMarket:
     def __init__(self, market_regions, unit_info, dispatch_interval=5):
         self.dispatch_interval = dispatch_interval
         self._unit_info = None
-        self._decision_variables = {}
-        self._variable_to_constraint_map = {'regional': {}, 'unit_level': {}}
-        self._constraint_to_variable_map = {'regional': {}, 'unit_level': {}}
-        self._lhs_coefficients = {}
-        self._generic_constraint_lhs = {}
-        self._constraints_rhs_and_type = {}
-        self._constraints_dynamic_rhs_and_type = {}
-        self._market_constraints_rhs_and_type = {}
-        self._objective_function_components = {}
+        # The model components are held in model tables, dicts of DataFrames that also store the model columns as
+        # numpy arrays, with str ids encoded as integer codes shared across the market's tables.
+        self._key_codes = model_store.KeyCodes()
+        self._decision_variables = self._model_table(['variable_id', 'lower_bound', 'upper_bound', 'type'])
+        self._variable_to_constraint_map = {
+            'regional': self._model_table(['variable_id', 'coefficient'], ['region', 'service']),
+            'unit_level': self._model_table(['variable_id', 'coefficient'], ['unit', 'service', 'dispatch_type'])}
+        self._constraint_to_variable_map = {
+            'regional': self._model_table(['constraint_id', 'coefficient'], ['region', 'service']),
+            'unit_level': self._model_table(['constraint_id', 'coefficient'], ['unit', 'service', 'dispatch_type'])}
+        self._lhs_coefficients = self._model_table(['constraint_id', 'variable_id', 'coefficient'])
+        self._generic_constraint_lhs = self._model_table(['coefficient'],
+                                                         ['set', 'unit', 'region', 'service', 'interconnector'])
+        self._constraints_rhs_and_type = self._model_table(['constraint_id', 'type', 'rhs'], ['set'])
+        self._constraints_dynamic_rhs_and_type = self._model_table(['constraint_id', 'type', 'rhs_variable_id'])
+        self._market_constraints_rhs_and_type = self._model_table(['constraint_id', 'type', 'rhs'], ['set'])
+        self._objective_function_components = self._model_table(['variable_id', 'cost'])
         self._interconnector_directions = None
         self._interconnector_loss_shares = None
         self._next_variable_id = 0
@@ -119,7 +181,14 @@ class SpotMarket:
         self._allowed_regulation_fcas_services = ['raise_reg', 'lower_reg']
         self._allowed_constraint_types = ['<=', '=', '>=']
         self.solver_name = 'CBC'
+        self.single_solver_model = False
+        self.lp_first_interconnector_losses = False
+        self.keep_solver_model = False
+        self.persistent_solver_interface = None
         self.objective_value = None
+        self.last_dispatch_stats = None
+        # Results calculated since the last dispatch, see hf.cached_result.
+        self._results = {}
 
         if 'loss_factor' not in unit_info.columns:
             unit_info['loss_factor'] = 1.0
@@ -138,6 +207,9 @@ class SpotMarket:
         units = unit_info['unit'].value_counts()
         self._bidirectional_units = units[units == 2].index.tolist()
 
+    def _model_table(self, columns, key_columns=()):
+        return model_store.ModelTable(columns, key_columns=key_columns, key_codes=self._key_codes)
+
     def _validate_unit_info(self, unit_info):
         schema = dv.DataFrameSchema(name='unit_info', primary_keys=['unit', 'dispatch_type'])
         schema.add_column(dv.SeriesSchema(name='unit', data_type=str))
@@ -2754,11 +2826,11 @@ class SpotMarket:
         else:
             return 0.0
 
-    def set_tie_break_constraints(self, cost):
+    def set_tie_break_constraints(self, cost, all_pairs=False):
         """Creates a cost that attempts to balance the energy dispatch of equally priced bids within a region.
 
-        For each pair of bids from different generators in a region which are of the same price a constraint of the
-        following form is created.
+        Bids in a region which are of the same price, from at least two different units, are put in order, and a
+        constraint of the following form is created between each bid and an earlier bid from a different unit.
 
             B1 * 1/C1 - B2 * 1/C2 + D1 - D2 = 0
 
@@ -2766,6 +2838,11 @@ class SpotMarket:
         variables that have provided cost in the objective function. If a small cost (say 1e-6) is provided then this
         constraint balances the pro rata output of the bids.
 
+        This gives the same dispatch as AEMO's formulation, a constraint for each pair of bids from different units,
+        when the pro rata output of the bids can be balanced, with n - 1 rather than about n squared constraints for n
+        equally priced bids. When the constraints can't all be met, the two formulations can spread the violation
+        differently. If all_pairs is True then AEMO's formulation is used, see unit_constraints.tie_break_constraints.
+
         For AEMO documentation of this constraint
         `see AEMO doc <../../docs/pdfs/Schedule of Constraint Violation Penalty factors.pdf>` section 3 item 47.
 
@@ -2845,7 +2922,7 @@ class SpotMarket:
         unit_regions = self._unit_info.loc[:, ['unit', 'region']]
 
         lhs, rhs = unit_constraints.tie_break_constraints(price_bids, bid_decision_variables,
-                                                          unit_regions, self._next_constraint_id)
+                                                          unit_regions, self._next_constraint_id, all_pairs)
 
         self._lhs_coefficients['tie_break'] = lhs
         self._constraints_rhs_and_type['tie_break'] = rhs
@@ -2853,12 +2930,15 @@ class SpotMarket:
         self.make_constraints_elastic('tie_break', violation_cost=cost)
 
     def dispatch(self, energy_market_ceiling_price=None, energy_market_floor_price=None, fcas_market_ceiling_price=None,
-                 allow_over_constrained_dispatch_re_run=False):
+                 allow_over_constrained_dispatch_re_run=False, profile=False):
         """Combines the elements of the linear program and solves to find optimal dispatch.
 
         If allow_over_constrained_dispatch_re_run is set to True then constraints will be relaxed when market ceiling
         or floor prices are violated.
 
+        If profile is set to True then the time spent in each phase of dispatch, the size of the model and the solver
+        status are recorded in last_dispatch_stats, see DispatchStats.
+
         Examples
         --------
         Define the unit information data set needed to initialise the market.
@@ -2923,6 +3003,14 @@ class SpotMarket:
           region  price
         0    NSW  130.0
 
+        Dispatch can also be profiled.
+
+        >>> market.dispatch(profile=True)
+
+        >>> print(market.last_dispatch_stats.model_size)
+          constraint_set  constraints  non_zeros
+        0         demand            1          6
+
         Returns
         -------
         None
@@ -2932,6 +3020,42 @@ class SpotMarket:
             ModelBuildError
                 If a model build process is incomplete, i.e. there are energy bids but not energy demand set.
         """
+        timer = _PhaseTimer(profile)
+        self._results = {}
+        self.last_dispatch_stats = None
+        self._check_market_prices(energy_market_ceiling_price, energy_market_floor_price, fcas_market_ceiling_price,
+                                  allow_over_constrained_dispatch_re_run)
+
+        variable_definitions, objective_function_definition, constraints_lhs, constraints_rhs_and_type = \
+            self._assemble_model(timer)
+
+        # Create the interface to the solver.
+        if self.persistent_solver_interface is None and self.keep_solver_model:
+            if self.solver_name not in solver_interface._persistent_solvers:
+                raise ValueError("keep_solver_model is only supported for the solvers {}, not '{}'.".format(
+                    solver_interface._persistent_solvers, self.solver_name))
+            self.persistent_solver_interface = solver_interface.PersistentInterfaceToSolver(self.solver_name)
+        if self.persistent_solver_interface is not None:
+            si = self.persistent_solver_interface
+            si.begin_update()
+        else:
+            si = solver_interface.create_solver_interface(self.solver_name, single_model=self.single_solver_model)
+        self._add_model_to_solver(si, variable_definitions, objective_function_definition, constraints_lhs,
+                                  constraints_rhs_and_type)
+        timer.mark('model_build')
+
+        solver_status = self._solve(si, timer, energy_market_ceiling_price, energy_market_floor_price,
+                                    fcas_market_ceiling_price, allow_over_constrained_dispatch_re_run)
+
+        if profile:
+            self.last_dispatch_stats = DispatchStats(
+                phase_times=timer.times, model_size=self._model_size(constraints_lhs),
+                variables={group: len(variables) for group, variables in self._decision_variables.items()},
+                solver_status=solver_status)
+
+    @staticmethod
+    def _check_market_prices(energy_market_ceiling_price, energy_market_floor_price, fcas_market_ceiling_price,
+                             allow_over_constrained_dispatch_re_run):
         if allow_over_constrained_dispatch_re_run:
             if (energy_market_ceiling_price is None or energy_market_floor_price is None or
                     fcas_market_ceiling_price is None):
@@ -2939,99 +3063,12 @@ class SpotMarket:
                                     be provided for energy_market_ceiling_price, energy_market_floor_price, and \n
                                     fcas_market_ceiling_price.""")
 
-        # Create a data frame containing all fully defined components of the constraint matrix lhs. If there are none
-        # then just create a place holder empty pd.DataFrame.
-        if len(self._lhs_coefficients.values()) > 0:
-            constraints_lhs = pd.concat(list(self._lhs_coefficients.values()))
-        else:
-            constraints_lhs = pd.DataFrame()
-
-        # Get a pd.DataFrame mapping the generic constraint sets to their constraint ids.
-        generic_constraint_ids = solver_interface.create_mapping_of_generic_constraint_sets_to_constraint_ids(
-            self._constraints_rhs_and_type, self._market_constraints_rhs_and_type)
-
-        # If there are any generic constraints create their lhs definitions.
-        if generic_constraint_ids is not None:
-            generic_lhs = []
-            # If units have been added to the generic lhs then find the relevant variable ids and map them to the
-            # constraint.
-            if 'unit' in self._generic_constraint_lhs and 'bids' in self._variable_to_constraint_map['unit_level']:
-                generic_constraint_units = self._generic_constraint_lhs['unit']
-                unit_bids_to_constraint_map = self._variable_to_constraint_map['unit_level']['bids']
-                unit_lhs = solver_interface.create_unit_level_generic_constraint_lhs(generic_constraint_units,
-                                                                                     generic_constraint_ids,
-                                                                                     unit_bids_to_constraint_map)
-                generic_lhs.append(unit_lhs)
-            # If regions have been added to the generic lhs then find the relevant variable ids and map them to the
-            # constraint.
-            if 'region' in self._generic_constraint_lhs and 'bids' in self._variable_to_constraint_map['regional']:
-                generic_constraint_region = self._generic_constraint_lhs['region']
-                unit_bids_to_constraint_map = self._variable_to_constraint_map['regional']['bids']
-                regional_lhs = solver_interface.create_region_level_generic_constraint_lhs(generic_constraint_region,
-                                                                                           generic_constraint_ids,
-                                                                                           unit_bids_to_constraint_map)
-                generic_lhs.append(regional_lhs)
-            # If interconnectors have been added to the generic lhs then find the relevant variable ids and map them
-            # to the constraint.
-            if 'interconnectors' in self._generic_constraint_lhs and 'interconnectors' in self._decision_variables:
-                generic_constraint_interconnectors = self._generic_constraint_lhs['interconnectors']
-                interconnector_bids_to_constraint_map = self._decision_variables['interconnectors']
-                interconnector_lhs = solver_interface.create_interconnector_generic_constraint_lhs(
-                    generic_constraint_interconnectors, generic_constraint_ids, interconnector_bids_to_constraint_map)
-                generic_lhs.append(interconnector_lhs)
-            # Add the generic lhs definitions the cumulative lhs pd.DataFrame.
-            constraints_lhs = pd.concat([constraints_lhs] + generic_lhs)
-
-        # If there are constraints that have been defined on a regional basis then create the constraints lhs
-        # definition by mapping to all the variables that have been defined for the corresponding region and service.
-        if len(self._constraint_to_variable_map['regional']) > 0:
-            constraints = pd.concat(list(self._constraint_to_variable_map['regional'].values()))
-            decision_variables = pd.concat(list(self._variable_to_constraint_map['regional'].values()))
-            regional_constraints_lhs = solver_interface.create_lhs(constraints, decision_variables,
-                                                                   ['region', 'service'])
-            # Add the lhs definitions the cumulative lhs pd.DataFrame.
-            constraints_lhs = pd.concat([constraints_lhs, regional_constraints_lhs])
-
-        # If there are constraints that have been defined on a unit basis then create the constraints lhs
-        # definition by mapping to all the variables that have been defined for the corresponding unit and service.
-        if len(self._constraint_to_variable_map['unit_level']) > 0:
-            constraints = pd.concat(list(self._constraint_to_variable_map['unit_level'].values()))
-            decision_variables = pd.concat(list(self._variable_to_constraint_map['unit_level'].values()))
-            unit_constraints_lhs = solver_interface.create_lhs(
-                constraints, decision_variables, ['unit', 'service', 'dispatch_type'])
-            # Add the lhs definitions the cumulative lhs pd.DataFrame.
-            constraints_lhs = pd.concat([constraints_lhs, unit_constraints_lhs])
-
-        # Create the interface to the solver.
-        si = solver_interface.InterfaceToSolver(self.solver_name)
-        if self._decision_variables:
-            # Combine dictionary of pd.DataFrames into a single pd.DataFrame for processing by the interface.
-            variable_definitions = pd.concat(self._decision_variables)
-            si.add_variables(variable_definitions)
-        else:
-            raise check.ModelBuildError('The market could not be dispatch because no variables have been created')
-
-        # If Costs have been defined for bids or constraints then add an objective function.
-        if self._objective_function_components:
-            # Combine components of objective function into a single pd.DataFrame
-            objective_function_definition = pd.concat(self._objective_function_components)
+    def _add_model_to_solver(self, si, variable_definitions, objective_function_definition, constraints_lhs,
+                             constraints_rhs_and_type):
+        si.add_variables(variable_definitions)
+        if objective_function_definition is not None:
             si.add_objective_function(objective_function_definition)
-
-        # Collect all constraint rhs and type definitions into a single pd.DataFrame.
-        constraints_rhs_and_type = []
-        if self._constraints_rhs_and_type:
-            constraints_rhs_and_type.append(pd.concat(self._constraints_rhs_and_type))
-        if self._market_constraints_rhs_and_type:
-            constraints_rhs_and_type.append(pd.concat(self._market_constraints_rhs_and_type))
-        if self._constraints_dynamic_rhs_and_type:
-            constraints_dynamic_rhs_and_type = pd.concat(self._constraints_dynamic_rhs_and_type)
-            # Create the rhs for the dynamic constraints.
-            constraints_dynamic_rhs_and_type['rhs'] = constraints_dynamic_rhs_and_type. \
-                apply(lambda x: si.variables[x['rhs_variable_id']], axis=1)
-            constraints_rhs_and_type.append(constraints_dynamic_rhs_and_type)
-
-        if len(constraints_rhs_and_type) > 0:
-            constraints_rhs_and_type = pd.concat(constraints_rhs_and_type)
+        if constraints_rhs_and_type is not None:
             si.add_constraints(constraints_lhs, constraints_rhs_and_type)
 
         # If interconnectors with losses are being used, create special ordered sets for modelling losses.
@@ -3048,7 +3085,28 @@ class SpotMarket:
                 special_ordered_sets = special_ordered_sets.rename(columns={'interconnector': 'sos_id'})
                 si.add_sos_type_1(special_ordered_sets)
 
-        si.optimize()
+    def _solve(self, si, timer, energy_market_ceiling_price, energy_market_floor_price, fcas_market_ceiling_price,
+               allow_over_constrained_dispatch_re_run, restore_model=False):
+        """Solve the model loaded into the solver interface, and save the results to the model components. If
+        restore_model is True, changes made to the model for pricing are undone afterwards, so the model can be
+        solved again. Returns the solver status recorded in DispatchStats."""
+        # Try the linear relaxation first, only solving the mixed integer model if the relaxed solution doesn't meet
+        # the special ordered set conditions.
+        solved_as_lp = False
+        if self.lp_first_interconnector_losses and 'interpolation_weights' in self._decision_variables:
+            solved_as_lp = si.optimize_relaxation() and self._special_ordered_set_conditions_met(si)
+            timer.mark('relaxation_solve')
+        if not solved_as_lp:
+            try:
+                si.optimize()
+            except solver_interface.InfeasibleModelError as error:
+                conflicting_constraints = self._constraint_sets_of(error.conflicting_constraint_ids)
+                raise solver_interface.InfeasibleModelError(
+                    error.conflicting_constraint_ids, conflicting_constraints=conflicting_constraints,
+                    message='The market could not be dispatched, the constraints that conflict are:\n{}'.format(
+                        conflicting_constraints.to_string(index=False))) from error
+            timer.mark('mip_solve')
+        self.objective_value = si.objective_value
 
         # Find the slack in constraints.
         if self._constraints_rhs_and_type:
@@ -3069,11 +3127,15 @@ class SpotMarket:
             self._decision_variables[var_group]['value'] = \
                 si.get_optimal_values_of_decision_variables(self._decision_variables[var_group])
 
+        timer.mark('result_extraction')
+
         # Models with interconnectors use binary variables, the model needs to be linearised to allow for shadow prices
         # to be accessed and used to price constraints.
         if 'interconnector_losses' in self._decision_variables:
             si = self._get_linear_model(si)
-        si.linear_mip_model.optimize()
+            timer.mark('linearise')
+        pricing_status = si.optimize_linear_model()
+        timer.mark('pricing_solve')
 
         for var_group in self._decision_variables:
             self._decision_variables[var_group]['value_lin'] = \
@@ -3086,7 +3148,9 @@ class SpotMarket:
                 prices = si.price_constraints(constraints_to_price)
                 self._market_constraints_rhs_and_type[constraint_group]['price'] = \
                     self._market_constraints_rhs_and_type[constraint_group]['constraint_id'].map(prices)
+        timer.mark('result_extraction')
 
+        over_constrained_re_run = False
         if allow_over_constrained_dispatch_re_run:
             fcas_ceiling_price_violated = False
             if 'fcas' in self._market_constraints_rhs_and_type:
@@ -3130,19 +3194,521 @@ class SpotMarket:
                 variables_and_cons = pd.merge(active_violation_variables, lhs, on='variable_id')
                 variables_and_cons['adjuster'] = (variables_and_cons['value'] + 0.01) * \
                                                  variables_and_cons['coefficient'] * -1
-                variables_and_cons.apply(lambda x: si.update_rhs(x['constraint_id'], x['adjuster']), axis=1)
-                si.linear_mip_model.optimize()
+                si.update_rhs_of_constraints(variables_and_cons['constraint_id'].to_numpy(),
+                                             variables_and_cons['adjuster'].to_numpy())
+                pricing_status = si.optimize_linear_model()
+                over_constrained_re_run = True
+                if restore_model:
+                    si.update_rhs_of_constraints(variables_and_cons['constraint_id'].to_numpy(),
+                                                 -1 * variables_and_cons['adjuster'].to_numpy())
+
+                # Re-price the market constraint groups with prices outside the market price limits, and those with
+                # relaxed constraints, the other groups keep the prices from the first solve.
+                price_violated = {'demand': energy_ceiling_price_violated or energy_floor_price_violated,
+                                  'fcas': fcas_ceiling_price_violated}
+                relaxed_constraints = variables_and_cons['constraint_id'].to_numpy()
+                for constraint_group, rhs_and_type in self._market_constraints_rhs_and_type.items():
+                    if price_violated.get(constraint_group) or \
+                            np.isin(rhs_and_type['constraint_id'].to_numpy(), relaxed_constraints).any():
+                        prices = si.price_constraints(list(rhs_and_type['constraint_id']))
+                        rhs_and_type['price'] = rhs_and_type['constraint_id'].map(prices)
+            timer.mark('over_constrained_re_run')
+
+        # The linear model disables unused interconnector links and interpolation weights, so re-enable them.
+        if restore_model and 'interconnector_losses' in self._decision_variables:
+            si.update_variable_bounds(pd.concat([self._decision_variables['interconnectors'],
+                                                 self._decision_variables['interpolation_weights']]))
+
+        return {'solved_as_lp': solved_as_lp, 'pricing_status': str(pricing_status),
+                'over_constrained_re_run': over_constrained_re_run}
+
+    def sweep_rhs(self, constraint_set, region, values, energy_market_ceiling_price=None,
+                  energy_market_floor_price=None, fcas_market_ceiling_price=None,
+                  allow_over_constrained_dispatch_re_run=False):
+        """Dispatch the market for each of a sequence of rhs values of a regional constraint, e.g. demand.
+
+        The model is assembled, and loaded into a solver, once. For each value only the rhs of the region's constraint
+        is updated in the solver, and the model re-solved and priced in the same way as dispatch, with changes made to
+        the model for pricing undone before the next value. This works with any solver, see solver_name. Only the rhs
+        is changed, inputs that would usually depend on the rhs, such as demand dependent interconnector loss
+        functions, are not recalculated.
+
+        The market's inputs, including the constraint set's rhs, aren't changed by the sweep. When the sweep is finished
+        the results getters, e.g. get_region_dispatch_summary, give the results for the last value, with the slack of
+        constraints calculated using the last value, use dispatch to get the results for the market's inputs again.
+
+        Examples
+        --------
+
+        >>> unit_info = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     'region': ['NSW', 'NSW']})
+
+        >>> market = SpotMarket(market_regions=['NSW'], unit_info=unit_info)
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [20.0, 50.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [50.0, 100.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({
+        ...     'region': ['NSW'],
+        ...     'demand': [10.0]}))
+
+        >>> prices, dispatch = market.sweep_rhs('demand', 'NSW', [10.0, 30.0])
+
+        >>> print(prices)
+            rhs region  price
+        0  10.0    NSW   50.0
+        1  30.0    NSW  100.0
+
+        >>> print(dispatch)
+            rhs unit dispatch_type service  dispatch
+        0  10.0    A     generator  energy      10.0
+        1  10.0    B     generator  energy       0.0
+        2  30.0    A     generator  energy      20.0
+        3  30.0    B     generator  energy      10.0
+
+        Parameters
+        ----------
+        constraint_set : str
+            The name of a market constraint set with a region column, e.g. 'demand'.
+
+        region : str
+            The region whose constraint rhs is swept.
+
+        values : list-like of float
+            The rhs values to dispatch the market with.
+
+        energy_market_ceiling_price, energy_market_floor_price, fcas_market_ceiling_price, \
+                allow_over_constrained_dispatch_re_run
+            As for dispatch.
+
+        Returns
+        -------
+        tuple[pd.DataFrame, pd.DataFrame]
+            The output of get_energy_prices and get_unit_dispatch for each value, with the value given in an
+            additional first column, rhs.
 
-                # If there are market constraints then calculate their associated prices.
-                if self._market_constraints_rhs_and_type:
-                    for constraint_group in self._market_constraints_rhs_and_type:
-                        constraints_to_price = list(
-                            self._market_constraints_rhs_and_type[constraint_group]['constraint_id'])
-                        prices = si.price_constraints(constraints_to_price)
-                        self._market_constraints_rhs_and_type[constraint_group]['price'] = \
-                            self._market_constraints_rhs_and_type[constraint_group]['constraint_id'].map(prices)
+        Raises
+        ------
+            ModelBuildError
+                If the constraint set doesn't exist, or has no regional constraint for the given region.
+        """
+        if constraint_set not in self._market_constraints_rhs_and_type or \
+                'region' not in self._market_constraints_rhs_and_type[constraint_set].columns:
+            raise ModelBuildError('No regional market constraint set named {}.'.format(constraint_set))
+        rhs_and_type = self._market_constraints_rhs_and_type[constraint_set]
+        in_region = (rhs_and_type['region'] == region).to_numpy()
+        if not in_region.any():
+            raise ModelBuildError('Constraint set {} has no constraint for region {}.'.format(constraint_set, region))
+        self._check_market_prices(energy_market_ceiling_price, energy_market_floor_price, fcas_market_ceiling_price,
+                                  allow_over_constrained_dispatch_re_run)
+        constraint_ids = rhs_and_type['constraint_id'].to_numpy()[in_region]
+        rhs = rhs_and_type['rhs'].to_numpy(dtype=np.float64)[in_region]
+
+        timer = _PhaseTimer(False)
+        self.last_dispatch_stats = None
+        si = solver_interface.create_solver_interface(self.solver_name, single_model=True)
+        self._add_model_to_solver(si, *self._assemble_model(timer))
+
+        prices, dispatch = [], []
+        for value in values:
+            si.update_rhs_of_constraints(constraint_ids, value - rhs)
+            rhs = np.full(len(constraint_ids), value, dtype=np.float64)
+            self._results = {}
+            self._solve(si, timer, energy_market_ceiling_price, energy_market_floor_price, fcas_market_ceiling_price,
+                        allow_over_constrained_dispatch_re_run, restore_model=True)
+            prices.append(hf.shared_result(self, 'get_energy_prices'))
+            dispatch.append(hf.shared_result(self, 'get_unit_dispatch'))
+
+        def with_rhs(results):
+            results = [result.assign(rhs=value) for value, result in zip(values, results)]
+            results = pd.concat(results, ignore_index=True)
+            return results.loc[:, ['rhs'] + [col for col in results.columns if col != 'rhs']]
+
+        return with_rhs(prices), with_rhs(dispatch)
+
+    def snapshot(self):
+        """Serialise the built market to a compact bytes snapshot, that can be restored with SpotMarket.from_snapshot.
+
+        The snapshot holds all the inputs and model components set on the market, so the restored market can be
+        dispatched, e.g. in another process. Loss functions given to set_interconnector_losses aren't needed after the
+        losses are set, so markets built with closures, such as those from the historical_inputs.interconnectors
+        module, can be snapshotted. The solver model kept by keep_solver_model, results and dispatch stats aren't
+        included. Snapshots are compressed npz files, holding the columns of the model tables as numpy arrays, with a
+        JSON header describing how to rebuild the market from them, see model_store.dumps. No Python objects are
+        pickled, so restoring a snapshot can't run code, and the model tables are restored from their arrays without
+        being rebuilt row by row.
 
-        self.objective_value = si.mip_model.objective_value
+        Examples
+        --------
+
+        >>> unit_info = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     'region': ['NSW', 'NSW']})
+
+        >>> market = SpotMarket(market_regions=['NSW'], unit_info=unit_info)
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [20.0, 50.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [50.0, 100.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({
+        ...     'region': ['NSW'],
+        ...     'demand': [30.0]}))
+
+        >>> snapshot = market.snapshot()
+
+        >>> restored_market = SpotMarket.from_snapshot(snapshot)
+
+        >>> restored_market.dispatch()
+
+        >>> print(restored_market.get_energy_prices())
+          region  price
+        0    NSW  100.0
+
+        Snapshots can be shipped to worker processes, e.g. with nempy.batch.dispatch_many.
+
+        >>> from nempy import batch
+
+        >>> for result in batch.dispatch_many([snapshot], SpotMarket.from_snapshot, workers=1):
+        ...     print(result.results['energy_prices'])
+          region  price
+        0    NSW  100.0
+
+        Returns
+        -------
+        bytes
+        """
+        state = {name: getattr(self, name) for name in _snapshot_attributes}
+        return model_store.dumps({'format': _snapshot_format, 'version': _snapshot_version, 'state': state})
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Restore a market from a snapshot created with SpotMarket.snapshot.
+
+        Parameters
+        ----------
+        snapshot : bytes
+
+        Returns
+        -------
+        SpotMarket
+
+        Raises
+        ------
+            ValueError
+                If the snapshot isn't a SpotMarket snapshot, or was created by an incompatible version of nempy.
+        """
+        try:
+            state = model_store.loads(snapshot)
+        except ValueError as error:
+            raise ValueError('Not a SpotMarket snapshot.') from error
+        if state.get('format') != _snapshot_format:
+            raise ValueError('Not a SpotMarket snapshot.')
+        if state['version'] != _snapshot_version or sorted(state['state']) != sorted(_snapshot_attributes):
+            raise ValueError('SpotMarket snapshot version {} is not supported, expected version {}.'.format(
+                state['version'], _snapshot_version))
+        market = cls.__new__(cls)
+        vars(market).update(state['state'])
+        market.persistent_solver_interface = None
+        market.last_dispatch_stats = None
+        market._results = {}
+        return market
+
+    def get_model_matrices(self):
+        """Export the linear program that dispatch would build, as sparse matrix and vector arrays.
+
+        The model is built directly from the model components set on the market, without creating a solver model, so
+        it can be used for offline analysis, e.g. of constraint redundancy or scaling, or passed to other solvers in
+        bulk. The variables are ordered by variable id, and the constraints by constraint id, constraints without any
+        lhs terms are left out, as they are by the solver interfaces. The special ordered sets used to model
+        interconnector losses are not included, so for markets with interconnector losses the matrices describe the
+        model's relaxation.
+
+        Examples
+        --------
+
+        >>> unit_info = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     'region': ['NSW', 'NSW']})
+
+        >>> market = SpotMarket(market_regions=['NSW'], unit_info=unit_info)
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [20.0, 50.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [50.0, 100.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({
+        ...     'region': ['NSW'],
+        ...     'demand': [30.0]}))
+
+        >>> model = market.get_model_matrices()
+
+        >>> model.shape
+        (1, 2)
+
+        >>> model.indptr
+        array([0, 2])
+
+        >>> model.indices
+        array([0, 1])
+
+        >>> model.data
+        array([1., 1.])
+
+        >>> model.senses
+        array(['='], dtype=object)
+
+        >>> model.rhs
+        array([30.])
+
+        >>> model.c
+        array([ 50., 100.])
+
+        >>> model.upper_bounds
+        array([20., 50.])
+
+        >>> print(model.variables)
+           column  variable_id variable_set
+        0       0            0         bids
+        1       1            1         bids
+
+        >>> print(model.constraints)
+           row  constraint_id constraint_set region
+        0    0              0         demand    NSW
+
+        Returns
+        -------
+        ModelMatrices
+        """
+        variable_definitions, objective_function_definition, constraints_lhs, constraints_rhs_and_type = \
+            self._assemble_model(_PhaseTimer(False))
+
+        variable_sets = np.concatenate([np.full(len(variables), variable_set, dtype=object)
+                                        for variable_set, variables in self._decision_variables.items()])
+        variable_definitions['variable_set'] = variable_sets
+        variable_definitions = variable_definitions.sort_values('variable_id', kind='stable').reset_index(drop=True)
+        variable_ids = variable_definitions['variable_id'].to_numpy(dtype=np.int64)
+        columns = solver_interface._record_positions(np.empty(0, dtype=np.int64), variable_ids, 0)
+
+        c = np.zeros(len(variable_ids))
+        if objective_function_definition is not None:
+            np.add.at(c, solver_interface._positions_of(columns, objective_function_definition['variable_id'],
+                                                        'variable_id'),
+                      objective_function_definition['cost'].to_numpy(dtype=np.float64))
+
+        if constraints_rhs_and_type is None:
+            constraints_rhs_and_type = pd.DataFrame({'constraint_id': [], 'type': [], 'rhs': []})
+        matrix = solver_interface.create_constraint_matrix(constraints_lhs, constraints_rhs_and_type)
+
+        variables = variable_definitions.loc[:, ['variable_id', 'variable_set']]
+        variables.insert(0, 'column', np.arange(len(variables)))
+        constraints = self._constraint_sets_of(matrix.constraint_ids)
+        constraints.insert(0, 'row', np.arange(len(constraints)))
+
+        return ModelMatrices(
+            indptr=matrix.row_starts, indices=solver_interface._positions_of(columns, matrix.variable_ids,
+                                                                             'variable_id'),
+            data=matrix.coefficients, shape=(len(matrix), len(variable_ids)), senses=matrix.types, rhs=matrix.rhs,
+            c=c, lower_bounds=variable_definitions['lower_bound'].to_numpy(dtype=np.float64),
+            upper_bounds=variable_definitions['upper_bound'].to_numpy(dtype=np.float64),
+            integer=variable_definitions['type'].to_numpy() == 'binary', variables=variables,
+            constraints=constraints)
+
+    def _assemble_model(self, timer):
+        """Combine the model components into single variable, objective function, constraint lhs, and constraint rhs
+        and type tables. The objective function and constraint rhs and type tables are None if there aren't any."""
+        if not self._decision_variables:
+            raise check.ModelBuildError('The market could not be dispatch because no variables have been created')
+
+        # Collect all the components of the constraint matrix lhs, starting with those that are fully defined. The
+        # model tables are read as views of their arrays, so only the components built here are concatenated, once,
+        # when they have all been collected. The str id columns of the model tables are read as integer codes, so the
+        # joins below are integer joins.
+        lhs_columns = ['constraint_id', 'variable_id', 'coefficient']
+        constraints_lhs = []
+        if self._lhs_coefficients:
+            constraints_lhs.append(self._lhs_coefficients.frame(lhs_columns))
+
+        # Get a pd.DataFrame mapping the generic constraint sets to their constraint ids.
+        generic_constraint_ids = []
+        if 'generic' in self._constraints_rhs_and_type:
+            generic_constraint_ids.append(self._constraints_rhs_and_type.frame(['constraint_id', 'set'],
+                                                                               groups=['generic']))
+        if 'fcas' in self._market_constraints_rhs_and_type:
+            generic_constraint_ids.append(self._market_constraints_rhs_and_type.frame(['constraint_id', 'set'],
+                                                                                      groups=['fcas']))
+
+        # If there are any generic constraints create their lhs definitions.
+        if generic_constraint_ids:
+            generic_constraint_ids = hf.concat_columns(generic_constraint_ids, ['constraint_id', 'set'])
+            # If units have been added to the generic lhs then find the relevant variable ids and map them to the
+            # constraint.
+            if 'unit' in self._generic_constraint_lhs and 'bids' in self._variable_to_constraint_map['unit_level']:
+                generic_constraint_units = self._generic_constraint_lhs.frame(['set', 'unit', 'service', 'coefficient'],
+                                                                              groups=['unit'])
+                unit_bids_to_constraint_map = self._variable_to_constraint_map['unit_level'].frame(
+                    ['unit', 'service', 'variable_id', 'coefficient'], groups=['bids'])
+                unit_lhs = solver_interface.create_unit_level_generic_constraint_lhs(generic_constraint_units,
+                                                                                     generic_constraint_ids,
+                                                                                     unit_bids_to_constraint_map)
+                constraints_lhs.append(unit_lhs)
+            # If regions have been added to the generic lhs then find the relevant variable ids and map them to the
+            # constraint.
+            if 'region' in self._generic_constraint_lhs and 'bids' in self._variable_to_constraint_map['regional']:
+                generic_constraint_region = self._generic_constraint_lhs.frame(
+                    ['set', 'region', 'service', 'coefficient'], groups=['region'])
+                unit_bids_to_constraint_map = self._variable_to_constraint_map['regional'].frame(
+                    ['region', 'service', 'variable_id'], groups=['bids'])
+                regional_lhs = solver_interface.create_region_level_generic_constraint_lhs(generic_constraint_region,
+                                                                                           generic_constraint_ids,
+                                                                                           unit_bids_to_constraint_map)
+                constraints_lhs.append(regional_lhs)
+            # If interconnectors have been added to the generic lhs then find the relevant variable ids and map them
+            # to the constraint.
+            if 'interconnectors' in self._generic_constraint_lhs and 'interconnectors' in self._decision_variables:
+                generic_constraint_interconnectors = self._generic_constraint_lhs.frame(
+                    ['set', 'interconnector', 'coefficient'], groups=['interconnectors'])
+                # The interconnector variables aren't keyed by interconnector in the model tables, there are only a
+                # few of them, so they are encoded here.
+                interconnector_bids_to_constraint_map = self._decision_variables['interconnectors'].loc[
+                    :, ['interconnector', 'variable_id', 'generic_constraint_factor']]
+                interconnector_bids_to_constraint_map['interconnector'] = self._key_codes.encode(
+                    interconnector_bids_to_constraint_map['interconnector'])
+                interconnector_lhs = solver_interface.create_interconnector_generic_constraint_lhs(
+                    generic_constraint_interconnectors, generic_constraint_ids, interconnector_bids_to_constraint_map)
+                constraints_lhs.append(interconnector_lhs)
+        timer.mark('generic_lhs')
+
+        # If there are constraints that have been defined on a regional basis then create the constraints lhs
+        # definition by mapping to all the variables that have been defined for the corresponding region and service.
+        if len(self._constraint_to_variable_map['regional']) > 0:
+            join_columns = ['region', 'service']
+            constraints = self._constraint_to_variable_map['regional'].frame()
+            decision_variables = self._variable_to_constraint_map['regional'].frame()
+            regional_constraints_lhs = solver_interface.create_lhs(constraints, decision_variables, join_columns)
+            # Add the lhs definitions to the lhs components.
+            constraints_lhs.append(regional_constraints_lhs)
+
+        # If there are constraints that have been defined on a unit basis then create the constraints lhs
+        # definition by mapping to all the variables that have been defined for the corresponding unit and service.
+        if len(self._constraint_to_variable_map['unit_level']) > 0:
+            join_columns = ['unit', 'service', 'dispatch_type']
+            constraints = self._constraint_to_variable_map['unit_level'].frame()
+            decision_variables = self._variable_to_constraint_map['unit_level'].frame()
+            unit_constraints_lhs = solver_interface.create_lhs(constraints, decision_variables, join_columns)
+            # Add the lhs definitions to the lhs components.
+            constraints_lhs.append(unit_constraints_lhs)
+        timer.mark('create_lhs')
+
+        variable_definitions = self._decision_variables.frame(['variable_id', 'lower_bound', 'upper_bound', 'type'])
+
+        # If Costs have been defined for bids or constraints then add an objective function.
+        objective_function_definition = None
+        if self._objective_function_components:
+            objective_function_definition = self._objective_function_components.frame(['variable_id', 'cost'])
+
+        # Collect all constraint rhs and type definitions.
+        rhs_columns = ['constraint_id', 'type', 'rhs']
+        constraints_rhs_and_type = [constraints.frame(rhs_columns) for constraints in
+                                    [self._constraints_rhs_and_type, self._market_constraints_rhs_and_type]
+                                    if constraints]
+        if self._constraints_dynamic_rhs_and_type:
+            constraints_dynamic_rhs_and_type = self._constraints_dynamic_rhs_and_type.frame()
+            # Move the variable on the rhs of the dynamic constraints to the lhs, leaving a rhs of zero.
+            dynamic_rhs_lhs = constraints_dynamic_rhs_and_type.loc[:, ['constraint_id', 'rhs_variable_id']]
+            dynamic_rhs_lhs = dynamic_rhs_lhs.rename(columns={'rhs_variable_id': 'variable_id'})
+            dynamic_rhs_lhs['coefficient'] = -1.0
+            constraints_lhs.append(dynamic_rhs_lhs)
+            constraints_dynamic_rhs_and_type = constraints_dynamic_rhs_and_type.loc[:, ['constraint_id', 'type']]
+            constraints_dynamic_rhs_and_type['rhs'] = 0.0
+            constraints_rhs_and_type.append(constraints_dynamic_rhs_and_type)
+        if len(constraints_lhs) == 1:
+            constraints_lhs = constraints_lhs[0]
+        else:
+            constraints_lhs = hf.concat_columns(constraints_lhs, lhs_columns)
+        timer.mark('lhs_concat')
+
+        if len(constraints_rhs_and_type) == 1:
+            constraints_rhs_and_type = constraints_rhs_and_type[0]
+        elif len(constraints_rhs_and_type) > 1:
+            constraints_rhs_and_type = hf.concat_columns(constraints_rhs_and_type, rhs_columns)
+        else:
+            constraints_rhs_and_type = None
+        return variable_definitions, objective_function_definition, constraints_lhs, constraints_rhs_and_type
+
+    def _model_size(self, constraints_lhs):
+        """Count the constraints and non-zero lhs coefficients in each constraint set."""
+        constraint_sets = []
+        for constraints in [self._constraints_rhs_and_type, self._market_constraints_rhs_and_type,
+                            self._constraints_dynamic_rhs_and_type]:
+            for constraint_set, rhs_and_type in constraints.items():
+                constraint_sets.append(pd.DataFrame({'constraint_set': constraint_set,
+                                                     'constraint_id': rhs_and_type['constraint_id']}))
+        if not constraint_sets:
+            return pd.DataFrame({'constraint_set': pd.Series([], dtype=object),
+                                 'constraints': pd.Series([], dtype=np.int64),
+                                 'non_zeros': pd.Series([], dtype=np.int64)})
+        constraint_sets = pd.concat(constraint_sets)
+        non_zeros = pd.DataFrame({'constraint_id': [], 'non_zeros': []})
+        if not constraints_lhs.empty:
+            non_zeros = constraints_lhs.groupby('constraint_id', as_index=False).agg(non_zeros=('variable_id', 'size'))
+        model_size = pd.merge(constraint_sets, non_zeros, on='constraint_id', how='left').fillna({'non_zeros': 0})
+        model_size = model_size.groupby('constraint_set', as_index=False, sort=False).agg(
+            constraints=('constraint_id', 'size'), non_zeros=('non_zeros', 'sum'))
+        model_size['non_zeros'] = model_size['non_zeros'].astype(np.int64)
+        return model_size
+
+    def _constraint_sets_of(self, constraint_ids):
+        """Find the constraint set, and the set, unit, region, service or interconnector, of each constraint_id."""
+        identifying_columns = ['set', 'unit', 'region', 'service', 'interconnector', 'link']
+        constraint_sets = []
+        for constraints in [self._constraints_rhs_and_type, self._market_constraints_rhs_and_type,
+                            self._constraints_dynamic_rhs_and_type]:
+            for constraint_set, rhs_and_type in constraints.items():
+                rhs_and_type = rhs_and_type[rhs_and_type['constraint_id'].isin(constraint_ids)]
+                columns = ['constraint_id'] + [col for col in identifying_columns if col in rhs_and_type.columns]
+                constraint_sets.append(rhs_and_type.loc[:, columns].assign(constraint_set=constraint_set))
+        if not constraint_sets:
+            return pd.DataFrame({'constraint_id': pd.Series([], dtype=np.int64),
+                                 'constraint_set': pd.Series([], dtype=object)})
+        constraint_sets = pd.concat(constraint_sets)
+        columns = ['constraint_id', 'constraint_set'] + [col for col in identifying_columns
+                                                          if col in constraint_sets.columns]
+        return constraint_sets.loc[:, columns].sort_values('constraint_id').reset_index(drop=True)
+
+    def _special_ordered_set_conditions_met(self, si, tolerance=1e-6):
+        """Check if the current solution uses at most two adjacent interpolation weights for each interconnector
+        link, and has flow on at most one link of each interconnector."""
+        weights = self._decision_variables['interpolation_weights'].loc[:, ['interconnector', 'link',
+                                                                            'loss_segment', 'variable_id']]
+        weights['value'] = si.get_optimal_values_of_decision_variables(weights)
+        weights = weights.sort_values(['interconnector', 'link', 'loss_segment'])
+        weights['position'] = weights.groupby(['interconnector', 'link']).cumcount()
+        used_weights = weights[weights['value'] > tolerance].groupby(['interconnector', 'link'])['position']
+        if ((used_weights.max() - used_weights.min()) > 1).any():
+            return False
+
+        links = self._decision_variables['interconnectors']
+        links = links[links['interconnector'] != links['link']].loc[:, ['interconnector', 'variable_id']]
+        if not links.empty:
+            links['flowing'] = si.get_optimal_values_of_decision_variables(links).abs() > tolerance
+            if (links.groupby('interconnector')['flowing'].sum() > 1).any():
+                return False
+        return True
 
     def _get_linear_model(self, si):
         self._remove_unused_interpolation_weights(si)
@@ -3156,23 +3722,31 @@ class SpotMarket:
         si.disable_variables(inter_vars_unused)
 
     def _remove_unused_interpolation_weights(self, si):
-        vars = pd.merge(self._decision_variables['interconnectors'].loc[:, ['interconnector', 'link', 'value']],
-                        self._decision_variables['interpolation_weights'].loc[:, ['interconnector', 'link',
-                                                                                  'break_point', 'variable_id']],
-                        on=['interconnector', 'link'])
-        vars['distance'] = (vars['value'] - vars['break_point']).abs()
-
-        def not_closest_three(df):
-            df = df.sort_values('distance')
-            df = df.iloc[3:, :]
-            return df
-
-        vars_to_remove = vars.groupby(['interconnector', 'link'], as_index=False).apply(not_closest_three, include_groups=False)
-        si.disable_variables(vars_to_remove.loc[:, ['variable_id']])
+        links = self._decision_variables['interconnectors']
+        weights = self._decision_variables['interpolation_weights']
+        # Find the position of each weight's link in the interconnector variables, weights without a link are ignored.
+        weight_links = pd.MultiIndex.from_frame(links.loc[:, ['interconnector', 'link']]).get_indexer(
+            pd.MultiIndex.from_frame(weights.loc[:, ['interconnector', 'link']]))
+        weights = weights[weight_links >= 0]
+        weight_links = weight_links[weight_links >= 0]
+        distance = np.abs(links['value'].to_numpy()[weight_links] - weights['break_point'].to_numpy())
+
+        # Rank the weights of each link by the distance of their break point from the link's flow, and remove all but
+        # the closest three. Ties are ranked in loss segment order.
+        order = np.lexsort((distance, weight_links))
+        sorted_links = weight_links[order]
+        link_starts = np.flatnonzero(np.r_[True, sorted_links[1:] != sorted_links[:-1]])
+        rank = np.arange(len(order)) - np.repeat(link_starts, np.diff(np.r_[link_starts, len(order)]))
+        weights_to_remove = weights.iloc[np.sort(order[rank >= 3])]
+        si.disable_variables(weights_to_remove.loc[:, ['variable_id']])
 
     def get_constraint_set_names(self):
         return list(self._market_constraints_rhs_and_type.keys()) + list(self._constraints_rhs_and_type.keys())
 
+    def get_variable_set_names(self):
+        return list(self._decision_variables.keys())
+
+    @hf.cached_result
     def get_unit_dispatch(self):
         """Retrieves the energy dispatch for each unit.
 
@@ -3237,6 +3811,7 @@ class SpotMarket:
         Returns
         -------
         pd.DataFrame
+            A copy of the results, which are calculated once per dispatch, see get_result_arrays for read only views.
 
         Raises
         ------
@@ -3247,6 +3822,7 @@ class SpotMarket:
         dispatch.columns = ['unit', 'dispatch_type', 'service', 'dispatch']
         return dispatch.groupby(['unit', 'dispatch_type', 'service'], as_index=False).sum()
 
+    @hf.cached_result
     def get_energy_prices(self):
         """Retrieves the energy price in each market region.
 
@@ -3311,7 +3887,8 @@ class SpotMarket:
 
         Returns
         -------
-        pd.DateFrame
+        pd.DataFrame
+            A copy of the results, which are calculated once per dispatch, see get_result_arrays for read only views.
 
         Raises
         ------
@@ -3321,12 +3898,14 @@ class SpotMarket:
         prices = self._market_constraints_rhs_and_type['demand'].loc[:, ['region', 'price']]
         return prices
 
+    @hf.cached_result
     def get_fcas_prices(self):
         """Retrives the price associated with each set of FCAS requirement constraints.
 
         Returns
         -------
-        pd.DateFrame
+        pd.DataFrame
+            A copy of the results, which are calculated once per dispatch, see get_result_arrays for read only views.
         """
         prices = pd.merge(
             self._constraint_to_variable_map['regional']['fcas'].loc[:, ['service', 'region', 'constraint_id']],
@@ -3334,6 +3913,7 @@ class SpotMarket:
         prices = prices.groupby(['region', 'service'], as_index=False).aggregate({'price': 'sum'})
         return prices
 
+    @hf.cached_result
     def get_interconnector_flows(self):
         """Retrieves the  flows for each interconnector.
 
@@ -3412,6 +3992,7 @@ class SpotMarket:
         Returns
         -------
         pd.DataFrame
+            A copy of the results, which are calculated once per dispatch, see get_result_arrays for read only views.
 
         """
         flow = self._decision_variables['interconnectors'].loc[:, ['interconnector', 'link', 'value']]
@@ -3424,6 +4005,7 @@ class SpotMarket:
 
         return flow.reset_index(drop=True)
 
+    @hf.cached_result
     def get_region_dispatch_summary(self):
         """Calculates a dispatch summary at the regional level.
 
@@ -3521,6 +4103,7 @@ class SpotMarket:
         Returns
         -------
         pd.DataFrame
+            A copy of the results, which are calculated once per dispatch, see get_result_arrays for read only views.
 
             =====================    =================================
             Columns:                 Description:
@@ -3550,7 +4133,7 @@ class SpotMarket:
 
     def _get_net_unit_dispatch_by_region(self):
 
-        unit_dispatch = self.get_unit_dispatch()
+        unit_dispatch = hf.shared_result(self, 'get_unit_dispatch')
         unit_dispatch = unit_dispatch[unit_dispatch['service'] == 'energy']
         unit_dispatch_types = self._unit_info.loc[:, ['unit', 'region', 'dispatch_type']]
         unit_dispatch = pd.merge(
@@ -3559,13 +4142,9 @@ class SpotMarket:
             on=['unit', 'dispatch_type']
         )
 
-        def make_load_dispatch_negative(dispatch_type, dispatch):
-            if dispatch_type == 'load':
-                dispatch = -1 * dispatch
-            return dispatch
-
-        unit_dispatch['dispatch'] = \
-            unit_dispatch.apply(lambda x: make_load_dispatch_negative(x['dispatch_type'], x['dispatch']), axis=1)
+        # Make load dispatch negative.
+        unit_dispatch['dispatch'] = np.where(unit_dispatch['dispatch_type'] == 'load', -1 * unit_dispatch['dispatch'],
+                                             unit_dispatch['dispatch'])
 
         unit_dispatch = unit_dispatch.groupby('region', as_index=False).aggregate({'dispatch': 'sum'})
         return unit_dispatch
@@ -3585,7 +4164,7 @@ class SpotMarket:
             inflow = inflow.groupby('region', as_index=False).aggregate({'inflow': 'sum'})
             return inflow
 
-        interconnector_flows = self.get_interconnector_flows()
+        interconnector_flows = hf.shared_result(self, 'get_interconnector_flows')
         interconnector_direction_coefficients = self._get_interconnector_inflow_coefficients()
         inflow = calc_inflow_by_interconnector(interconnector_direction_coefficients, interconnector_flows)
         inflow = calc_inflow_by_region(inflow)
@@ -3618,7 +4197,7 @@ class SpotMarket:
         from_region_loss_shares = self._get_from_region_loss_shares()
         to_region_loss_shares = self._get_to_region_loss_shares()
         loss_shares = pd.concat([from_region_loss_shares, to_region_loss_shares])
-        losses = self.get_interconnector_flows().loc[:, ['interconnector', 'link', 'losses']]
+        losses = hf.shared_result(self, 'get_interconnector_flows').loc[:, ['interconnector', 'link', 'losses']]
         losses = pd.merge(losses, loss_shares, on=['interconnector', 'link'])
         losses['interconnector_losses'] = losses['losses'] * losses['loss_share']
         losses = losses.groupby('region', as_index=False).aggregate({'interconnector_losses': 'sum'})
@@ -3653,21 +4232,22 @@ class SpotMarket:
                                                      ['to_region', 'from_region'], 'direction', 'region')
         loss_factors['direction'] = loss_factors['direction'].apply(lambda x: x.replace('_loss_factor', ''))
         loss_factors = pd.merge(loss_factors, interconnector_directions, on=['interconnector', 'link', 'direction'])
-        flows_and_losses = self.get_interconnector_flows()
+        flows_and_losses = hf.shared_result(self, 'get_interconnector_flows')
         flows_and_losses = pd.merge(flows_and_losses, loss_factors, on=['interconnector', 'link'])
 
-        def calc_losses(direction, flow, loss_factor):
-            if (direction == 'to_region' and flow >= 0.0) or (direction == 'from_region' and flow <= 0.0):
-                losses = flow * (1 - loss_factor)
-            elif (direction == 'to_region' and flow < 0.0) or (direction == 'from_region' and flow > 0.0):
-                losses = abs(flow) - (abs(flow) / loss_factor)
-            return losses
-
-        flows_and_losses['transmission_losses'] = \
-            flows_and_losses.apply(lambda x: calc_losses(x['direction'], x['flow'], x['loss_factor']), axis=1)
+        direction = flows_and_losses['direction']
+        flow = flows_and_losses['flow']
+        loss_factor = flows_and_losses['loss_factor']
+        flow_into_region = ((direction == 'to_region') & (flow >= 0.0)) | ((direction == 'from_region') & (flow <= 0.0))
+        # Only divide by the loss factor for flows out of the region, so a zero loss factor elsewhere can't divide.
+        transmission_losses = flow * (1 - loss_factor)
+        flow_out = ~flow_into_region
+        transmission_losses[flow_out] = flow[flow_out].abs() - flow[flow_out].abs() / loss_factor[flow_out]
+        flows_and_losses['transmission_losses'] = transmission_losses
         flows_and_losses = flows_and_losses.groupby('region', as_index=False).aggregate({'transmission_losses': 'sum'})
         return flows_and_losses
 
+    @hf.cached_result
     def get_fcas_availability(self):
         """Get the availability of fcas service on a unit level, after constraints.
 
@@ -3777,6 +4357,8 @@ class SpotMarket:
 
         Returns
         -------
+        pd.DataFrame
+            A copy of the results, which are calculated once per dispatch, see get_result_arrays for read only views.
 
         """
         fcas_variable_slack = []
@@ -3801,13 +4383,194 @@ class SpotMarket:
             fcas_variable_slack.groupby(['unit', 'service'], as_index=False).aggregate({'service_slack': 'min'})
         fcas_variable_slack = fcas_variable_slack[fcas_variable_slack['service'] != 'energy']
 
-        dispatch_levels = self.get_unit_dispatch()
+        dispatch_levels = hf.shared_result(self, 'get_unit_dispatch')
 
         fcas_availability = pd.merge(fcas_variable_slack, dispatch_levels, on=['unit', 'service'])
 
         fcas_availability['availability'] = fcas_availability['dispatch'] + fcas_availability['service_slack']
         return fcas_availability.loc[:, ['unit', 'service', 'availability']]
 
+    def get_result_arrays(self, result):
+        """Retrieves a set of results as read only numpy arrays, without copying.
+
+        The results getters, get_unit_dispatch, get_energy_prices, get_fcas_prices, get_interconnector_flows,
+        get_region_dispatch_summary and get_fcas_availability, calculate their results once after each dispatch and
+        return a copy of the cached results. For bulk consumers this method gives views of the cached results instead.
+
+        Examples
+        --------
+
+        >>> unit_info = pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     'region': ['NSW', 'NSW']})
+
+        >>> market = SpotMarket(market_regions=['NSW'], unit_info=unit_info)
+
+        >>> market.set_unit_volume_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [20.0, 50.0]}))
+
+        >>> market.set_unit_price_bids(pd.DataFrame({
+        ...     'unit': ['A', 'B'],
+        ...     '1': [50.0, 100.0]}))
+
+        >>> market.set_demand_constraints(pd.DataFrame({
+        ...     'region': ['NSW'],
+        ...     'demand': [30.0]}))
+
+        >>> market.dispatch()
+
+        >>> dispatch = market.get_result_arrays('unit_dispatch')
+
+        >>> dispatch['unit']
+        array(['A', 'B'], dtype=object)
+
+        >>> dispatch['dispatch']
+        array([20., 10.])
+
+        Parameters
+        ----------
+        result : str
+            The name of the results getter without the get prefix, e.g. 'unit_dispatch'.
+
+        Returns
+        -------
+        dict[str, np.ndarray]
+            The read only values of each column of the results, by column name.
+        """
+        arrays = {}
+        for column, values in hf.shared_result(self, 'get_' + result).items():
+            values = values.to_numpy().view()
+            values.flags.writeable = False
+            arrays[column] = values
+        return arrays
+
+
+class DispatchStats:
+    """Timing, model size and solver status information from a call to SpotMarket.dispatch with profile=True.
+
+    Attributes
+    ----------
+    phase_times : dict[str, float]
+        Wall time in seconds spent in each phase of dispatch, in the order the phases ran. The phases are generic_lhs,
+        create_lhs, lhs_concat (combining the model components into single variable, objective and constraint tables),
+        model_build, relaxation_solve, mip_solve, result_extraction, linearise, pricing_solve and
+        over_constrained_re_run, phases that didn't run are left out.
+
+    model_size : pd.DataFrame
+        The number of constraints and non-zero lhs coefficients in each constraint set.
+
+        ==============  ==============================================
+        Columns:        Description:
+        constraint_set  the name of the constraint set, e.g. 'demand' (as `str`)
+        constraints     the number of constraints (as `np.int64`)
+        non_zeros       the number of lhs coefficients (as `np.int64`)
+        ==============  ==============================================
+
+    variables : dict[str, int]
+        The number of decision variables in each variable group.
+
+    solver_status : dict
+        solved_as_lp, if the mixed integer solve was skipped, pricing_status, the status of the last pricing solve as
+        reported by the solver interface, and over_constrained_re_run, if the over constrained dispatch re-run was used.
+    """
+
+    def __init__(self, phase_times, model_size, variables, solver_status):
+        self.phase_times = phase_times
+        self.model_size = model_size
+        self.variables = variables
+        self.solver_status = solver_status
+
+    @property
+    def total_time(self):
+        return sum(self.phase_times.values())
+
+
+class ModelMatrices:
+    """The linear program of a SpotMarket, as exported by SpotMarket.get_model_matrices.
+
+    The problem is to minimise c @ x, subject to A @ x (senses) rhs and lower_bounds <= x <= upper_bounds, with x
+    integer where integer is True. The constraint matrix A is stored in compressed sparse row format, the lhs terms
+    of row i are in positions indptr[i] to indptr[i + 1] of indices, the column of each term, and data, the
+    coefficient of each term.
+
+    Attributes
+    ----------
+    indptr : np.ndarray
+    indices : np.ndarray
+    data : np.ndarray
+    shape : tuple[int, int]
+        The number of rows, constraints, and columns, variables.
+    senses : np.ndarray
+        The sense of each constraint, i.e. '<=', '>=' or '='.
+    rhs : np.ndarray
+    c : np.ndarray
+        The objective function cost of each variable.
+    lower_bounds : np.ndarray
+    upper_bounds : np.ndarray
+    integer : np.ndarray
+        True for the binary variables.
+    variables : pd.DataFrame
+        Maps columns to variable ids.
+
+        ============  ==============================================
+        Columns:      Description:
+        column        the column of the variable (as `np.int64`)
+        variable_id   the id of the variable (as `np.int64`)
+        variable_set  the set the variable belongs to, e.g. 'bids' (as `str`)
+        ============  ==============================================
+
+    constraints : pd.DataFrame
+        Maps rows to constraint ids, and the constraint sets and set, unit, region, service, interconnector or link
+        that defined them, where those are known.
+
+        ==============  ==============================================
+        Columns:        Description:
+        row             the row of the constraint (as `np.int64`)
+        constraint_id   the id of the constraint (as `np.int64`)
+        constraint_set  the constraint set, e.g. 'demand' (as `str`)
+        ==============  ==============================================
+    """
+
+    def __init__(self, indptr, indices, data, shape, senses, rhs, c, lower_bounds, upper_bounds, integer, variables,
+                 constraints):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = shape
+        self.senses = senses
+        self.rhs = rhs
+        self.c = c
+        self.lower_bounds = lower_bounds
+        self.upper_bounds = upper_bounds
+        self.integer = integer
+        self.variables = variables
+        self.constraints = constraints
+
+    @property
+    def A(self):
+        """The constraint matrix as a scipy.sparse.csr_matrix, requires the optional dependency scipy."""
+        # scipy is an optional dependency, so it is only imported when the matrix is requested.
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+
+class _PhaseTimer:
+    """Attributes wall time to the phases of a process, does nothing if not enabled."""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.times = {}
+        self._last_mark = perf_counter() if enabled else None
+
+    def mark(self, phase):
+        """Add the time since the last mark to phase."""
+        if not self.enabled:
+            return
+        now = perf_counter()
+        self.times[phase] = self.times.get(phase, 0.0) + now - self._last_mark
+        self._last_mark = now
+
 
 class ModelBuildError(Exception):
     """Raise for building model components in wrong order."""
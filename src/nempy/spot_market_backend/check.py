@@ -46,17 +46,10 @@ def interconnectors_exist(func):
 def bid_prices_monotonic_increasing(func, arg=1):
     @keep_details(func)
     def wrapper(*args):
-        bids = args[arg].copy()
-        if 'service' in bids.columns:
-            bids = bids.set_index(['unit', 'service'], drop=True)
-        else:
-            bids = bids.set_index('unit', drop=True)
-        bids = bids.transpose()
-        bids.index = pd.to_numeric(bids.index)
-        bids = bids.sort_index()
-        for col in bids.columns:
-            if not bids[col].is_monotonic:
-                raise BidsNotMonotonicIncreasing('Bids of each unit are not monotonic increasing.')
+        bids = args[arg]
+        bid_bands = sorted([col for col in bids.columns if col not in ['unit', 'service']], key=pd.to_numeric)
+        if not (np.diff(bids.loc[:, bid_bands].to_numpy(), axis=1) >= 0.0).all():
+            raise BidsNotMonotonicIncreasing('Bids of each unit are not monotonic increasing.')
         func(*args)
 
     return wrapper
@@ -16,6 +16,11 @@ class DataFrameSchema:
             self.required_columns.append(column.name)
 
     def validate(self, df):
+        """Check the DataFrame against the schema, raising an exception for the first problem found.
+
+        Each column is checked in a single pass of vectorised checks, which its SeriesSchema selects once, when it is
+        created, and repeated rows are found by hashing the primary keys.
+        """
         for col in df:
             if col not in self.columns:
                 raise UnexpectedColumn("Column {} is not allowed in DataFrame {}.".format(col, self.name))
@@ -24,29 +29,31 @@ class DataFrameSchema:
             if col not in df.columns:
                 raise MissingColumnError("Column {} not in DataFrame {}.".format(col, self.name))
 
-        for col in self.columns:
+        for col, column in self.columns.items():
             if col in df.columns:
-                self.columns[col].validate(df[col])
+                column.validate(df[col])
 
         if self.primary_keys is not None:
             self._check_for_repeated_rows(df)
 
     def _check_for_repeated_rows(self, df):
         cols_in_df = [col for col in self.primary_keys if col in df.columns]
-        if len(df.index) != len(df.drop_duplicates(cols_in_df)):
+        if df.duplicated(cols_in_df).any():
             raise RepeatedRowError('{} should only have one row for each {}.'.format(self.name, ' '.join(cols_in_df)))
 
     def _check_row_monatonic_increasing(self, df):
-        df = df.loc[:, self.row_monatonic_increasing]
-        df = df.transpose()
-        df.index = pd.to_numeric(df.index)
-        df = df.sort_index()
-        for col in df.columns:
-            if not df[col].is_monotonic:
-                raise BidsNotMonotonicIncreasing('Bids of each unit are not monotonic increasing.')
+        cols_in_df = sorted([col for col in self.row_monatonic_increasing if col in df.columns], key=pd.to_numeric)
+        if not (np.diff(df.loc[:, cols_in_df].to_numpy(), axis=1) >= 0.0).all():
+            raise BidsNotMonotonicIncreasing('Bids of each unit are not monotonic increasing.')
 
 
 class SeriesSchema:
+    """The checks for a column of a DataFrameSchema.
+
+    Only the checks the column needs are selected, once, when the schema is created. A str column passes if every
+    element is a str, including str subclasses such as np.str_, missing values aren't allowed.
+    """
+
     def __init__(self, name, data_type, allowed_values=None, must_be_real_number=False, not_negative=False,
                  minimum=None, maximum=None):
         self.name = name
@@ -56,41 +63,55 @@ class SeriesSchema:
         self.not_negative = not_negative
         self.min = minimum
         self.max = maximum
+        if data_type == str:
+            self._checks = [self._check_is_str]
+        elif data_type == callable:
+            self._checks = [self._check_is_callable]
+        else:
+            self._checks = [self._check_dtype]
+        if allowed_values is not None:
+            # The index's hash table is built the first time it is used, and reused by later checks.
+            self._allowed_index = pd.Index(allowed_values).unique()
+            self._checks.append(self._check_allowed_values)
+        if must_be_real_number:
+            self._checks.append(self._check_is_real_number)
+        if not_negative:
+            self._checks.append(self._check_is_not_negtaive)
 
     def validate(self, series):
-        self._check_data_type(series)
-        self._check_allowed_values(series)
-        self._check_is_real_number(series)
-        self._check_is_not_negtaive(series)
-
-    def _check_data_type(self, series):
-        if self.data_type == str:
-            if not all(series.apply(lambda x: type(x) == str)):
-                raise ColumnDataTypeError('All elements of column {} should have type str'.format(self.name))
-        elif self.data_type == callable:
-            if not all(series.apply(lambda x: callable(x))):
-                raise ColumnDataTypeError('All elements of column {} should have type callable'.format(self.name))
-        elif self.data_type != series.dtype:
+        for check in self._checks:
+            check(series)
+
+    def _check_is_str(self, series):
+        if pd.api.types.infer_dtype(series, skipna=False) not in ('string', 'empty'):
+            raise ColumnDataTypeError('All elements of column {} should have type str'.format(self.name))
+
+    def _check_is_callable(self, series):
+        if not all(series.apply(lambda x: callable(x))):
+            raise ColumnDataTypeError('All elements of column {} should have type callable'.format(self.name))
+
+    def _check_dtype(self, series):
+        if self.data_type != series.dtype:
             raise ColumnDataTypeError('Column {} should have type {}'.format(self.name, self.data_type))
 
     def _check_allowed_values(self, series):
-        if self.allowed_values is not None:
-            if not series.isin(self.allowed_values).all():
-                raise ColumnValues("The column {} can only contain the values {}.".format(self.name, self.allowed_values))
+        if (self._allowed_index.get_indexer(series) < 0).any():
+            raise ColumnValues("The column {} can only contain the values {}.".format(self.name, self.allowed_values))
 
     def _check_is_real_number(self, series):
-        if self.must_be_real_number:
-            if np.inf in series.values:
-                raise ColumnValues("Value inf not allowed in column {}.".format(self.name))
-            if -np.inf in series.values:
-                raise ColumnValues("Value -inf not allowed in column {}.".format(self.name))
-            if series.isnull().any():
-                raise ColumnValues("Null values not allowed in column {}.".format(self.name))
+        values = series.to_numpy()
+        if np.isfinite(values).all():
+            return
+        if np.inf in values:
+            raise ColumnValues("Value inf not allowed in column {}.".format(self.name))
+        if -np.inf in values:
+            raise ColumnValues("Value -inf not allowed in column {}.".format(self.name))
+        if series.isnull().any():
+            raise ColumnValues("Null values not allowed in column {}.".format(self.name))
 
     def _check_is_not_negtaive(self, series):
-        if self.not_negative:
-            if series.min() < 0.0:
-                raise ColumnValues("Negative values not allowed in column '{}'.".format(self.name))
+        if series.min() < 0.0:
+            raise ColumnValues("Negative values not allowed in column '{}'.".format(self.name))
 
 
 class RepeatedRowError(Exception):
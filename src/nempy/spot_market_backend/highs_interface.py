@@ -0,0 +1,437 @@
+import numpy as np
+import pandas as pd
+import highspy
+
+from nempy.spot_market_backend.solver_interface import create_constraint_matrix, find_conflicting_constraints, \
+    InfeasibleModelError, _record_positions, _positions_of, _concatenate_matrices, _sum_by_id
+
+
+class HighsInterfaceToSolver:
+    """An interface to the HiGHS solver, through highspy, allowing interaction with HiGHS using pd.DataFrames.
+
+    Provides the same methods as InterfaceToSolver, so it can be used interchangeably with it. Variables and
+    constraints are passed to HiGHS in bulk as arrays. HiGHS doesn't support special ordered sets, so they are modelled
+    with binary variables. When optimize_linear_model is called, the linear program used for pricing is derived from the
+    same model by relaxing integrality and freeing the rows that model the special ordered sets.
+
+    Examples
+    --------
+
+    >>> decision_variables = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2],
+    ...   'lower_bound': [0.0, 0.0, 0.0],
+    ...   'upper_bound': [5.0, 5.0, 10.0],
+    ...   'type': ['continuous', 'continuous', 'continuous']})
+
+    >>> objective_function = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2],
+    ...   'cost': [1.0, 3.0, 10.0]})
+
+    >>> constraints_lhs = pd.DataFrame({
+    ...   'constraint_id': [1, 1, 1],
+    ...   'variable_id': [0, 1, 2],
+    ...   'coefficient': [1.0, 1.0, 1.0]})
+
+    >>> constraints_type_and_rhs = pd.DataFrame({
+    ...   'constraint_id': [1],
+    ...   'type': ['='],
+    ...   'rhs': [8.0]})
+
+    >>> si = HighsInterfaceToSolver()
+
+    >>> si.add_variables(decision_variables)
+
+    >>> si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+    >>> si.add_objective_function(objective_function)
+
+    >>> si.optimize()
+
+    >>> si.get_optimal_values_of_decision_variables(decision_variables)
+    0    5.0
+    1    3.0
+    2    0.0
+    dtype: float64
+
+    >>> si.optimize_linear_model()
+    <HighsModelStatus.kOptimal: 7>
+
+    >>> si.price_constraints([1])
+    {1: 3.0}
+
+    Parameters
+    ----------
+    solver_name : str
+        Should be 'HIGHS', accepted so the interface can be created in the same way as InterfaceToSolver.
+
+    single_model : bool
+        Ignored, a single HiGHS model is always used.
+    """
+
+    def __init__(self, solver_name='HIGHS', single_model=False):
+        self.solver_name = solver_name
+        self.model = highspy.Highs()
+        self.model.setOptionValue('output_flag', False)
+        self.model.setOptionValue('mip_abs_gap', 1e-10)
+        self.model.setOptionValue('mip_rel_gap', 0.0)
+        self.model.setOptionValue('simplex_strategy', 1)  # Dual simplex.
+        self._variable_columns = np.empty(0, dtype=np.int64)
+        self._constraint_rows = np.empty(0, dtype=np.int64)
+        # The type of each row, in order of position, with the rows modelling special ordered sets labelled 'sos'.
+        self._row_types = np.empty(0, dtype=object)
+        # Integer columns and the rows that model special ordered sets, which are relaxed for the pricing model.
+        self._integer_columns = []
+        self._sos_rows = []
+        self._sos_row_bounds = []
+        self._solution = None
+        # The variables and constraint matrices added to the model, kept for diagnosing infeasible models.
+        self._added_variables = []
+        self._added_matrices = []
+
+    @property
+    def objective_value(self):
+        return self.model.getInfo().objective_function_value
+
+    def add_variables(self, decision_variables):
+        """Add decision variables to the model.
+
+        Examples
+        --------
+        >>> decision_variables = pd.DataFrame({
+        ...   'variable_id': [0, 1],
+        ...   'lower_bound': [0.0, 0.0],
+        ...   'upper_bound': [6.0, 1.0],
+        ...   'type': ['continuous', 'binary']})
+
+        >>> si = HighsInterfaceToSolver()
+
+        >>> si.add_variables(decision_variables)
+
+        >>> si.model.getNumCol()
+        2
+        """
+        self._added_variables.append(decision_variables)
+        first_column = self.model.getNumCol()
+        self._variable_columns = _record_positions(self._variable_columns, decision_variables['variable_id'],
+                                                   first_column)
+        binary = (decision_variables['type'] == 'binary').to_numpy()
+        self._add_columns(decision_variables['lower_bound'].to_numpy(dtype=np.float64),
+                          decision_variables['upper_bound'].to_numpy(dtype=np.float64), binary)
+
+    def add_sos_type_2(self, sos_variables, sos_id_columns, position_column):
+        """Add groups of special ordered sets of type 2 to the model.
+
+        Each set is modelled with a binary variable for each pair of neighbouring variables in the set, only one of
+        which can be one, and the variables in the set are limited to zero unless a neighbouring binary is one.
+
+        Examples
+        --------
+
+        >>> decision_variables = pd.DataFrame({
+        ...   'variable_id': [0, 1, 2],
+        ...   'lower_bound': [0.0, 0.0, 0.0],
+        ...   'upper_bound': [1.0, 1.0, 1.0],
+        ...   'type': ['continuous', 'continuous', 'continuous']})
+
+        >>> objective_function = pd.DataFrame({
+        ...   'variable_id': [0, 1, 2],
+        ...   'cost': [0.0, 5.0, 0.0]})
+
+        >>> constraints_lhs = pd.DataFrame({
+        ...   'constraint_id': [1, 1, 1, 2, 2],
+        ...   'variable_id': [0, 1, 2, 1, 2],
+        ...   'coefficient': [1.0, 1.0, 1.0, 1.0, 2.0]})
+
+        >>> constraints_type_and_rhs = pd.DataFrame({
+        ...   'constraint_id': [1, 2],
+        ...   'type': ['=', '='],
+        ...   'rhs': [1.0, 1.0]})
+
+        >>> sos_variables = pd.DataFrame({
+        ...   'variable_id': [0, 1, 2],
+        ...   'sos_id': ['A', 'A', 'A'],
+        ...   'position': [0, 1, 2]})
+
+        >>> si = HighsInterfaceToSolver()
+
+        >>> si.add_variables(decision_variables)
+
+        >>> si.add_objective_function(objective_function)
+
+        >>> si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+        Without the special ordered set the first and last variables could be used to meet the constraints, avoiding
+        the cost of the middle variable, but with the set only neighbouring variables can be used.
+
+        >>> si.add_sos_type_2(sos_variables, 'sos_id', 'position')
+
+        >>> si.optimize()
+
+        >>> si.objective_value
+        5.0
+
+        Raises
+        ------
+            ValueError
+                If a variable in a set with three or more members doesn't have finite bounds.
+        """
+        sos_variables = sos_variables.sort_values(position_column)
+        for _, sos_set in sos_variables.groupby(sos_id_columns):
+            columns = _positions_of(self._variable_columns, sos_set['variable_id'], 'variable_id')
+            if len(columns) < 3:
+                continue
+            lower, upper = self._sos_member_bounds(columns)
+            # Binary segment_columns[i] selects the segment between set members i and i + 1.
+            segment_columns = self._add_columns(np.zeros(len(columns) - 1), np.ones(len(columns) - 1),
+                                                np.ones(len(columns) - 1, dtype=bool))
+            # Only one segment can be selected.
+            self._add_sos_row(segment_columns, np.ones(len(segment_columns)), -highspy.kHighsInf, 1.0)
+            # Each member of the set is limited by the segments on either side of it.
+            for i, column in enumerate(columns.tolist()):
+                neighbours = segment_columns[max(i - 1, 0):i + 1]
+                self._add_sos_row(np.concatenate([[column], neighbours]),
+                                  np.concatenate([[1.0], np.full(len(neighbours), -upper[i])]),
+                                  -highspy.kHighsInf, 0.0)
+                if lower[i] < 0.0:
+                    self._add_sos_row(np.concatenate([[column], neighbours]),
+                                      np.concatenate([[1.0], np.full(len(neighbours), -lower[i])]),
+                                      0.0, highspy.kHighsInf)
+
+    def add_sos_type_1(self, sos_variables):
+        """Add groups of special ordered sets of type 1 to the model.
+
+        Each set is modelled with a binary variable for each member, only one of which can be one, and members are
+        limited to zero unless their binary is one.
+
+        Raises
+        ------
+            ValueError
+                If a variable in a set doesn't have finite bounds.
+        """
+        for _, sos_set in sos_variables.groupby('sos_id'):
+            columns = _positions_of(self._variable_columns, sos_set['variable_id'], 'variable_id')
+            lower, upper = self._sos_member_bounds(columns)
+            member_columns = self._add_columns(np.zeros(len(columns)), np.ones(len(columns)),
+                                               np.ones(len(columns), dtype=bool))
+            self._add_sos_row(member_columns, np.ones(len(member_columns)), -highspy.kHighsInf, 1.0)
+            for column, member_column, lower_bound, upper_bound in zip(columns.tolist(), member_columns.tolist(),
+                                                                       lower, upper):
+                self._add_sos_row(np.array([column, member_column]), np.array([1.0, -upper_bound]),
+                                  -highspy.kHighsInf, 0.0)
+                if lower_bound < 0.0:
+                    self._add_sos_row(np.array([column, member_column]), np.array([1.0, -lower_bound]),
+                                      0.0, highspy.kHighsInf)
+
+    def add_objective_function(self, objective_function):
+        """Add the objective function to the model.
+
+        Examples
+        --------
+
+        >>> decision_variables = pd.DataFrame({
+        ...   'variable_id': [0, 1],
+        ...   'lower_bound': [0.0, 0.0],
+        ...   'upper_bound': [5.0, 5.0],
+        ...   'type': ['continuous', 'continuous']})
+
+        >>> objective_function = pd.DataFrame({
+        ...   'variable_id': [1],
+        ...   'cost': [2.0]})
+
+        >>> si = HighsInterfaceToSolver()
+
+        >>> si.add_variables(decision_variables)
+
+        >>> si.add_objective_function(objective_function)
+
+        >>> si.model.getLp().col_cost_.tolist()
+        [0.0, 2.0]
+        """
+        columns = _positions_of(self._variable_columns, objective_function['variable_id'], 'variable_id')
+        self.model.changeColsCost(len(columns), columns.astype(np.int32),
+                                  objective_function['cost'].to_numpy(dtype=np.float64))
+
+    def add_constraints(self, constraints_lhs, constraints_type_and_rhs):
+        """Add constraints to the model.
+
+        Examples
+        --------
+        >>> decision_variables = pd.DataFrame({
+        ...   'variable_id': [0, 1, 2],
+        ...   'lower_bound': [0.0, 0.0, 0.0],
+        ...   'upper_bound': [5.0, 5.0, 10.0],
+        ...   'type': ['continuous', 'continuous', 'continuous']})
+
+        >>> constraints_lhs = pd.DataFrame({
+        ...   'constraint_id': [1, 1, 2],
+        ...   'variable_id': [0, 1, 2],
+        ...   'coefficient': [1.0, 0.5, 1.0]})
+
+        >>> constraints_type_and_rhs = pd.DataFrame({
+        ...   'constraint_id': [1, 2],
+        ...   'type': ['<=', '='],
+        ...   'rhs': [10.0, 20.0]})
+
+        >>> si = HighsInterfaceToSolver()
+
+        >>> si.add_variables(decision_variables)
+
+        >>> si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+        >>> si.model.getNumRow()
+        2
+        """
+        matrix = create_constraint_matrix(constraints_lhs, constraints_type_and_rhs)
+        self._added_matrices.append(matrix)
+        first_row = self.model.getNumRow()
+        self._constraint_rows = _record_positions(self._constraint_rows, matrix.constraint_ids, first_row)
+        self._row_types = np.concatenate([self._row_types, matrix.types])
+        lower = np.where(matrix.types == '<=', -highspy.kHighsInf, matrix.rhs)
+        upper = np.where(matrix.types == '>=', highspy.kHighsInf, matrix.rhs)
+        columns = _positions_of(self._variable_columns, matrix.variable_ids, 'variable_id')
+        self.model.addRows(len(matrix), lower, upper, len(columns), matrix.row_starts[:-1].astype(np.int32),
+                           columns.astype(np.int32), matrix.coefficients)
+
+    def optimize(self):
+        """Optimize the model, including the special ordered sets and integrality of variables.
+
+        If an optimal solution cannot be found then a small set of conflicting constraints is found with
+        find_conflicting_constraints and an InfeasibleModelError is raised.
+        """
+        self._set_relaxed(False)
+        self.model.run()
+        self._solution = None
+        if self.model.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            raise InfeasibleModelError(find_conflicting_constraints(pd.concat(self._added_variables),
+                                                                    _concatenate_matrices(self._added_matrices),
+                                                                    solver_name=self.solver_name))
+
+    def optimize_relaxation(self):
+        """Optimize the linear relaxation of the model, ignoring integrality and special ordered sets.
+
+        Returns
+        -------
+        bool
+            True if an optimal solution to the relaxation was found.
+        """
+        return self.optimize_linear_model() == highspy.HighsModelStatus.kOptimal
+
+    def optimize_linear_model(self):
+        """Optimize the linear relaxation of the model, which is used for pricing.
+
+        Returns
+        -------
+        highspy.HighsModelStatus
+        """
+        self._set_relaxed(True)
+        self.model.run()
+        self._solution = None
+        return self.model.getModelStatus()
+
+    def get_optimal_values_of_decision_variables(self, variable_definitions):
+        columns = _positions_of(self._variable_columns, variable_definitions['variable_id'], 'variable_id')
+        return pd.Series(self._get_solution()['x'][columns], index=variable_definitions.index)
+
+    def get_optimal_values_of_decision_variables_lin(self, variable_definitions):
+        return self.get_optimal_values_of_decision_variables(variable_definitions)
+
+    def get_slack_in_constraints(self, constraints_type_and_rhs):
+        constraint_ids = constraints_type_and_rhs['constraint_id'].to_numpy(dtype=np.int64)
+        rows = np.full(len(constraint_ids), -1, dtype=np.int64)
+        in_range = (constraint_ids >= 0) & (constraint_ids < len(self._constraint_rows))
+        rows[in_range] = self._constraint_rows[constraint_ids[in_range]]
+        # Constraints not in the model, e.g. those with no lhs terms, have no slack reported.
+        slack = np.zeros(len(constraint_ids))
+        slack[rows >= 0] = self._get_solution()['slack'][rows[rows >= 0]]
+        return pd.Series(slack, index=constraints_type_and_rhs.index)
+
+    def price_constraints(self, constraint_ids_to_price):
+        constraint_ids_to_price = list(constraint_ids_to_price)
+        rows = _positions_of(self._constraint_rows, constraint_ids_to_price, 'constraint_id')
+        return dict(zip(constraint_ids_to_price, self._get_solution()['pi'][rows].tolist()))
+
+    def update_rhs(self, constraint_id, violation_degree):
+        self.update_rhs_of_constraints([constraint_id], [violation_degree])
+
+    def update_rhs_of_constraints(self, constraint_ids, violation_degrees):
+        constraint_ids, violation_degrees = _sum_by_id(constraint_ids, violation_degrees)
+        rows = _positions_of(self._constraint_rows, constraint_ids, 'constraint_id')
+        lp = self.model.getLp()
+        lower = np.asarray(lp.row_lower_)[rows]
+        upper = np.asarray(lp.row_upper_)[rows]
+        lower = np.where(self._row_types[rows] != '<=', lower + violation_degrees, lower)
+        upper = np.where(self._row_types[rows] != '>=', upper + violation_degrees, upper)
+        self.model.changeRowsBounds(len(rows), rows.astype(np.int32), lower, upper)
+
+    def update_variable_bounds(self, new_bounds):
+        columns = _positions_of(self._variable_columns, new_bounds['variable_id'], 'variable_id')
+        self.model.changeColsBounds(len(columns), columns.astype(np.int32),
+                                    new_bounds['lower_bound'].to_numpy(dtype=np.float64),
+                                    new_bounds['upper_bound'].to_numpy(dtype=np.float64))
+
+    def disable_variables(self, variables):
+        columns = _positions_of(self._variable_columns, variables['variable_id'], 'variable_id')
+        self.model.changeColsBounds(len(columns), columns.astype(np.int32), np.zeros(len(columns)),
+                                    np.zeros(len(columns)))
+
+    def _add_columns(self, lower, upper, integer):
+        first_column = self.model.getNumCol()
+        number = len(lower)
+        self.model.addCols(number, np.zeros(number), lower, upper, 0, np.zeros(number, dtype=np.int32),
+                           np.empty(0, dtype=np.int32), np.empty(0))
+        columns = first_column + np.arange(number)
+        self._integer_columns.extend(columns[integer].tolist())
+        if integer.any():
+            self.model.changeColsIntegrality(int(integer.sum()), columns[integer].astype(np.int32),
+                                             np.full(int(integer.sum()), highspy.HighsVarType.kInteger))
+        return columns
+
+    def _sos_member_bounds(self, columns):
+        """The bounds of the members of a special ordered set, which are used to limit the members when the set's
+        binary variables are zero, so they must be finite."""
+        lp = self.model.getLp()
+        lower, upper = np.asarray(lp.col_lower_)[columns], np.asarray(lp.col_upper_)[columns]
+        if not (np.isfinite(lower).all() and np.isfinite(upper).all()):
+            raise ValueError('The HiGHS backend models special ordered sets using the bounds of their members, so '
+                             'the members must have finite bounds.')
+        return lower, upper
+
+    def _add_sos_row(self, columns, coefficients, lower, upper):
+        self._sos_rows.append(self.model.getNumRow())
+        self._row_types = np.append(self._row_types, 'sos')
+        self._sos_row_bounds.append((lower, upper))
+        self.model.addRow(lower, upper, len(columns), np.asarray(columns, dtype=np.int32),
+                          np.asarray(coefficients, dtype=np.float64))
+
+    def _set_relaxed(self, relaxed):
+        """Relax, or restore, the integrality of variables and the rows modelling special ordered sets."""
+        if not self._integer_columns:
+            return
+        columns = np.array(self._integer_columns, dtype=np.int32)
+        variable_type = highspy.HighsVarType.kContinuous if relaxed else highspy.HighsVarType.kInteger
+        self.model.changeColsIntegrality(len(columns), columns, np.full(len(columns), variable_type))
+        if self._sos_rows:
+            rows = np.array(self._sos_rows, dtype=np.int32)
+            if relaxed:
+                lower = np.full(len(rows), -highspy.kHighsInf)
+                upper = np.full(len(rows), highspy.kHighsInf)
+            else:
+                lower, upper = (np.array(bounds) for bounds in zip(*self._sos_row_bounds))
+            self.model.changeRowsBounds(len(rows), rows, lower, upper)
+
+    def _get_solution(self):
+        """Read the x, slack and pi vectors from HiGHS once per solve, ordered by position."""
+        if self._solution is None:
+            solution = self.model.getSolution()
+            row_value = np.asarray(solution.row_value)
+            lp = self.model.getLp()
+            # Slack is reported as the distance from the constraining rhs, as done by InterfaceToSolver.
+            upper = np.asarray(lp.row_upper_)
+            lower = np.asarray(lp.row_lower_)
+            slack = np.zeros(len(row_value))
+            greater_than = self._row_types == '>='
+            slack[greater_than] = row_value[greater_than] - lower[greater_than]
+            slack[~greater_than] = upper[~greater_than] - row_value[~greater_than]
+            pi = np.asarray(solution.row_dual) if solution.dual_valid else np.full(len(row_value), np.nan)
+            self._solution = {'x': np.asarray(solution.col_value), 'slack': slack, 'pi': pi}
+        return self._solution
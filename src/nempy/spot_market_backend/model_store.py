@@ -0,0 +1,462 @@
+import io
+import json
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+
+class KeyCodes:
+    """Market wide dictionary encoding str ids, e.g. unit, region, service and generic constraint set names, as
+    integer codes.
+
+    Codes are shared by all the tables of a market, so tables can be joined on their codes. Code 0 is kept for
+    missing values.
+
+    Examples
+    --------
+
+    >>> key_codes = KeyCodes()
+
+    >>> key_codes.encode(pd.Series(['NSW', 'VIC', 'NSW']))
+    array([1, 2, 1], dtype=int32)
+
+    >>> key_codes.encode(pd.Series(['VIC', None, 'SA']))
+    array([2, 0, 3], dtype=int32)
+
+    >>> key_codes.decode(np.array([3, 1]))
+    array(['SA', 'NSW'], dtype=object)
+    """
+
+    def __init__(self):
+        self._codes = {}
+        self._values = [None]
+
+    def encode(self, values):
+        """Encode a sequence of ids as an np.int32 array of codes, adding any new ids to the dictionary."""
+        value_codes, uniques = pd.factorize(np.asarray(values))
+        code_of_uniques = np.empty(len(uniques) + 1, dtype=np.int32)
+        for position, value in enumerate(uniques):
+            if value not in self._codes:
+                self._codes[value] = len(self._values)
+                self._values.append(value)
+            code_of_uniques[position] = self._codes[value]
+        # Missing values are factorized to -1, which picks the last element, the missing value code.
+        code_of_uniques[-1] = 0
+        return code_of_uniques[value_codes]
+
+    def decode(self, codes):
+        """Find the ids of an array of codes."""
+        return np.array(self._values, dtype=object)[codes]
+
+
+class ModelTable(dict):
+    """A dict of model component DataFrames, that also holds the components' columns as growable numpy arrays.
+
+    Each DataFrame set in the table is appended to preallocated arrays, one per column, that are doubled in size when
+    full. The key columns, str ids such as unit or service, are stored as their KeyCodes codes, with groups that don't
+    have a key column getting the missing value code. Replacing or deleting a group leaves its rows in the arrays
+    until the table is next read, when the arrays are compacted, in the dict's order. Reading the table, see
+    ModelTable.frame, otherwise gives views of the arrays, so model tables can be read without concatenating their
+    groups. The DataFrames are still held in the dict, so they can be used by the results getters, and should be
+    replaced, rather than modified in place, if their model columns change.
+
+    Examples
+    --------
+
+    >>> variables = ModelTable(['variable_id', 'upper_bound'], key_columns=['unit'], key_codes=KeyCodes())
+
+    >>> variables['bids'] = pd.DataFrame({
+    ...     'unit': ['A', 'B'],
+    ...     'variable_id': [0, 1],
+    ...     'upper_bound': [10.0, 20.0]})
+
+    >>> variables['deficit'] = pd.DataFrame({
+    ...     'variable_id': [2],
+    ...     'upper_bound': [np.inf]})
+
+    >>> print(variables.frame())
+       variable_id  upper_bound  unit
+    0            0         10.0     1
+    1            1         20.0     2
+    2            2          inf     0
+
+    >>> print(variables.frame(['variable_id'], groups=['deficit']))
+       variable_id
+    0            2
+
+    >>> variables['bids'] = pd.DataFrame({
+    ...     'unit': ['B'],
+    ...     'variable_id': [3],
+    ...     'upper_bound': [30.0]})
+
+    >>> print(variables.frame(['variable_id', 'unit']))
+       variable_id  unit
+    0            3     2
+    1            2     0
+    """
+
+    def __init__(self, columns, key_columns=(), key_codes=None, capacity=1024):
+        super().__init__()
+        self.columns = list(columns)
+        self.key_columns = list(key_columns)
+        self.key_codes = key_codes if key_codes is not None else KeyCodes()
+        self._arrays = {}
+        self._segments = {}
+        self._size = 0
+        self._capacity = capacity
+        self._compacted = True
+
+    def __setitem__(self, group, frame):
+        if group in self:
+            self._drop_segment(group)
+        arrays = {col: frame[col].to_numpy() for col in self.columns}
+        for col in self.key_columns:
+            if col in frame.columns:
+                arrays[col] = self.key_codes.encode(frame[col])
+            else:
+                arrays[col] = np.zeros(len(frame.index), dtype=np.int32)
+        self._segments[group] = self._append(arrays, len(frame.index))
+        super().__setitem__(group, frame)
+
+    def __delitem__(self, group):
+        self._drop_segment(group)
+        super().__delitem__(group)
+
+    def pop(self, group, *default):
+        if group in self:
+            self._drop_segment(group)
+        return super().pop(group, *default)
+
+    def clear(self):
+        super().clear()
+        self._segments = {}
+        self._arrays = {}
+        self._size = 0
+        self._compacted = True
+
+    def update(self, *args, **kwargs):
+        for group, frame in dict(*args, **kwargs).items():
+            self[group] = frame
+
+    def setdefault(self, group, frame=None):
+        if group not in self:
+            self[group] = frame
+        return self[group]
+
+    def __reduce__(self):
+        # Only the DataFrames are pickled, the arrays are rebuilt as the DataFrames are set in the unpickled table.
+        return self.__class__, (self.columns, self.key_columns, self.key_codes), None, None, iter(self.items())
+
+    def arrays(self):
+        """The table's arrays, trimmed to the rows in use, and the (start, stop) rows of each group in them."""
+        if not self._compacted:
+            self._compact()
+        return {col: values[:self._size] for col, values in self._arrays.items()}, dict(self._segments)
+
+    @classmethod
+    def from_arrays(cls, columns, key_columns, key_codes, frames, arrays, segments):
+        """Rebuild a table from its DataFrames and the arrays and segments given by ModelTable.arrays, without
+        appending the DataFrames again."""
+        table = cls(columns, key_columns=key_columns, key_codes=key_codes)
+        for group, frame in frames.items():
+            dict.__setitem__(table, group, frame)
+        table._arrays = dict(arrays)
+        table._segments = {group: tuple(segments[group]) for group in frames}
+        table._size = len(next(iter(arrays.values()))) if arrays else 0
+        return table
+
+    def frame(self, columns=None, groups=None):
+        """Read the given columns, and key column codes, of the groups as a single DataFrame.
+
+        The DataFrame is a view of the table's arrays, in the dict's order, unless groups are given, in which case
+        the rows of the given groups that are in the table are returned in the order given.
+        """
+        if columns is None:
+            columns = self.columns + self.key_columns
+        if not self._compacted:
+            self._compact()
+        if groups is None:
+            rows = slice(0, self._size)
+        else:
+            segments = [self._segments[group] for group in groups if group in self._segments]
+            if len(segments) == 1:
+                rows = slice(*segments[0])
+            else:
+                rows = np.concatenate([np.arange(start, stop, dtype=np.int64) for start, stop in segments] +
+                                      [np.empty(0, dtype=np.int64)])
+        data = {}
+        for col in columns:
+            if col in self._arrays:
+                values = self._arrays[col][rows]
+            else:
+                values = np.empty(0, dtype=np.int32 if col in self.key_columns else object)
+            values.flags.writeable = False
+            data[col] = values
+        return pd.DataFrame(data, copy=False)
+
+    def _append(self, arrays, length):
+        start = self._size
+        stop = start + length
+        if start == 0:
+            self._arrays = {col: np.empty(max(self._capacity, length), dtype=values.dtype)
+                            for col, values in arrays.items()}
+        elif stop > len(next(iter(self._arrays.values()))):
+            capacity = max(2 * len(next(iter(self._arrays.values()))), stop)
+            self._arrays = {col: self._resize(values, capacity, arrays[col].dtype)
+                            for col, values in self._arrays.items()}
+        for col, values in arrays.items():
+            if not np.can_cast(values.dtype, self._arrays[col].dtype, casting='safe'):
+                self._arrays[col] = self._arrays[col].astype(np.result_type(self._arrays[col].dtype, values.dtype))
+            self._arrays[col][start:stop] = values
+        self._size = stop
+        return start, stop
+
+    def _resize(self, values, capacity, new_dtype):
+        resized = np.empty(capacity, dtype=np.result_type(values.dtype, new_dtype))
+        resized[:self._size] = values[:self._size]
+        return resized
+
+    def _drop_segment(self, group):
+        del self._segments[group]
+        self._compacted = False
+
+    def _compact(self):
+        # Gather the rows of the groups still in the table, in the dict's order, into new arrays.
+        segments = [self._segments[group] for group in self]
+        rows = np.concatenate([np.arange(start, stop, dtype=np.int64) for start, stop in segments] +
+                              [np.empty(0, dtype=np.int64)])
+        capacity = max(self._capacity, len(rows))
+        arrays = {}
+        for col, values in self._arrays.items():
+            arrays[col] = np.empty(capacity, dtype=values.dtype)
+            arrays[col][:len(rows)] = values[rows]
+        self._arrays = arrays
+        self._segments = {}
+        start = 0
+        for group, (segment_start, segment_stop) in zip(list(self), segments):
+            self._segments[group] = (start, start + segment_stop - segment_start)
+            start += segment_stop - segment_start
+        self._size = start
+        self._compacted = True
+
+
+
+def dumps(state):
+    """Serialise model state to bytes, as a compressed npz file of numpy arrays with a JSON header.
+
+    The state is a dict, with str keys, of ModelTables, KeyCodes, DataFrames, dicts, and JSON compatible values. The
+    columns of DataFrames and ModelTables are saved as numpy arrays, with object columns, which must hold str, saved as
+    integer codes and an array of the unique str, missing values are restored as NaN. The arrays are concatenated into
+    one array per dtype, and the header records where each column is in them. No Python objects are pickled, so
+    loading the bytes can't run code.
+
+    Examples
+    --------
+
+    >>> key_codes = KeyCodes()
+
+    >>> variables = ModelTable(['variable_id'], key_columns=['unit'], key_codes=key_codes)
+
+    >>> variables['bids'] = pd.DataFrame({
+    ...     'unit': ['A', 'B'],
+    ...     'variable_id': [0, 1]})
+
+    >>> state = loads(dumps({'variables': variables, 'key_codes': key_codes, 'next_variable_id': 2}))
+
+    >>> print(state['variables']['bids'])
+      unit  variable_id
+    0    A            0
+    1    B            1
+
+    >>> state['variables'].key_codes is state['key_codes']
+    True
+
+    Parameters
+    ----------
+    state : dict
+
+    Returns
+    -------
+    bytes
+
+    Raises
+    ------
+        TypeError
+            If the state holds values that can't be serialised.
+    """
+    pool = _ArrayPool()
+    key_codes = {}
+    node = _encode(state, pool, key_codes)
+    header = {'key_codes': [pool.add(_str_array(codes._values[1:])) for codes in key_codes.values()], 'state': node}
+    arrays = pool.arrays()
+    arrays['header'] = np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8)
+    buffer = io.BytesIO()
+    # Written as np.savez_compressed would, but with faster compression.
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for name, values in arrays.items():
+            with archive.open(name + '.npy', 'w') as file:
+                np.lib.format.write_array(file, values, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def loads(data):
+    """Restore model state serialised with dumps.
+
+    Parameters
+    ----------
+    data : bytes
+
+    Returns
+    -------
+    dict
+
+    Raises
+    ------
+        ValueError
+            If the data wasn't created by dumps.
+    """
+    try:
+        with np.load(io.BytesIO(data), allow_pickle=False) as file:
+            arrays = {name: file[name] for name in file.files}
+        header = json.loads(arrays.pop('header').tobytes().decode('utf-8'))
+        # The str are converted to Python str once, rather than for each column.
+        arrays = {key: values.astype(object) if values.dtype.kind == 'U' else values for key, values in arrays.items()}
+        key_codes = []
+        for reference in header['key_codes']:
+            codes = KeyCodes()
+            codes._values = [None] + _take(arrays, reference).tolist()
+            codes._codes = {value: code for code, value in enumerate(codes._values) if code > 0}
+            key_codes.append(codes)
+        return _decode(header['state'], arrays, key_codes)
+    except (OSError, EOFError, KeyError, TypeError, ValueError, zipfile.BadZipFile) as error:
+        raise ValueError('Not serialised model state.') from error
+
+
+class _ArrayPool:
+    """Collects the arrays being serialised into one array per dtype, referring to each by its dtype, offset and
+    length, so few, large arrays are saved."""
+
+    def __init__(self):
+        self._arrays = {}
+        self._sizes = {}
+
+    def add(self, values):
+        dtype = 'str' if values.dtype.kind == 'U' else values.dtype.str
+        offset = self._sizes.get(dtype, 0)
+        self._arrays.setdefault(dtype, []).append(values)
+        self._sizes[dtype] = offset + len(values)
+        return [dtype, offset, len(values)]
+
+    def arrays(self):
+        return {dtype: np.concatenate(arrays) for dtype, arrays in self._arrays.items()}
+
+
+def _take(arrays, reference):
+    dtype, offset, length = reference
+    return arrays[dtype][offset:offset + length]
+
+
+def _encode(value, pool, key_codes):
+    if isinstance(value, ModelTable):
+        table_arrays, segments = value.arrays()
+        encoded_arrays = {col: _encode_array(values, pool) for col, values in table_arrays.items()}
+        frames = {}
+        for group, frame in value.items():
+            # The numeric model columns of the DataFrames are saved as references to the rows of the table's arrays.
+            start, stop = segments[group]
+            shared = {col: (table_arrays[col][start:stop], [encoded_arrays[col]['values'][0],
+                                                            encoded_arrays[col]['values'][1] + start, stop - start])
+                      for col in value.columns if 'values' in encoded_arrays.get(col, {})}
+            frames[group] = _encode_frame(frame, pool, shared)
+        return {'kind': 'model_table', 'columns': value.columns, 'key_columns': value.key_columns,
+                'key_codes': _encode(value.key_codes, pool, key_codes), 'frames': frames, 'arrays': encoded_arrays,
+                'segments': {group: list(segment) for group, segment in segments.items()}}
+    if isinstance(value, KeyCodes):
+        # Key codes shared by several tables are saved once, and shared again when loaded.
+        key_codes.setdefault(id(value), value)
+        return {'kind': 'key_codes', 'index': list(key_codes).index(id(value))}
+    if isinstance(value, pd.DataFrame):
+        return _encode_frame(value, pool, {})
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value):
+            raise TypeError('Only dicts with str keys can be serialised.')
+        return {'kind': 'dict', 'items': {key: _encode(item, pool, key_codes) for key, item in value.items()}}
+    return {'kind': 'value', 'value': _json_value(value)}
+
+
+def _encode_frame(frame, pool, shared):
+    if isinstance(frame.index, pd.RangeIndex):
+        index = {'start': frame.index.start, 'stop': frame.index.stop, 'step': frame.index.step}
+    else:
+        index = _encode_array(frame.index.to_numpy(), pool)
+    columns = []
+    for col, series in frame.items():
+        if col in shared:
+            values, reference = shared[col]
+            if series.dtype == values.dtype and np.array_equal(series.to_numpy(), values,
+                                                               equal_nan=values.dtype.kind in 'fc'):
+                columns.append([col, {'values': reference}])
+                continue
+        columns.append([col, _encode_array(series, pool)])
+    return {'kind': 'frame', 'index': index, 'columns': columns}
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    raise TypeError('Values of type {} can\'t be serialised.'.format(type(value).__name__))
+
+
+def _encode_array(values, pool):
+    if isinstance(values, pd.Series):
+        if not isinstance(values.dtype, np.dtype):
+            raise TypeError('Columns of type {} can\'t be serialised.'.format(values.dtype))
+        values = values.to_numpy()
+    if values.dtype.kind in 'biufcmM':
+        return {'values': pool.add(values)}
+    if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+        raise TypeError('Only object columns of str can be serialised.')
+    codes, uniques = pd.factorize(values)
+    return {'codes': pool.add(codes.astype(np.int32)), 'uniques': pool.add(_str_array(uniques))}
+
+
+def _str_array(values):
+    values = np.asarray(values, dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=False) not in ('string', 'empty'):
+        raise TypeError('Only str ids can be serialised.')
+    return values.astype(str)
+
+
+def _decode(node, arrays, key_codes):
+    kind = node['kind']
+    if kind == 'model_table':
+        frames = {group: _decode(frame, arrays, key_codes) for group, frame in node['frames'].items()}
+        table_arrays = {col: _decode_array(values, arrays) for col, values in node['arrays'].items()}
+        table_key_codes = _decode(node['key_codes'], arrays, key_codes)
+        return ModelTable.from_arrays(node['columns'], node['key_columns'], table_key_codes, frames, table_arrays,
+                                      node['segments'])
+    if kind == 'key_codes':
+        return key_codes[node['index']]
+    if kind == 'frame':
+        index = node['index']
+        if 'start' in index:
+            index = pd.RangeIndex(index['start'], index['stop'], index['step'])
+        else:
+            index = _decode_array(index, arrays)
+        return pd.DataFrame({col: _decode_array(values, arrays) for col, values in node['columns']}, index=index)
+    if kind == 'dict':
+        return {key: _decode(item, arrays, key_codes) for key, item in node['items'].items()}
+    return node['value']
+
+
+def _decode_array(node, arrays):
+    if 'values' in node:
+        return _take(arrays, node['values'])
+    # Missing values are coded -1, which picks the last element, the missing value.
+    uniques = np.append(_take(arrays, node['uniques']), np.nan)
+    return uniques[_take(arrays, node['codes'])]
@@ -1,34 +1,68 @@
 import numpy as np
 import pandas as pd
-from mip import Model, xsum, minimize, CONTINUOUS, OptimizationStatus, BINARY, CBC, GUROBI, LP_Method
+from mip import Model, LinExpr, minimize, CONTINUOUS, OptimizationStatus, BINARY, CBC, GUROBI, LP_Method, \
+    LESS_OR_EQUAL, GREATER_OR_EQUAL, EQUAL
 
 
 class InterfaceToSolver:
-    """A wrapper for the mip model class, allows interaction with mip using pd.DataFrames."""
+    """A wrapper for the mip model class, allows interaction with mip using pd.DataFrames.
 
-    def __init__(self, solver_name='CBC'):
+    By default two mip models are built in lockstep, mip_model which is used to find dispatch and linear_mip_model
+    which is used for pricing. If single_model is True then only mip_model is built, and the pricing linear program is
+    derived from it when needed by fixing interpolation weights and solving its linear relaxation in place, see
+    optimize_linear_model.
+
+    Parameters
+    ----------
+    solver_name : str
+        Either 'CBC' or 'GUROBI'.
+
+    single_model : bool
+        Build one model and derive the pricing linear program from it, rather than building two models. Default False.
+    """
+
+    def __init__(self, solver_name='CBC', single_model=False):
         self.variables = {}
         self.linear_mip_variables = {}
+        # Column and row positions of variables and constraints in the solver models, indexed by variable_id and
+        # constraint_id, -1 where an id isn't in the models. Both models are built in lockstep so positions are shared.
+        self._variable_columns = np.empty(0, dtype=np.int64)
+        self._constraint_rows = np.empty(0, dtype=np.int64)
+        # Solution vectors read from the solver, cleared each time a model is optimized.
+        self._solutions = {}
+        # The variables and constraint matrices added to the model, kept for diagnosing infeasible models.
+        self._added_variables = []
+        self._added_matrices = []
 
         self.solver_name = solver_name
+        self.single_model = single_model
         if solver_name == 'CBC':
             self.mip_model = Model("market", solver_name=CBC)
-            self.linear_mip_model = Model("market", solver_name=CBC)
         elif solver_name == 'GUROBI':
             self.mip_model = Model("market", solver_name=GUROBI)
-            self.linear_mip_model = Model("market", solver_name=GUROBI)
         else:
-            raise ValueError("Solver '{}' not recognised.")
+            raise ValueError("Solver '{}' not recognised.".format(solver_name))
 
         self.mip_model.verbose = 0
         self.mip_model.solver.set_mip_gap_abs(1e-10)
         self.mip_model.solver.set_mip_gap(1e-20)
         self.mip_model.lp_method = LP_Method.DUAL
 
-        self.linear_mip_model.verbose = 0
-        self.linear_mip_model.solver.set_mip_gap_abs(1e-10)
-        self.linear_mip_model.solver.set_mip_gap(1e-20)
-        self.linear_mip_model.lp_method = LP_Method.DUAL
+        if single_model:
+            # The pricing model is the mip model itself, with integrality and special ordered sets relaxed when it is
+            # solved by optimize_linear_model.
+            self.linear_mip_model = self.mip_model
+            self.linear_mip_variables = self.variables
+        else:
+            self.linear_mip_model = Model("market", solver_name=self.mip_model.solver_name)
+            self.linear_mip_model.verbose = 0
+            self.linear_mip_model.solver.set_mip_gap_abs(1e-10)
+            self.linear_mip_model.solver.set_mip_gap(1e-20)
+            self.linear_mip_model.lp_method = LP_Method.DUAL
+
+    @property
+    def objective_value(self):
+        return self.mip_model.objective_value
 
     def add_variables(self, decision_variables):
         """Add decision variables to the model.
@@ -75,6 +109,9 @@ class InterfaceToSolver:
         """
         # Create a mapping between the nempy level names for variable types and the mip representation.
         variable_types = {'continuous': CONTINUOUS, 'binary': BINARY}
+        self._added_variables.append(decision_variables)
+        self._variable_columns = _record_positions(self._variable_columns, decision_variables['variable_id'],
+                                                   self.mip_model.num_cols)
         # Add each variable to the mip model.
         for variable_id, lower_bound, upper_bound, variable_type in zip(
                 list(decision_variables['variable_id']), list(decision_variables['lower_bound']),
@@ -82,7 +119,8 @@ class InterfaceToSolver:
             self.variables[variable_id] = self.mip_model.add_var(lb=lower_bound, ub=upper_bound,
                                                                  var_type=variable_types[variable_type],
                                                                  name=str(variable_id))
-
+            if self.single_model:
+                continue
             self.linear_mip_variables[variable_id] = self.linear_mip_model.add_var(lb=lower_bound, ub=upper_bound,
                                                                                    var_type=variable_types[
                                                                                        variable_type],
@@ -168,11 +206,11 @@ class InterfaceToSolver:
 
         """
         objective_function = objective_function.sort_values('variable_id')
-        objective_function = objective_function.set_index('variable_id')
-        obj = minimize(xsum(objective_function['cost'][i] * self.variables[i] for i in
-                            list(objective_function.index)))
+        variables = _variables_by_id(self.variables)[objective_function['variable_id'].to_numpy()]
+        obj = minimize(LinExpr(variables.tolist(), objective_function['cost'].tolist()))
         self.mip_model.objective = obj
-        self.linear_mip_model.objective = obj
+        if not self.single_model:
+            self.linear_mip_model.objective = obj
 
     def add_constraints(self, constraints_lhs, constraints_type_and_rhs):
         """Add constraints to the mip model.
@@ -210,44 +248,21 @@ class InterfaceToSolver:
 
         """
 
-        constraints_lhs = constraints_lhs.groupby(['constraint_id', 'variable_id'], as_index=False).agg(
-            {'coefficient': 'sum'})
-        rows = constraints_lhs.groupby(['constraint_id'], as_index=False)
-
-        # Make a dictionary so constraint rhs values can be accessed using the constraint id.
-        rhs = dict(zip(constraints_type_and_rhs['constraint_id'], constraints_type_and_rhs['rhs']))
-        # Make a dictionary so constraint type can be accessed using the constraint id.
-        enq_type = dict(zip(constraints_type_and_rhs['constraint_id'], constraints_type_and_rhs['type']))
-        var_ids = constraints_lhs['variable_id'].to_numpy()
-        vars = np.asarray(
-            [self.variables[k] if k in self.variables.keys() else None for k in range(0, max(var_ids) + 1)])
-        coefficients = constraints_lhs['coefficient'].to_numpy()
-        for row_id, row in rows.indices.items():
-            # Use the variable_ids to get mip variable objects present in the constraints
-            lhs_variables = vars[var_ids[row]]
-            # Use the positions of the non nan values to the lhs coefficients.
-            lhs = coefficients[row]
-            # Multiply and the variables by their coefficients and sum to create the lhs of the constraint.
-            exp = lhs_variables * lhs
-            exp = exp.tolist()
-            exp = xsum(exp)
-            # Add based on inequality type.
-            if enq_type[row_id] == '<=':
-                new_constraint = exp <= rhs[row_id]
-            elif enq_type[row_id] == '>=':
-                new_constraint = exp >= rhs[row_id]
-            elif enq_type[row_id] == '=':
-                new_constraint = exp == rhs[row_id]
-            else:
-                raise ValueError("Constraint type not recognised should be one of '<=', '>=' or '='.")
-            self.mip_model.add_constr(new_constraint, name=str(row_id))
-            self.linear_mip_model.add_constr(new_constraint, name=str(row_id))
+        self._add_constraint_matrix(create_constraint_matrix(constraints_lhs, constraints_type_and_rhs))
+
+    def _add_constraint_matrix(self, matrix):
+        self._added_matrices.append(matrix)
+        self._constraint_rows = _record_positions(self._constraint_rows, matrix.constraint_ids,
+                                                  self.mip_model.num_rows)
+        _add_rows(self.mip_model, _variables_by_id(self.variables), matrix)
+        if not self.single_model:
+            _add_rows(self.linear_mip_model, _variables_by_id(self.linear_mip_variables), matrix)
 
     def optimize(self):
         """Optimize the mip model.
 
-        If an optimal solution cannot be found and the investigate_infeasibility flag is set to True then remove
-        constraints until a feasible solution is found.
+        If an optimal solution cannot be found then a small set of conflicting constraints is found with
+        find_conflicting_constraints and an InfeasibleModelError is raised.
 
         Examples
         --------
@@ -287,13 +302,127 @@ class InterfaceToSolver:
         4            4          0.0          5.0  continuous    5.0
         5            5          0.0          5.0  continuous    0.0
         """
+        self._solutions = {}
         status = self.mip_model.optimize()
         if status != OptimizationStatus.OPTIMAL:
-            # Attempt find constraint causing infeasibility.
-            print('Model infeasible attempting to find problem constraint.')
-            con_index = find_problem_constraint(self.mip_model)
-            print('Couldn\'t find an optimal solution, but removing con {} fixed INFEASIBLITY'.format(con_index))
-            raise ValueError('Linear program infeasible')
+            raise InfeasibleModelError(find_conflicting_constraints(*self._model_as_arrays(),
+                                                                    solver_name=self.solver_name))
+
+    def optimize_relaxation(self):
+        """Optimize the linear relaxation of the mip model, ignoring integrality and special ordered sets.
+
+        The solution is read in the same way as that of optimize, so if it happens to meet the special ordered set
+        conditions it can be used in place of the mip solution.
+
+        Examples
+        --------
+        >>> decision_variables = pd.DataFrame({
+        ...   'variable_id': [0, 1, 2],
+        ...   'lower_bound': [0.0, 0.0, 0.0],
+        ...   'upper_bound': [1.0, 1.0, 1.0],
+        ...   'type': ['continuous', 'continuous', 'continuous']})
+
+        >>> objective_function = pd.DataFrame({
+        ...   'variable_id': [0, 1, 2],
+        ...   'cost': [0.0, 5.0, 0.0]})
+
+        >>> constraints_lhs = pd.DataFrame({
+        ...   'constraint_id': [1, 1, 1, 2, 2],
+        ...   'variable_id': [0, 1, 2, 1, 2],
+        ...   'coefficient': [1.0, 1.0, 1.0, 1.0, 2.0]})
+
+        >>> constraints_type_and_rhs = pd.DataFrame({
+        ...   'constraint_id': [1, 2],
+        ...   'type': ['=', '='],
+        ...   'rhs': [1.0, 1.0]})
+
+        >>> sos_variables = pd.DataFrame({
+        ...   'variable_id': [0, 1, 2],
+        ...   'sos_id': ['A', 'A', 'A'],
+        ...   'position': [0, 1, 2]})
+
+        >>> si = InterfaceToSolver()
+
+        >>> si.add_variables(decision_variables)
+
+        >>> si.add_objective_function(objective_function)
+
+        >>> si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+        >>> si.add_sos_type_2(sos_variables, 'sos_id', 'position')
+
+        >>> si.optimize_relaxation()
+        True
+
+        The relaxation uses the first and last variables, which the special ordered set wouldn't allow.
+
+        >>> si.get_optimal_values_of_decision_variables(decision_variables)
+        0    0.5
+        1    0.0
+        2    0.5
+        dtype: float64
+
+        Returns
+        -------
+        bool
+            True if an optimal solution to the relaxation was found.
+        """
+        self._solutions = {}
+        return self.mip_model.optimize(relax=True) == OptimizationStatus.OPTIMAL
+
+    def optimize_linear_model(self):
+        """Optimize the linear model used for pricing.
+
+        If the interface was created with single_model=True then the linear relaxation of mip_model is solved in place,
+        i.e. integrality and special ordered set constraints are ignored. Otherwise, the separately built
+        linear_mip_model is solved.
+
+        Examples
+        --------
+        >>> decision_variables = pd.DataFrame({
+        ...   'variable_id': [0, 1, 2],
+        ...   'lower_bound': [0.0, 0.0, 0.0],
+        ...   'upper_bound': [5.0, 5.0, 10.0],
+        ...   'type': ['continuous', 'continuous', 'continuous']})
+
+        >>> objective_function = pd.DataFrame({
+        ...   'variable_id': [0, 1, 2],
+        ...   'cost': [1.0, 3.0, 10.0]})
+
+        >>> constraints_lhs = pd.DataFrame({
+        ...   'constraint_id': [1, 1, 1],
+        ...   'variable_id': [0, 1, 2],
+        ...   'coefficient': [1.0, 1.0, 1.0]})
+
+        >>> constraints_type_and_rhs = pd.DataFrame({
+        ...   'constraint_id': [1],
+        ...   'type': ['='],
+        ...   'rhs': [8.0]})
+
+        >>> si = InterfaceToSolver(single_model=True)
+
+        >>> si.add_variables(decision_variables)
+
+        >>> si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+        >>> si.add_objective_function(objective_function)
+
+        >>> si.optimize()
+
+        >>> si.optimize_linear_model()
+        <OptimizationStatus.OPTIMAL: 0>
+
+        >>> si.price_constraints([1])
+        {1: 3.0}
+
+        Returns
+        -------
+        mip.OptimizationStatus
+        """
+        self._solutions = {}
+        if self.single_model:
+            return self.mip_model.optimize(relax=True)
+        return self.linear_mip_model.optimize()
 
     def get_optimal_values_of_decision_variables(self, variable_definitions):
         """Get the optimal values for each decision variable.
@@ -338,12 +467,12 @@ class InterfaceToSolver:
         5            5          0.0          5.0  continuous    0.0
 
         """
-        values = variable_definitions['variable_id'].apply(lambda x: self.mip_model.var_by_name(str(x)).x)
-        return values
+        columns = _positions_of(self._variable_columns, variable_definitions['variable_id'], 'variable_id')
+        return pd.Series(self._solution(self.mip_model, 'x')[columns], index=variable_definitions.index)
 
     def get_optimal_values_of_decision_variables_lin(self, variable_definitions):
-        values = variable_definitions['variable_id'].apply(lambda x: self.linear_mip_model.var_by_name(str(x)).x)
-        return values
+        columns = _positions_of(self._variable_columns, variable_definitions['variable_id'], 'variable_id')
+        return pd.Series(self._solution(self.linear_mip_model, 'x')[columns], index=variable_definitions.index)
 
     def get_slack_in_constraints(self, constraints_type_and_rhs):
         """Get the slack values in each constraint.
@@ -384,9 +513,14 @@ class InterfaceToSolver:
         1              2    =  20.0    0.0
 
         """
-        slack = constraints_type_and_rhs['constraint_id'].apply(
-            lambda x: getattr(self.mip_model.constr_by_name(str(x)), "slack", 0.0))
-        return slack
+        constraint_ids = constraints_type_and_rhs['constraint_id'].to_numpy(dtype=np.int64)
+        rows = np.full(len(constraint_ids), -1, dtype=np.int64)
+        in_range = (constraint_ids >= 0) & (constraint_ids < len(self._constraint_rows))
+        rows[in_range] = self._constraint_rows[constraint_ids[in_range]]
+        # Constraints not in the model, e.g. those with no lhs terms, have no slack reported.
+        slack = np.zeros(len(constraint_ids))
+        slack[rows >= 0] = self._solution(self.mip_model, 'slack')[rows[rows >= 0]]
+        return pd.Series(slack, index=constraints_type_and_rhs.index)
 
     def price_constraints(self, constraint_ids_to_price):
         """For each constraint_id find the marginal value of the constraint.
@@ -448,37 +582,849 @@ class InterfaceToSolver:
         5            5          0.0          5.0  continuous    0.0
 
         """
-        costs = {}
-        for id in constraint_ids_to_price:
-            costs[id] = self.linear_mip_model.constr_by_name(str(id)).pi
-        return costs
+        constraint_ids_to_price = list(constraint_ids_to_price)
+        rows = _positions_of(self._constraint_rows, constraint_ids_to_price, 'constraint_id')
+        prices = self._solution(self.linear_mip_model, 'pi')[rows]
+        return dict(zip(constraint_ids_to_price, prices.tolist()))
 
     def update_rhs(self, constraint_id, violation_degree):
-        constraint = self.linear_mip_model.constr_by_name(str(constraint_id))
-        constraint.rhs += violation_degree
+        self.update_rhs_of_constraints([constraint_id], [violation_degree])
+
+    def update_rhs_of_constraints(self, constraint_ids, violation_degrees):
+        """Add violation_degrees to the rhs of constraints in the linear model, in bulk.
+
+        If a constraint_id is repeated, then the sum of its violation degrees is added.
+
+        Examples
+        --------
+        >>> decision_variables = pd.DataFrame({
+        ...   'variable_id': [0, 1],
+        ...   'lower_bound': [0.0, 0.0],
+        ...   'upper_bound': [10.0, 10.0],
+        ...   'type': ['continuous', 'continuous']})
+
+        >>> constraints_lhs = pd.DataFrame({
+        ...   'constraint_id': [1, 2],
+        ...   'variable_id': [0, 1],
+        ...   'coefficient': [1.0, 1.0]})
+
+        >>> constraints_type_and_rhs = pd.DataFrame({
+        ...   'constraint_id': [1, 2],
+        ...   'type': ['=', '='],
+        ...   'rhs': [5.0, 5.0]})
+
+        >>> si = InterfaceToSolver(single_model=True)
+
+        >>> si.add_variables(decision_variables)
+
+        >>> si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+        >>> si.update_rhs_of_constraints([1, 2, 2], [1.0, 2.0, -0.5])
+
+        >>> si.optimize_linear_model()
+        <OptimizationStatus.OPTIMAL: 0>
+
+        >>> si.get_optimal_values_of_decision_variables_lin(decision_variables)
+        0    6.0
+        1    6.5
+        dtype: float64
+
+        Parameters
+        ----------
+        constraint_ids : list-like of int
+
+        violation_degrees : list-like of float
+        """
+        constraint_ids, violation_degrees = _sum_by_id(constraint_ids, violation_degrees)
+        rows = _positions_of(self._constraint_rows, constraint_ids, 'constraint_id')
+        constraints = self.linear_mip_model.constrs
+        for row, violation_degree in zip(rows.tolist(), violation_degrees.tolist()):
+            constraints[row].rhs += violation_degree
 
     def update_variable_bounds(self, new_bounds):
         for variable_id, lb, ub in zip(new_bounds['variable_id'], new_bounds['lower_bound'], new_bounds['upper_bound']):
-            self.mip_model.var_by_name(str(variable_id)).lb = lb
-            self.mip_model.var_by_name(str(variable_id)).ub = ub
+            self.variables[variable_id].lb = lb
+            self.variables[variable_id].ub = ub
 
     def disable_variables(self, variables):
-        for var_id in variables['variable_id']:
-            var = self.linear_mip_model.var_by_name(str(var_id))
+        variable_ids = variables['variable_id'].to_numpy(dtype=np.int64)
+        for var in _variables_by_id(self.linear_mip_variables)[variable_ids].tolist():
             var.lb = 0.0
             var.ub = 0.0
 
+    def _model_as_arrays(self):
+        """The variables and constraint matrix added to the model, as used by find_conflicting_constraints."""
+        return pd.concat(self._added_variables), _concatenate_matrices(self._added_matrices)
+
+    def _solution(self, model, attribute):
+        """Read a solution vector, 'x', 'slack' or 'pi', from the solver once per solve, ordered by position."""
+        key = (id(model), attribute)
+        if key not in self._solutions:
+            items = model.vars if attribute == 'x' else model.constrs
+            # Values the solver doesn't provide, e.g. duals of a mip, come back as None and are stored as nan.
+            self._solutions[key] = np.array([getattr(item, attribute) for item in items], dtype=np.float64)
+        return self._solutions[key]
+
+
+# The solvers PersistentInterfaceToSolver can be used with, those accessed through mip.
+_persistent_solvers = ['CBC', 'GUROBI']
+
+
+class PersistentInterfaceToSolver(InterfaceToSolver):
+    """A solver interface that keeps its mip model alive between dispatch runs.
+
+    Models passed to the interface are staged, and when optimize is called the staged model is compared with the
+    model already loaded into the solver. Only the differences are applied: changed variable bounds, types and
+    objective coefficients, changed rhs values, and constraints that have been added, removed or had their lhs
+    changed. If the special ordered sets differ from the loaded model, the model is rebuilt from scratch, as mip
+    can't remove them. Variables that are no longer used are fixed at zero rather than removed. With Gurobi the
+    previous mip solution is also given to the solver as a starting point, other solvers, such as CBC, solve the
+    updated model without a starting solution, so for them the saving is in building the model only.
+
+    The comparison is made by variable_id and constraint_id, so models built with the same sequence of SpotMarket
+    methods, and therefore with the same ids, get the most benefit. The interface always runs in single model mode.
+
+    Examples
+    --------
+
+    >>> decision_variables = pd.DataFrame({
+    ...   'variable_id': [0, 1],
+    ...   'lower_bound': [0.0, 0.0],
+    ...   'upper_bound': [5.0, 5.0],
+    ...   'type': ['continuous', 'continuous']})
+
+    >>> objective_function = pd.DataFrame({
+    ...   'variable_id': [0, 1],
+    ...   'cost': [1.0, 3.0]})
+
+    >>> constraints_lhs = pd.DataFrame({
+    ...   'constraint_id': [1, 1],
+    ...   'variable_id': [0, 1],
+    ...   'coefficient': [1.0, 1.0]})
+
+    >>> constraints_type_and_rhs = pd.DataFrame({
+    ...   'constraint_id': [1],
+    ...   'type': ['='],
+    ...   'rhs': [8.0]})
+
+    >>> si = PersistentInterfaceToSolver()
+
+    >>> si.begin_update()
+
+    >>> si.add_variables(decision_variables)
+
+    >>> si.add_objective_function(objective_function)
+
+    >>> si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+    >>> si.optimize()
+
+    >>> si.last_update_was_rebuild
+    True
+
+    The next run only changes the rhs of the constraint, so the loaded model is updated rather than rebuilt.
+
+    >>> constraints_type_and_rhs['rhs'] = 6.0
+
+    >>> si.begin_update()
+
+    >>> si.add_variables(decision_variables)
+
+    >>> si.add_objective_function(objective_function)
+
+    >>> si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+
+    >>> si.optimize()
+
+    >>> si.last_update_was_rebuild
+    False
+
+    >>> si.get_optimal_values_of_decision_variables(decision_variables)
+    0    5.0
+    1    1.0
+    dtype: float64
+
+    Parameters
+    ----------
+    solver_name : str
+        Either 'CBC' or 'GUROBI'.
+
+    warm_start : bool
+        Give Gurobi the previous solution as a mip start, ignored for other solvers. Default True.
+
+    Attributes
+    ----------
+    last_update_was_rebuild : bool
+        If the model was rebuilt from scratch, rather than updated, the last time optimize was called.
+    """
+
+    def __init__(self, solver_name='CBC', warm_start=True):
+        if solver_name not in _persistent_solvers:
+            raise ValueError("A persistent solver interface is only available for the solvers {}, not '{}'.".format(
+                _persistent_solvers, solver_name))
+        super().__init__(solver_name, single_model=True)
+        self.warm_start = warm_start
+        self.last_update_was_rebuild = False
+        self._loaded = None
+        self._staged = None
+        self._mip_solution = None
+        self.begin_update()
+
+    def begin_update(self):
+        """Start staging a new model, discarding anything staged since the last call to optimize."""
+        self._staged = {'variables': [], 'objective_function': [], 'constraints': [], 'sos': []}
+
+    def add_variables(self, decision_variables):
+        self._staged['variables'].append(decision_variables.loc[:, ['variable_id', 'lower_bound', 'upper_bound',
+                                                                    'type']])
+
+    def add_objective_function(self, objective_function):
+        self._staged['objective_function'].append(objective_function.loc[:, ['variable_id', 'cost']])
+
+    def add_constraints(self, constraints_lhs, constraints_type_and_rhs):
+        self._staged['constraints'].append((constraints_lhs, constraints_type_and_rhs))
+
+    def add_sos_type_2(self, sos_variables, sos_id_columns, position_column):
+        sets = sos_variables.groupby(sos_id_columns)
+        key = sorted(tuple(zip(sos_set['variable_id'], sos_set[position_column])) for _, sos_set in sets)
+        self._staged['sos'].append((2, key, (sos_variables, sos_id_columns, position_column)))
+
+    def add_sos_type_1(self, sos_variables):
+        key = sorted(tuple(sos_set['variable_id']) for _, sos_set in sos_variables.groupby('sos_id'))
+        self._staged['sos'].append((1, key, (sos_variables,)))
+
+    def optimize(self):
+        self._load_staged()
+        super().optimize()
+        self._mip_solution = self._solution(self.mip_model, 'x').copy()
+
+    def optimize_relaxation(self):
+        self._load_staged()
+        return super().optimize_relaxation()
+
+    def update_rhs_of_constraints(self, constraint_ids, violation_degrees):
+        super().update_rhs_of_constraints(constraint_ids, violation_degrees)
+        np.add.at(self._loaded['rhs'], np.asarray(constraint_ids, dtype=np.int64),
+                  np.asarray(violation_degrees, dtype=np.float64))
+
+    def update_variable_bounds(self, new_bounds):
+        super().update_variable_bounds(new_bounds)
+        variable_ids = new_bounds['variable_id'].to_numpy(dtype=np.int64)
+        self._loaded['lower_bound'][variable_ids] = new_bounds['lower_bound'].to_numpy(dtype=np.float64)
+        self._loaded['upper_bound'][variable_ids] = new_bounds['upper_bound'].to_numpy(dtype=np.float64)
+
+    def disable_variables(self, variables):
+        super().disable_variables(variables)
+        variable_ids = variables['variable_id'].to_numpy(dtype=np.int64)
+        self._loaded['lower_bound'][variable_ids] = 0.0
+        self._loaded['upper_bound'][variable_ids] = 0.0
+
+    def _solution(self, model, attribute):
+        # CBC doesn't report slack when a mip is re-solved, so slack is calculated from the loaded constraints instead.
+        if attribute != 'slack':
+            return super()._solution(model, attribute)
+        key = (id(model), attribute)
+        if key not in self._solutions:
+            matrix = self._loaded['matrix']
+            x = super()._solution(model, 'x')
+            terms = matrix.coefficients * x[self._variable_columns[matrix.variable_ids]]
+            activity = np.add.reduceat(terms, matrix.row_starts[:-1]) if len(terms) > 0 else np.zeros(0)
+            slack = self._loaded['rhs'][matrix.constraint_ids] - activity
+            slack[matrix.types == '>='] *= -1
+            self._solutions[key] = np.zeros(model.num_rows)
+            self._solutions[key][self._constraint_rows[matrix.constraint_ids]] = slack
+        return self._solutions[key]
+
+    def _model_as_arrays(self):
+        matrix = self._loaded['matrix']
+        matrix = ConstraintMatrix(constraint_ids=matrix.constraint_ids, row_starts=matrix.row_starts,
+                                  variable_ids=matrix.variable_ids, coefficients=matrix.coefficients,
+                                  types=matrix.types, rhs=self._loaded['rhs'][matrix.constraint_ids])
+        return self._loaded['variables'], matrix
+
+    def _load_staged(self):
+        """Bring the model loaded into the solver in line with the staged model, if a model has been staged."""
+        if not self._staged['variables']:
+            return
+        staged = self._stage_as_arrays()
+        sos_key = [(sos_type, key) for sos_type, key, _ in self._staged['sos']]
+        if self._loaded is None or self._loaded['sos'] != sos_key:
+            self._rebuild(staged)
+            self.last_update_was_rebuild = True
+        else:
+            self._update(staged)
+            self.last_update_was_rebuild = False
+        self._loaded['sos'] = sos_key
+        self.begin_update()
+
+    def _stage_as_arrays(self):
+        """Combine the staged model components into arrays indexed by variable_id and constraint_id."""
+        variables = pd.concat(self._staged['variables'])
+        if self._staged['objective_function']:
+            objective_function = pd.concat(self._staged['objective_function'])
+            objective_function = objective_function.groupby('variable_id', as_index=False)['cost'].sum()
+        else:
+            objective_function = pd.DataFrame({'variable_id': [], 'cost': []})
+        if self._staged['constraints']:
+            constraints_lhs, constraints_type_and_rhs = zip(*self._staged['constraints'])
+            matrix = create_constraint_matrix(pd.concat(constraints_lhs), pd.concat(constraints_type_and_rhs))
+        else:
+            matrix = create_constraint_matrix(pd.DataFrame({'constraint_id': [], 'variable_id': [], 'coefficient': []}),
+                                              pd.DataFrame({'constraint_id': [], 'type': [], 'rhs': []}))
+
+        variable_ids = variables['variable_id'].to_numpy(dtype=np.int64)
+        size = max(variable_ids.max(initial=-1), len(self._variable_columns) - 1) + 1
+        staged = {'variables': variables, 'matrix': matrix}
+        for name, column in [('lower_bound', 'lower_bound'), ('upper_bound', 'upper_bound')]:
+            staged[name] = np.zeros(size)
+            staged[name][variable_ids] = variables[column].to_numpy(dtype=np.float64)
+        staged['type'] = np.full(size, '', dtype=object)
+        staged['type'][variable_ids] = variables['type'].to_numpy()
+        staged['cost'] = np.zeros(size)
+        staged['cost'][objective_function['variable_id'].to_numpy(dtype=np.int64)] = \
+            objective_function['cost'].to_numpy(dtype=np.float64)
+        staged['rhs'] = np.zeros(matrix.constraint_ids.max(initial=-1) + 1)
+        staged['rhs'][matrix.constraint_ids] = matrix.rhs
+        return staged
+
+    def _rebuild(self, staged):
+        InterfaceToSolver.__init__(self, self.solver_name, single_model=True)
+        InterfaceToSolver.add_variables(self, staged['variables'])
+        objective_function = pd.DataFrame({'variable_id': np.flatnonzero(staged['cost']),
+                                           'cost': staged['cost'][staged['cost'] != 0.0]})
+        InterfaceToSolver.add_objective_function(self, objective_function)
+        self._add_constraint_matrix(staged['matrix'])
+        for sos_type, _, arguments in self._staged['sos']:
+            if sos_type == 2:
+                InterfaceToSolver.add_sos_type_2(self, *arguments)
+            else:
+                InterfaceToSolver.add_sos_type_1(self, *arguments)
+        self._loaded = staged
+        self._mip_solution = None
+
+    def _update(self, staged):
+        loaded = self._loaded
+
+        # Add columns for new variable ids, then bring the rest of the variables in line with the staged model.
+        # Variables not in the staged model have zero bounds and costs, fixing any that are no longer used at zero.
+        variables = staged['variables']
+        new_variables = variables[_positions_or_missing(self._variable_columns, variables['variable_id']) < 0]
+        InterfaceToSolver.add_variables(self, new_variables)
+        variable_ids = np.flatnonzero(_positions_or_missing(self._variable_columns,
+                                                            np.arange(len(staged['cost']))) >= 0)
+        variable_types = {'continuous': CONTINUOUS, 'binary': BINARY, '': CONTINUOUS}
+        mip_variables = self.mip_model.vars
+        columns = self._variable_columns
+        for name, attribute in [('lower_bound', 'lb'), ('upper_bound', 'ub'), ('cost', 'obj')]:
+            previous = _resize(loaded[name], len(staged[name]), np.nan)
+            for variable_id in variable_ids[previous[variable_ids] != staged[name][variable_ids]].tolist():
+                setattr(mip_variables[int(columns[variable_id])], attribute, staged[name][variable_id])
+        previous = _resize(loaded['type'], len(staged['type']), '')
+        for variable_id in variable_ids[previous[variable_ids] != staged['type'][variable_ids]].tolist():
+            mip_variables[int(columns[variable_id])].var_type = variable_types[staged['type'][variable_id]]
+
+        # Replace constraints that are no longer in the model or that have a different lhs or type.
+        new_matrix, old_matrix = staged['matrix'], loaded['matrix']
+        changed = _changed_constraint_ids(old_matrix, new_matrix)
+        removed = np.setdiff1d(old_matrix.constraint_ids, new_matrix.constraint_ids)
+        to_remove = np.union1d(np.intersect1d(changed, old_matrix.constraint_ids), removed)
+        if len(to_remove) > 0:
+            rows = np.sort(self._constraint_rows[to_remove])
+            mip_constraints = self.mip_model.constrs
+            self.mip_model.remove([mip_constraints[int(row)] for row in rows])
+            self._constraint_rows[to_remove] = -1
+            in_model = self._constraint_rows >= 0
+            self._constraint_rows[in_model] -= np.searchsorted(rows, self._constraint_rows[in_model])
+        to_add = np.isin(new_matrix.constraint_ids, np.union1d(changed, np.setdiff1d(new_matrix.constraint_ids,
+                                                                                  old_matrix.constraint_ids)))
+        self._add_constraint_matrix(_select_rows(new_matrix, to_add))
+
+        # Update the rhs of the constraints that were kept.
+        kept = new_matrix.constraint_ids[~to_add]
+        previous = _resize(loaded['rhs'], len(staged['rhs']), np.nan)
+        mip_constraints = self.mip_model.constrs
+        for constraint_id in kept[previous[kept] != staged['rhs'][kept]].tolist():
+            mip_constraints[int(self._constraint_rows[constraint_id])].rhs = staged['rhs'][constraint_id]
+        self._loaded = staged
+        self._set_warm_start()
+
+    def _set_warm_start(self):
+        """Give Gurobi the values of the variables in the last mip solution as a starting point. CBC isn't given a
+        start, as it can crash completing a mip start on a modified model."""
+        if self.solver_name != 'GUROBI' or not self.warm_start or self._mip_solution is None:
+            return
+        mip_variables = self.mip_model.vars
+        start = [(mip_variables[column], value) for column, value in enumerate(self._mip_solution.tolist())
+                 if value != 0.0 and not np.isnan(value)]
+        self.mip_model.start = start if start else None
+
+
+def _highs_interface(solver_name, single_model):
+    # highspy is an optional dependency, so it is only imported when the HiGHS backend is used.
+    from nempy.spot_market_backend.highs_interface import HighsInterfaceToSolver
+    return HighsInterfaceToSolver(solver_name, single_model=single_model)
+
+
+_solver_backends = {'CBC': InterfaceToSolver, 'GUROBI': InterfaceToSolver, 'HIGHS': _highs_interface}
+
+
+def register_solver_backend(solver_name, create_interface):
+    """Make a solver backend available under solver_name.
+
+    A backend is a callable that takes solver_name and the keyword argument single_model, and returns an object with
+    the same methods as InterfaceToSolver, i.e. add_variables, add_constraints, add_objective_function,
+    add_sos_type_1, add_sos_type_2, optimize, optimize_relaxation, optimize_linear_model,
+    get_optimal_values_of_decision_variables, get_optimal_values_of_decision_variables_lin, get_slack_in_constraints,
+    price_constraints, update_rhs, update_rhs_of_constraints, update_variable_bounds, disable_variables, and the
+    attribute objective_value.
+
+    Examples
+    --------
+
+    >>> register_solver_backend('CBC_COPY', InterfaceToSolver)
+
+    >>> 'CBC_COPY' in solver_backends()
+    True
+
+    Remove the example backend from the registry again.
+
+    >>> del _solver_backends['CBC_COPY']
+
+    Parameters
+    ----------
+    solver_name : str
+        The name used to select the backend, e.g. SpotMarket.solver_name.
+
+    create_interface : callable
+    """
+    _solver_backends[solver_name] = create_interface
+
+
+def solver_backends():
+    """The names of the registered solver backends.
+
+    Examples
+    --------
+
+    >>> solver_backends()
+    ['CBC', 'GUROBI', 'HIGHS']
+
+    Returns
+    -------
+    list[str]
+    """
+    return list(_solver_backends.keys())
+
+
+def create_solver_interface(solver_name='CBC', single_model=False):
+    """Create an interface to the solver backend registered under solver_name.
+
+    Examples
+    --------
+
+    >>> si = create_solver_interface('CBC')
+
+    >>> type(si).__name__
+    'InterfaceToSolver'
+
+    >>> create_solver_interface('NOT_A_SOLVER')
+    Traceback (most recent call last):
+    ...
+    ValueError: Solver 'NOT_A_SOLVER' not recognised, should be one of ['CBC', 'GUROBI', 'HIGHS'].
+
+    Parameters
+    ----------
+    solver_name : str
+        One of the names returned by solver_backends, 'CBC', 'GUROBI' and 'HIGHS' are available by default.
+
+    single_model : bool
+        Passed on to the backend, see InterfaceToSolver.
+
+    Returns
+    -------
+    InterfaceToSolver or an interface with the same methods.
+
+    Raises
+    ------
+        ValueError
+            If no backend is registered under solver_name.
+    """
+    if solver_name not in _solver_backends:
+        raise ValueError("Solver '{}' not recognised, should be one of {}.".format(solver_name, solver_backends()))
+    return _solver_backends[solver_name](solver_name, single_model=single_model)
+
+
+class ConstraintMatrix:
+    """The constraints of a model in compressed sparse row (CSR) format.
+
+    Row i of the matrix is the constraint constraint_ids[i], its lhs terms are stored in positions
+    row_starts[i] to row_starts[i + 1] of variable_ids and coefficients.
+
+    Attributes
+    ----------
+    constraint_ids : np.ndarray
+        The constraint id of each row, in ascending order.
+    row_starts : np.ndarray
+        The position of the first lhs term of each row, with a final entry equal to the number of lhs terms.
+    variable_ids : np.ndarray
+        The variable id of each lhs term.
+    coefficients : np.ndarray
+        The coefficient of each lhs term.
+    types : np.ndarray
+        The type of each constraint, i.e. '<=', '>=' or '='.
+    rhs : np.ndarray
+        The rhs value of each constraint.
+    """
+
+    def __init__(self, constraint_ids, row_starts, variable_ids, coefficients, types, rhs):
+        self.constraint_ids = constraint_ids
+        self.row_starts = row_starts
+        self.variable_ids = variable_ids
+        self.coefficients = coefficients
+        self.types = types
+        self.rhs = rhs
+
+    def __len__(self):
+        return len(self.constraint_ids)
+
+
+def create_constraint_matrix(constraints_lhs, constraints_type_and_rhs):
+    """Assemble the lhs, type and rhs definitions of constraints into compressed sparse row arrays.
+
+    Repeated lhs terms, i.e. terms with the same constraint_id and variable_id, are summed. Only constraints with at
+    least one lhs term are included in the matrix.
+
+    Examples
+    --------
+
+    >>> constraints_lhs = pd.DataFrame({
+    ...   'constraint_id': [2, 1, 1, 2, 2],
+    ...   'variable_id': [3, 0, 1, 4, 3],
+    ...   'coefficient': [1.0, 1.0, 0.5, 2.0, 1.0]})
+
+    >>> constraints_type_and_rhs = pd.DataFrame({
+    ...   'constraint_id': [1, 2],
+    ...   'type': ['<=', '='],
+    ...   'rhs': [10.0, 20.0]})
+
+    >>> matrix = create_constraint_matrix(constraints_lhs, constraints_type_and_rhs)
+
+    >>> matrix.constraint_ids
+    array([1, 2])
+
+    >>> matrix.row_starts
+    array([0, 2, 4])
+
+    >>> matrix.variable_ids
+    array([0, 1, 3, 4])
+
+    >>> matrix.coefficients
+    array([1. , 0.5, 2. , 2. ])
+
+    >>> matrix.types
+    array(['<=', '='], dtype=object)
+
+    >>> matrix.rhs
+    array([10., 20.])
+
+    Parameters
+    ----------
+    constraints_lhs : pd.DataFrame
+
+        =============  ===============================================================
+        Columns:       Description:
+        constraint_id  the unique identifier of the constraint (as `np.int64`)
+        variable_id    the unique identifier of the variable (as `np.int64`)
+        coefficient    the lhs coefficient (as `np.float64`)
+        =============  ===============================================================
+
+    constraints_type_and_rhs : pd.DataFrame
+
+        =============  ===============================================================
+        Columns:       Description:
+        constraint_id  the unique identifier of the constraint (as `np.int64`)
+        type           the type of the constraint, i.e. '<=', '>=' or '=' (as `str`)
+        rhs            the rhs of the constraint (as `np.float64`)
+        =============  ===============================================================
+
+    Returns
+    -------
+    ConstraintMatrix
+
+    Raises
+    ------
+    ValueError
+        If a constraint type is not one of '<=', '>=' or '=', or if a constraint with lhs terms has no type and rhs
+        definition.
+    """
+    if constraints_lhs.empty:
+        constraints_lhs = pd.DataFrame({'constraint_id': np.array([], dtype=np.int64),
+                                        'variable_id': np.array([], dtype=np.int64),
+                                        'coefficient': np.array([], dtype=np.float64)})
+    constraints_lhs = constraints_lhs.groupby(['constraint_id', 'variable_id'], as_index=False).agg(
+        {'coefficient': 'sum'})
+    term_constraint_ids = constraints_lhs['constraint_id'].to_numpy(dtype=np.int64)
+    constraint_ids, row_starts = np.unique(term_constraint_ids, return_index=True)
+    row_starts = np.append(row_starts, len(term_constraint_ids))
+
+    # Where a constraint is defined more than once the last definition is used.
+    constraints_type_and_rhs = constraints_type_and_rhs.drop_duplicates('constraint_id', keep='last')
+    positions = pd.Index(constraints_type_and_rhs['constraint_id']).get_indexer(constraint_ids)
+    if (positions < 0).any():
+        raise ValueError("Constraints {} have lhs terms but no type and rhs.".format(
+            list(constraint_ids[positions < 0])))
+    types = constraints_type_and_rhs['type'].to_numpy(dtype=object)[positions]
+    if not np.isin(types, ['<=', '>=', '=']).all():
+        raise ValueError("Constraint type not recognised should be one of '<=', '>=' or '='.")
+    rhs = constraints_type_and_rhs['rhs'].to_numpy(dtype=np.float64)[positions]
+
+    return ConstraintMatrix(constraint_ids=constraint_ids, row_starts=row_starts,
+                            variable_ids=constraints_lhs['variable_id'].to_numpy(dtype=np.int64),
+                            coefficients=constraints_lhs['coefficient'].to_numpy(dtype=np.float64),
+                            types=types, rhs=rhs)
+
+
+def _concatenate_matrices(matrices):
+    """Stack ConstraintMatrix objects into a single ConstraintMatrix, rows are not re-sorted by constraint_id."""
+    if not matrices:
+        return create_constraint_matrix(pd.DataFrame({'constraint_id': [], 'variable_id': [], 'coefficient': []}),
+                                        pd.DataFrame({'constraint_id': [], 'type': [], 'rhs': []}))
+    row_starts = [matrices[0].row_starts[:1]]
+    offset = 0
+    for matrix in matrices:
+        row_starts.append(matrix.row_starts[1:] + offset)
+        offset += matrix.row_starts[-1]
+    return ConstraintMatrix(constraint_ids=np.concatenate([matrix.constraint_ids for matrix in matrices]),
+                            row_starts=np.concatenate(row_starts),
+                            variable_ids=np.concatenate([matrix.variable_ids for matrix in matrices]),
+                            coefficients=np.concatenate([matrix.coefficients for matrix in matrices]),
+                            types=np.concatenate([matrix.types for matrix in matrices]),
+                            rhs=np.concatenate([matrix.rhs for matrix in matrices]))
+
+
+def _variables_by_id(variables):
+    """Put a dict of mip variables into an array so they can be looked up by variable id in bulk."""
+    by_id = np.empty(max(variables.keys(), default=-1) + 1, dtype=object)
+    by_id[list(variables.keys())] = list(variables.values())
+    return by_id
+
+
+def _record_positions(positions, ids, first_position):
+    """Record that ids were added to a model in order, starting at first_position, growing the id index as needed."""
+    ids = np.asarray(ids, dtype=np.int64)
+    if len(ids) == 0:
+        return positions
+    size = max(len(positions), ids.max() + 1)
+    if size > len(positions):
+        positions = np.concatenate([positions, np.full(size - len(positions), -1, dtype=np.int64)])
+    positions[ids] = first_position + np.arange(len(ids))
+    return positions
+
+
+def _positions_of(positions, ids, id_name):
+    """Look up the model positions of ids, raising a KeyError if any of them are not in the model."""
+    ids = np.asarray(ids, dtype=np.int64)
+    in_range = (ids >= 0) & (ids < len(positions))
+    if not in_range.all() or (positions[ids] < 0).any():
+        missing = ids[~in_range].tolist() + [i for i in ids[in_range].tolist() if positions[i] < 0]
+        raise KeyError("{} values {} are not in the solver model.".format(id_name, missing))
+    return positions[ids]
+
+
+def _positions_or_missing(positions, ids):
+    """Look up the model positions of ids, giving -1 for ids not in the model."""
+    ids = np.asarray(ids, dtype=np.int64)
+    found = np.full(len(ids), -1, dtype=np.int64)
+    in_range = (ids >= 0) & (ids < len(positions))
+    found[in_range] = positions[ids[in_range]]
+    return found
+
+
+def _sum_by_id(ids, values):
+    """Sum values that share an id, giving the unique ids and their totals."""
+    ids, inverse = np.unique(np.asarray(ids, dtype=np.int64), return_inverse=True)
+    totals = np.zeros(len(ids))
+    np.add.at(totals, inverse, np.asarray(values, dtype=np.float64))
+    return ids, totals
+
+
+def _resize(values, size, fill_value):
+    """Truncate or pad an array indexed by id to a new size."""
+    if len(values) >= size:
+        return values[:size]
+    return np.concatenate([values, np.full(size - len(values), fill_value, dtype=values.dtype)])
+
+
+def _select_rows(matrix, rows_to_keep):
+    """Take a subset of the rows of a ConstraintMatrix, selected with a boolean array."""
+    row_lengths = np.diff(matrix.row_starts)
+    terms_to_keep = np.repeat(rows_to_keep, row_lengths)
+    return ConstraintMatrix(constraint_ids=matrix.constraint_ids[rows_to_keep],
+                            row_starts=np.concatenate([[0], np.cumsum(row_lengths[rows_to_keep])]),
+                            variable_ids=matrix.variable_ids[terms_to_keep],
+                            coefficients=matrix.coefficients[terms_to_keep],
+                            types=matrix.types[rows_to_keep], rhs=matrix.rhs[rows_to_keep])
+
+
+def _changed_constraint_ids(old_matrix, new_matrix):
+    """Find the constraint_ids in both matrices whose type or lhs terms differ between them."""
+    def terms(matrix):
+        return pd.DataFrame({'constraint_id': np.repeat(matrix.constraint_ids, np.diff(matrix.row_starts)),
+                             'variable_id': matrix.variable_ids, 'coefficient': matrix.coefficients})
+
+    in_both = np.intersect1d(old_matrix.constraint_ids, new_matrix.constraint_ids)
+    compared = pd.merge(terms(old_matrix), terms(new_matrix), on=['constraint_id', 'variable_id'], how='outer')
+    different_lhs = compared['constraint_id'][compared['coefficient_x'] != compared['coefficient_y']]
+    # The constraint_ids of a matrix are sorted, so the rows of constraints can be found by searching.
+    old_types = old_matrix.types[np.searchsorted(old_matrix.constraint_ids, in_both)]
+    new_types = new_matrix.types[np.searchsorted(new_matrix.constraint_ids, in_both)]
+    different_type = in_both[old_types != new_types]
+    return np.intersect1d(np.union1d(different_lhs.to_numpy(dtype=np.int64), different_type), in_both)
+
+
+def _add_rows(model, variables_by_id, matrix):
+    """Add each row of a ConstraintMatrix to a mip model, naming constraints by their id."""
+    mip_senses = {'<=': LESS_OR_EQUAL, '>=': GREATER_OR_EQUAL, '=': EQUAL}
+    senses = [mip_senses[constraint_type] for constraint_type in matrix.types]
+    variables = variables_by_id[matrix.variable_ids].tolist()
+    coefficients = matrix.coefficients.tolist()
+    row_starts = matrix.row_starts.tolist()
+    for row, (constraint_id, sense, rhs) in enumerate(zip(matrix.constraint_ids.tolist(), senses,
+                                                          matrix.rhs.tolist())):
+        start, end = row_starts[row], row_starts[row + 1]
+        # Constraints are stored by mip as lhs + const (sense) 0, so the rhs is moved to the lhs.
+        model.add_constr(LinExpr(variables[start:end], coefficients[start:end], -rhs, sense), name=str(constraint_id))
+
+
+class InfeasibleModelError(ValueError):
+    """Raise for a model with no feasible solution.
+
+    Attributes
+    ----------
+    conflicting_constraint_ids : list[int]
+        A set of constraints that can't be met together, see find_conflicting_constraints.
+
+    conflicting_constraints : pd.DataFrame or None
+        The nempy constraint sets the conflicting constraints belong to, when raised by SpotMarket.dispatch.
+    """
+
+    def __init__(self, conflicting_constraint_ids, message=None, conflicting_constraints=None):
+        self.conflicting_constraint_ids = conflicting_constraint_ids
+        self.conflicting_constraints = conflicting_constraints
+        if message is None:
+            message = 'Linear program infeasible, conflicting constraint_ids {}.'.format(conflicting_constraint_ids)
+        super().__init__(message)
+
+
+def find_conflicting_constraints(decision_variables, constraint_matrix, tolerance=1e-6, solver_name='CBC'):
+    """Find a small set of constraints that can't be met together, given the bounds on the decision variables.
+
+    An elastic version of the linear relaxation of the model is built, in which each constraint can be violated at a
+    cost. Minimising the violation gives a set of candidate constraints, which are then enforced, and the model
+    re-solved, until the enforced constraints can't be met together. The enforced constraints are then filtered by
+    relaxing them one at a time, and keeping them relaxed if the rest still can't be met. The number of solves is
+    bounded by the number of violated constraints rather than the size of the model. Integrality and special ordered
+    sets are ignored, so if only these make the model infeasible no constraints are returned. The elastic model is
+    solved with the solver backend given by solver_name, so the diagnosis uses the same solver as the model.
+
+    Examples
+    --------
 
-def find_problem_constraint(base_prob):
-    cons = []
-    test_prob = base_prob.copy()
-    for con in [con.name for con in base_prob.constrs]:
-        [test_prob.remove(c) for c in test_prob.constrs if c.name == con]
-        status = test_prob.optimize()
-        cons.append(con)
-        if status == OptimizationStatus.OPTIMAL:
-            return cons
-    return []
+    >>> decision_variables = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2],
+    ...   'lower_bound': [0.0, 0.0, 0.0],
+    ...   'upper_bound': [5.0, 5.0, 5.0],
+    ...   'type': ['continuous', 'continuous', 'continuous']})
+
+    Constraint 1 needs the first two variables to add to 8, but constraint 2 allows them to add to at most 6.
+    Constraint 3 is met regardless.
+
+    >>> constraints_lhs = pd.DataFrame({
+    ...   'constraint_id': [1, 1, 2, 2, 3],
+    ...   'variable_id': [0, 1, 0, 1, 2],
+    ...   'coefficient': [1.0, 1.0, 1.0, 1.0, 1.0]})
+
+    >>> constraints_type_and_rhs = pd.DataFrame({
+    ...   'constraint_id': [1, 2, 3],
+    ...   'type': ['=', '<=', '>='],
+    ...   'rhs': [8.0, 6.0, 1.0]})
+
+    >>> matrix = create_constraint_matrix(constraints_lhs, constraints_type_and_rhs)
+
+    >>> find_conflicting_constraints(decision_variables, matrix)
+    [1, 2]
+
+    Parameters
+    ----------
+    decision_variables : pd.DataFrame
+        With the columns variable_id, lower_bound and upper_bound.
+
+    constraint_matrix : ConstraintMatrix
+
+    tolerance : float
+        Violations smaller than this are ignored.
+
+    solver_name : str
+        The solver backend used to solve the elastic model, see create_solver_interface, default 'CBC'.
+
+    Returns
+    -------
+    list[int]
+        The constraint_ids of the conflicting constraints.
+    """
+    # Each constraint gets elastic variables allowing its lhs to be moved up or down, at a cost.
+    number_of_rows = len(constraint_matrix)
+    first_elastic_id = int(decision_variables['variable_id'].max()) + 1 if len(decision_variables) > 0 else 0
+    elastic_up = np.arange(first_elastic_id, first_elastic_id + number_of_rows)
+    elastic_down = elastic_up + number_of_rows
+    elastic_ids = np.concatenate([elastic_up, elastic_down])
+    variables = pd.DataFrame({
+        'variable_id': np.concatenate([decision_variables['variable_id'].to_numpy(dtype=np.int64), elastic_ids]),
+        'lower_bound': np.concatenate([decision_variables['lower_bound'].to_numpy(dtype=np.float64),
+                                       np.zeros(len(elastic_ids))]),
+        'upper_bound': np.concatenate([decision_variables['upper_bound'].to_numpy(dtype=np.float64),
+                                       np.full(len(elastic_ids), np.inf)]),
+        'type': 'continuous'})
+    rows = np.repeat(np.arange(number_of_rows), np.diff(constraint_matrix.row_starts))
+    constraints_lhs = pd.DataFrame({
+        'constraint_id': np.concatenate([constraint_matrix.constraint_ids[rows], constraint_matrix.constraint_ids,
+                                         constraint_matrix.constraint_ids]),
+        'variable_id': np.concatenate([constraint_matrix.variable_ids, elastic_up, elastic_down]),
+        'coefficient': np.concatenate([constraint_matrix.coefficients, np.ones(number_of_rows),
+                                       -np.ones(number_of_rows)])})
+    constraints_type_and_rhs = pd.DataFrame({'constraint_id': constraint_matrix.constraint_ids,
+                                             'type': constraint_matrix.types, 'rhs': constraint_matrix.rhs})
+    si = create_solver_interface(solver_name, single_model=True)
+    si.add_variables(variables)
+    si.add_objective_function(pd.DataFrame({'variable_id': elastic_ids, 'cost': 1.0}))
+    si.add_constraints(constraints_lhs, constraints_type_and_rhs)
+    elastic_variables = pd.DataFrame({'variable_id': elastic_ids})
+
+    def set_enforced(rows, enforced):
+        rows = np.asarray(rows, dtype=np.int64)
+        upper_bound = 0.0 if enforced else np.inf
+        si.update_variable_bounds(pd.DataFrame({'variable_id': np.concatenate([elastic_up[rows], elastic_down[rows]]),
+                                                'lower_bound': 0.0, 'upper_bound': upper_bound}))
+
+    # Enforce violated constraints until the enforced constraints can't be met together.
+    enforced = []
+    while si.optimize_relaxation():
+        violation = si.get_optimal_values_of_decision_variables(elastic_variables).to_numpy()
+        violated = np.flatnonzero(violation[:number_of_rows] + violation[number_of_rows:] > tolerance).tolist()
+        if not violated:
+            return []
+        set_enforced(violated, True)
+        enforced += violated
+
+    # Drop enforced constraints that aren't needed to make the model infeasible.
+    conflicting = []
+    for row in enforced:
+        set_enforced([row], False)
+        if si.optimize_relaxation():
+            set_enforced([row], True)
+            conflicting.append(row)
+
+    return sorted(constraint_matrix.constraint_ids[conflicting].tolist())
 
 
 def create_lhs(constraints, decision_variables, join_columns):
@@ -556,43 +556,149 @@ def fast_start_mode_four_constraints(fast_start_profile):
     return units_ending_in_mode_four
 
 
-def tie_break_constraints(price_bids, bid_decision_variables, unit_regions, next_constraint_id):
-    energy_price_bids = price_bids[price_bids['service'] == 'energy']
-    energy_price_bids = pd.merge(energy_price_bids,
-                                 bid_decision_variables.loc[:, ['variable_id', 'upper_bound']],
-                                 on='variable_id')
-    energy_price_bids = pd.merge(energy_price_bids, unit_regions.loc[:, ['unit', 'region']], on='unit')
+def tie_break_constraints(price_bids, bid_decision_variables, unit_regions, next_constraint_id, all_pairs=False):
+    """Create the constraints that balance the pro rata dispatch of equally priced energy bids within a region.
+
+    Energy bids are grouped by price, region and dispatch type, groups with bids from only one unit are ignored. Each
+    bid in a group, except the first, is linked to an earlier bid from a different unit in the group by a constraint of
+    the form:
+
+        B1 * 1/C1 - B2 * 1/C2 = 0
+
+    Where B1 and B2 are the decision variables of the bids and C1 and C2 are the bid volumes. The bids are put in order
+    of their rank within their unit and then by unit, and each is linked to the previous bid, unless that is from the
+    same unit, in which case it is linked to one of the first two bids in the group. A group of n bids gets n - 1
+    constraints, which together require the same pro rata dispatch of every bid in the group, as a constraint between
+    every pair of bids from different units, AEMO's formulation, would. If all_pairs is True then a constraint is
+    instead created between every pair of bids from different units, the number of constraints grows with the square of
+    the group size. As in AEMO's formulation, no constraint is created directly between two bids of the same unit,
+    their pro rata dispatch is only balanced through the bids of other units. When the constraints are made elastic,
+    and can't all be met, the two formulations can spread the violation differently between the bids.
+
+    Examples
+    --------
+
+    Unit A has three bids at the same price as the bids of units B and C.
+
+    >>> price_bids = pd.DataFrame({
+    ...   'unit': ['A', 'A', 'A', 'B', 'C'],
+    ...   'capacity_band': ['1', '2', '3', '1', '1'],
+    ...   'service': ['energy', 'energy', 'energy', 'energy', 'energy'],
+    ...   'dispatch_type': ['generator', 'generator', 'generator', 'generator', 'generator'],
+    ...   'variable_id': [0, 1, 2, 3, 4],
+    ...   'cost': [50.0, 50.0, 50.0, 50.0, 50.0]})
+
+    >>> bid_decision_variables = pd.DataFrame({
+    ...   'variable_id': [0, 1, 2, 3, 4],
+    ...   'upper_bound': [20.0, 20.0, 10.0, 50.0, 10.0]})
+
+    >>> unit_regions = pd.DataFrame({
+    ...   'unit': ['A', 'B', 'C'],
+    ...   'region': ['X', 'X', 'X']})
+
+    The bids are ordered A1, B1, C1, A2, A3. A3 follows a bid from the same unit, so it is linked to B1 instead.
 
-    constraints = pd.merge(energy_price_bids, energy_price_bids, on=['cost', 'region', 'dispatch_type'])
-    constraints = constraints[constraints['unit_x'] != constraints['unit_y']]
+    >>> lhs, rhs = tie_break_constraints(price_bids, bid_decision_variables, unit_regions, 5)
 
-    def make_id(unit_x, band_x, unit_y, band_y):
-        name = sorted([unit_x, str(band_x), unit_y, str(band_y)])
-        name = ''.join(name)
-        return name
+    >>> print(lhs)
+       constraint_id  variable_id  coefficient
+    0              5            0         0.05
+    1              6            3         0.02
+    2              7            4         0.10
+    3              8            3         0.02
+    0              5            3        -0.02
+    1              6            4        -0.10
+    2              7            1        -0.05
+    3              8            2        -0.10
 
-    constraints['name'] = \
-        constraints.apply(lambda x: make_id(x['unit_x'], x['capacity_band_x'],
-                                            x['unit_y'], x['capacity_band_y']), axis=1)
+    >>> print(rhs)
+       constraint_id type  rhs
+    0              5    =  0.0
+    1              6    =  0.0
+    2              7    =  0.0
+    3              8    =  0.0
 
-    constraints = constraints.drop_duplicates('name')
+    A constraint between every pair of bids from different units takes seven constraints.
 
-    constraints = constraints.loc[:, ['variable_id_x', 'upper_bound_x', 'variable_id_y', 'upper_bound_y']]
-    constraints = hf.save_index(constraints, 'constraint_id', next_constraint_id)
+    >>> lhs, rhs = tie_break_constraints(price_bids, bid_decision_variables, unit_regions, 5, all_pairs=True)
 
-    lhs_one = constraints.loc[:, ['constraint_id', 'variable_id_x', 'upper_bound_x']]
-    lhs_one['variable_id'] = lhs_one['variable_id_x']
-    lhs_one['coefficient'] = 1 / lhs_one['upper_bound_x']
+    >>> len(rhs)
+    7
 
-    lhs_two = constraints.loc[:, ['constraint_id', 'variable_id_y', 'upper_bound_y']]
-    lhs_two['variable_id'] = lhs_two['variable_id_y']
-    lhs_two['coefficient'] = - 1 / lhs_two['upper_bound_y']
+    Parameters
+    ----------
+    price_bids : pd.DataFrame
+        With the columns unit, capacity_band, service, dispatch_type, variable_id and cost.
+
+    bid_decision_variables : pd.DataFrame
+        With the columns variable_id and upper_bound.
+
+    unit_regions : pd.DataFrame
+        With the columns unit and region.
 
-    lhs = pd.concat([lhs_one.loc[:, ['constraint_id', 'variable_id', 'coefficient']],
-                     lhs_two.loc[:, ['constraint_id', 'variable_id', 'coefficient']]])
+    next_constraint_id : int
+
+    all_pairs : bool
+        Create a constraint between every pair of bids from different units in a group, rather than n - 1 constraints
+        per group, default False.
+
+    Returns
+    -------
+    lhs : pd.DataFrame
+        With the columns constraint_id, variable_id and coefficient.
 
-    rhs = constraints.loc[:, ['constraint_id']]
+    rhs : pd.DataFrame
+        With the columns constraint_id, type and rhs.
+    """
+    energy_price_bids = price_bids[price_bids['service'] == 'energy']
+    energy_price_bids = pd.merge(energy_price_bids,
+                                 bid_decision_variables.loc[:, ['variable_id', 'upper_bound']],
+                                 on='variable_id')
+    energy_price_bids = pd.merge(energy_price_bids, unit_regions.loc[:, ['unit', 'region']], on='unit')
 
+    group_columns = ['cost', 'region', 'dispatch_type']
+    if all_pairs:
+        pairs = pd.merge(energy_price_bids, energy_price_bids, on=group_columns)
+        pairs = pairs[(pairs['unit_x'] != pairs['unit_y']) & (pairs['variable_id_x'] < pairs['variable_id_y'])]
+        first = pairs.loc[:, ['variable_id_x', 'upper_bound_x']].to_numpy().T
+        second = pairs.loc[:, ['variable_id_y', 'upper_bound_y']].to_numpy().T
+    else:
+        energy_price_bids = energy_price_bids.sort_values(group_columns + ['unit', 'capacity_band'])
+        groups = energy_price_bids.groupby(group_columns, sort=False)
+        energy_price_bids = energy_price_bids[groups['unit'].transform('nunique').to_numpy() > 1]
+        # Order the bids in each group by their rank within their unit, and then by unit, so consecutive bids are from
+        # different units, except where only one unit has bids left.
+        rank = energy_price_bids.groupby(group_columns + ['unit'], sort=False).cumcount()
+        energy_price_bids = energy_price_bids.assign(rank=rank).sort_values(group_columns + ['rank', 'unit'])
+        group = energy_price_bids.groupby(group_columns, sort=False).ngroup().to_numpy()
+        units = energy_price_bids['unit'].to_numpy()
+        bids = energy_price_bids.loc[:, ['variable_id', 'upper_bound']].to_numpy().T
+        # Link each bid to the previous bid in the same group, or if that is from the same unit, to the first bid in
+        # the group, or to the second if the first is also from the same unit. The first two bids in a group are
+        # always from different units.
+        position = np.arange(len(group))
+        starts_group = np.concatenate([[True], group[1:] != group[:-1]])
+        group_start = np.maximum.accumulate(np.where(starts_group, position, 0))[1:]
+        previous = np.where(units[:-1] == units[1:],
+                            np.where(units[group_start] == units[1:], group_start + 1, group_start),
+                            position[:-1])
+        links_to_previous = ~starts_group[1:]
+        first = bids[:, previous[links_to_previous]]
+        second = bids[:, position[1:][links_to_previous]]
+
+    constraint_ids = np.arange(next_constraint_id, next_constraint_id + first.shape[1])
+
+    lhs_one = pd.DataFrame({'constraint_id': constraint_ids,
+                            'variable_id': first[0].astype(np.int64),
+                            'coefficient': 1 / first[1]})
+
+    lhs_two = pd.DataFrame({'constraint_id': constraint_ids,
+                            'variable_id': second[0].astype(np.int64),
+                            'coefficient': - 1 / second[1]})
+
+    lhs = pd.concat([lhs_one, lhs_two])
+
+    rhs = pd.DataFrame({'constraint_id': constraint_ids})
     rhs['type'] = '='
     rhs['rhs'] = 0.0
     return lhs, rhs
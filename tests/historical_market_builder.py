@@ -9,7 +9,7 @@ from nempy.historical_inputs import mms_db as hi, demand
 
 
 class SpotMarketBuilder:
-    def __init__(self, unit_inputs, interconnector_inputs, constraint_inputs, demand_inputs):
+    def __init__(self, unit_inputs, interconnector_inputs, constraint_inputs, demand_inputs, keep_solver_model=False):
 
         self.unit_inputs = unit_inputs
         self.interconnector_inputs = interconnector_inputs
@@ -20,9 +20,13 @@ class SpotMarketBuilder:
         unit_info = self.unit_inputs.get_unit_info()
         self.market = markets.SpotMarket(market_regions=['QLD1', 'NSW1', 'VIC1', 'SA1', 'TAS1'], unit_info=unit_info)
         self.market.solver_name = 'CBC'
+        # Keep the solver model between the fast start dispatch and later dispatch runs, see SpotMarket.
+        self.market.keep_solver_model = keep_solver_model
 
     def set_solver(self, solver_name):
         self.market.solver_name = solver_name
+        # A kept solver model uses the solver it was created with, so start a new one with the new solver.
+        self.market.persistent_solver_interface = None
 
     def add_unit_bids_to_market(self):
         volume_bids, price_bids = self.unit_inputs.get_processed_bids()
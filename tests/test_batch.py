@@ -0,0 +1,180 @@
+import io
+import os
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+from nempy import batch, markets
+from nempy.spot_market_backend import model_store
+
+
+def build_market(demand):
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}),
+                                market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [20.0, 50.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [demand]}))
+    return market
+
+
+def build_market_or_kill_worker(demand):
+    if demand < 0.0:
+        os._exit(1)
+    return build_market(demand)
+
+
+def extract_unpicklable_results(market):
+    return threading.Lock()
+
+
+def test_dispatch_many_on_process_pool_matches_serial_dispatch_and_keeps_order():
+    demands = [10.0, 30.0, 100.0, 60.0, 5.0]
+    results = list(batch.dispatch_many(demands, build_market, workers=2))
+
+    assert [result.interval for result in results] == demands
+    assert [result.failed for result in results] == [False, False, True, False, False]
+    assert 'InfeasibleModelError' in results[2].error
+
+    for demand, result in zip(demands, results):
+        if result.failed:
+            continue
+        market = build_market(demand)
+        market.dispatch()
+        assert_frame_equal(result.results['energy_prices'], market.get_energy_prices())
+        assert_frame_equal(result.results['unit_dispatch'], market.get_unit_dispatch())
+
+
+def test_snapshots_of_markets_with_closure_loss_functions_dispatch_on_process_pool():
+    pytest.importorskip('highspy')
+    from nempy.historical_inputs.interconnectors import _create_function
+
+    def build_market_with_losses(demand):
+        market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'VIC']}),
+                                    market_regions=['NSW', 'VIC'])
+        market.solver_name = 'HIGHS'
+        market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [100.0, 100.0]}))
+        market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+        market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [10.0, demand]}))
+        market.set_interconnectors(pd.DataFrame({'interconnector': ['I'], 'to_region': ['VIC'], 'from_region': ['NSW'],
+                                                 'max': [50.0], 'min': [-50.0]}))
+        market.set_interconnector_losses(
+            pd.DataFrame({'interconnector': ['I'], 'from_region_loss_share': [0.5],
+                          'loss_function': [_create_function(1.01, 0.001)]}),
+            pd.DataFrame({'interconnector': ['I'] * 5, 'loss_segment': [1, 2, 3, 4, 5],
+                          'break_point': [-50.0, -25.0, 0.0, 25.0, 50.0]}))
+        return market
+
+    demands = [20.0, 40.0, 80.0]
+    snapshots = [build_market_with_losses(demand).snapshot() for demand in demands]
+    results = list(batch.dispatch_many(snapshots, markets.SpotMarket.from_snapshot, workers=2))
+
+    for demand, result in zip(demands, results):
+        assert not result.failed, result.error
+        market = build_market_with_losses(demand)
+        market.dispatch()
+        assert_frame_equal(result.results['energy_prices'], market.get_energy_prices())
+        assert_frame_equal(result.results['interconnector_flows'], market.get_interconnector_flows())
+
+
+def test_from_snapshot_rejects_other_data():
+    with pytest.raises(ValueError):
+        markets.SpotMarket.from_snapshot(b'not a snapshot')
+
+    # Snapshots with different attributes, e.g. made before an attribute was renamed, aren't restored.
+    renamed = model_store.dumps({'format': 'nempy.SpotMarket', 'version': markets._snapshot_version,
+                                 'state': {'_renamed_attribute': 1}})
+    with pytest.raises(ValueError):
+        markets.SpotMarket.from_snapshot(renamed)
+
+
+def test_snapshots_hold_every_market_attribute_as_arrays_without_pickled_objects():
+    market = build_market(30.0)
+    assert sorted(vars(market)) == sorted(markets._snapshot_attributes + markets._not_in_snapshot)
+
+    snapshot = market.snapshot()
+    with np.load(io.BytesIO(snapshot), allow_pickle=False) as file:
+        assert all(file[name].dtype != object for name in file.files)
+
+    restored = markets.SpotMarket.from_snapshot(snapshot)
+    assert restored._decision_variables.key_codes is restored._lhs_coefficients.key_codes
+    for name in ['_decision_variables', '_objective_function_components', '_market_constraints_rhs_and_type']:
+        assert_frame_equal(getattr(restored, name).frame(), getattr(market, name).frame())
+        for group, frame in getattr(market, name).items():
+            assert_frame_equal(getattr(restored, name)[group], frame)
+
+
+def test_dispatch_many_records_intervals_that_kill_their_worker_and_carries_on():
+    demands = [10.0, -1.0, 30.0, 60.0, 5.0]
+    results = list(batch.dispatch_many(demands, build_market_or_kill_worker, workers=2, max_pending=2))
+
+    assert [result.interval for result in results] == demands
+    assert [result.failed for result in results] == [False, True, False, False, False]
+    assert 'worker process dispatching the interval died' in results[1].error
+    assert results[4].results['energy_prices']['price'].iloc[0] == 50.0
+
+
+def test_dispatch_many_records_builders_and_results_that_cannot_be_pickled_for_each_interval():
+    demands = [10.0, 30.0, 60.0]
+
+    results = list(batch.dispatch_many(demands, lambda demand: build_market(demand), workers=2, chunksize=2))
+    assert [result.interval for result in results] == demands
+    assert all(result.failed for result in results)
+    assert 'pickle' in results[0].error.lower()
+
+    results = list(batch.dispatch_many(demands, build_market, workers=2, extract=extract_unpicklable_results))
+    assert [result.interval for result in results] == demands
+    assert all(result.failed for result in results)
+    assert 'pickle' in results[0].error.lower()
+
+
+def test_dispatch_many_re_runs_chunks_cancelled_when_the_pool_is_restarted(monkeypatch):
+    broken, cancelled, finished = Future(), Future(), Future()
+    broken.set_exception(BrokenProcessPool())
+    cancelled.cancel()
+    finished.set_result([batch.IntervalResult(3.0, results='pool')])
+    futures = iter([broken, cancelled, finished])
+
+    class FakePool:
+        def __init__(self, workers, task):
+            pass
+
+        def submit(self, intervals):
+            return next(futures)
+
+        def restart(self):
+            pass
+
+        def run_alone(self, interval):
+            return batch.IntervalResult(interval, results='alone')
+
+        def shutdown(self):
+            pass
+
+    monkeypatch.setattr(batch, '_WorkerPool', FakePool)
+    results = list(batch.dispatch_many([1.0, 2.0, 3.0], build_market, workers=2, max_pending=3))
+
+    assert [(result.interval, result.results) for result in results] == [(1.0, 'alone'), (2.0, 'alone'),
+                                                                        (3.0, 'pool')]
+
+
+def test_dispatch_many_reads_intervals_as_results_are_consumed():
+    read = []
+
+    def demands():
+        for demand in [10.0, 20.0, 30.0, 40.0, 50.0, 60.0]:
+            read.append(demand)
+            yield demand
+
+    results = batch.dispatch_many(demands(), build_market, workers=1)
+    next(results)
+    assert read == [10.0]
+
+    results = batch.dispatch_many(demands(), build_market, workers=2, max_pending=2)
+    read.clear()
+    next(results)
+    assert len(read) <= 3
+    results.close()
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from nempy.spot_market_backend import dataframe_validator as dv
+
+
+def demand_schema(regions):
+    schema = dv.DataFrameSchema(name='demand', primary_keys=['region'])
+    schema.add_column(dv.SeriesSchema(name='region', data_type=str, allowed_values=regions))
+    schema.add_column(dv.SeriesSchema(name='demand', data_type=np.float64, must_be_real_number=True))
+    return schema
+
+
+def test_schema_checks_inputs_each_time_they_are_validated():
+    schema = demand_schema(['NSW', 'VIC'])
+    demand = pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [100.0, 200.0]})
+    schema.validate(demand)
+    schema.validate(demand)
+
+    with pytest.raises(dv.ColumnValues):
+        demand_schema(['NSW']).validate(demand)
+
+    demand.loc[1, 'demand'] = np.inf
+    with pytest.raises(dv.ColumnValues):
+        schema.validate(demand)
+
+    demand.loc[1, 'demand'] = 200.0
+    demand.loc[1, 'region'] = 'NSW'
+    with pytest.raises(dv.RepeatedRowError):
+        schema.validate(demand)
+
+    with pytest.raises(dv.ColumnDataTypeError):
+        schema.validate(pd.DataFrame({'region': ['NSW', 1], 'demand': [100.0, 200.0]}))
+
+
+def test_series_schemas_only_select_the_checks_they_need():
+    assert len(dv.SeriesSchema(name='set', data_type=str)._checks) == 1
+    assert len(dv.SeriesSchema(name='demand', data_type=np.float64, must_be_real_number=True,
+                               not_negative=True)._checks) == 3
+
+
+@pytest.mark.parametrize('values, valid', [
+    (['NSW', 'VIC'], True),
+    (np.array(['NSW', 'VIC']), True),
+    ([np.str_('NSW'), 'VIC'], True),
+    ([], True),
+    (['NSW', None], False),
+    (['NSW', np.nan], False),
+    ([b'NSW', 'VIC'], False),
+    (['NSW', 1], False)])
+def test_str_columns_accept_str_and_str_subclasses_only(values, valid):
+    schema = dv.DataFrameSchema(name='regions')
+    schema.add_column(dv.SeriesSchema(name='region', data_type=str))
+    regions = pd.DataFrame({'region': pd.Series(values, dtype=object)})
+    if valid:
+        schema.validate(regions)
+    else:
+        with pytest.raises(dv.ColumnDataTypeError):
+            schema.validate(regions)
@@ -53,7 +53,8 @@ def test_constraint_violation():
         market_builder = historical_market_builder.SpotMarketBuilder(unit_inputs=unit_inputs,
                                                                      interconnector_inputs=interconnector_inputs,
                                                                      constraint_inputs=constraint_inputs,
-                                                                     demand_inputs=demand_inputs)
+                                                                     demand_inputs=demand_inputs,
+                                                                     keep_solver_model=True)
         market_builder.add_unit_bids_to_market()
         market_builder.set_ramp_rate_limits()
         market_builder.set_unit_limit_constraints()
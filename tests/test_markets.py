@@ -1,6 +1,9 @@
+import numpy as np
 import pandas as pd
+import pytest
 from pandas._testing import assert_frame_equal
 from nempy import markets
+from nempy.spot_market_backend import solver_interface
 
 
 def test_one_region_energy_market():
@@ -115,7 +118,13 @@ def test_two_region_energy_market():
     assert_frame_equal(market.get_unit_dispatch(), expected_dispatch)
 
 
-def test_one_interconnector():
+@pytest.mark.parametrize('solver_name, single_solver_model, lp_first_interconnector_losses',
+                         [('CBC', False, False), ('CBC', True, False), ('HIGHS', False, False), ('CBC', False, True),
+                          ('CBC', True, True), ('HIGHS', False, True)])
+def test_one_interconnector(solver_name, single_solver_model, lp_first_interconnector_losses):
+    if solver_name == 'HIGHS':
+        pytest.importorskip('highspy')
+
     # The only generator is located in NSW.
     unit_info = pd.DataFrame({
         'unit': ['A'],
@@ -124,6 +133,9 @@ def test_one_interconnector():
 
     # Create a market instance.
     market = markets.SpotMarket(unit_info=unit_info, market_regions=['NSW', 'VIC'])
+    market.solver_name = solver_name
+    market.single_solver_model = single_solver_model
+    market.lp_first_interconnector_losses = lp_first_interconnector_losses
 
     # Volume of each bids.
     volume_bids = pd.DataFrame({
@@ -1049,4 +1061,579 @@ def test_setting_constraint_on_unit_with_no_bid_volume_doesnt_raise_error():
     })
 
     assert_frame_equal(market.get_energy_prices(), expected_prices)
-    assert_frame_equal(market.get_unit_dispatch(), expected_dispatch)
\ No newline at end of file
+    assert_frame_equal(market.get_unit_dispatch(), expected_dispatch)
+
+
+def test_persistent_solver_interface_matches_fresh_dispatch():
+    from nempy.spot_market_backend.solver_interface import PersistentInterfaceToSolver
+
+    def constant_losses(flow):
+        return abs(flow) * 0.05
+
+    def build_market(units, volumes, prices, demand):
+        unit_info = pd.DataFrame({
+            'unit': units,
+            'region': ['NSW', 'VIC'][:len(units)]
+        })
+        market = markets.SpotMarket(unit_info=unit_info, market_regions=['NSW', 'VIC'])
+        market.set_unit_volume_bids(pd.DataFrame({'unit': units, '1': volumes, '2': volumes}))
+        market.set_unit_price_bids(pd.DataFrame({'unit': units, '1': prices, '2': [p + 10.0 for p in prices]}))
+        market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': demand}))
+        market.set_interconnectors(pd.DataFrame({
+            'interconnector': ['little_link'],
+            'to_region': ['VIC'],
+            'from_region': ['NSW'],
+            'max': [100.0],
+            'min': [-120.0]
+        }))
+        market.set_interconnector_losses(
+            pd.DataFrame({'interconnector': ['little_link'], 'from_region_loss_share': [0.5],
+                          'loss_function': [constant_losses]}),
+            pd.DataFrame({'interconnector': ['little_link'] * 3, 'loss_segment': [1, 2, 3],
+                          'break_point': [-120.0, 0.0, 100]}))
+        return market
+
+    intervals = [
+        (['A', 'B'], [60.0, 40.0], [50.0, 70.0], [20.0, 90.0]),
+        # Only the demand changes.
+        (['A', 'B'], [60.0, 40.0], [50.0, 70.0], [30.0, 60.0]),
+        # Bid prices change so the flow reverses.
+        (['A', 'B'], [60.0, 40.0], [80.0, 40.0], [50.0, 20.0]),
+        # Unit B is removed, changing the structure of the model.
+        (['A'], [120.0], [50.0], [20.0, 70.0]),
+        (['A', 'B'], [60.0, 40.0], [50.0, 70.0], [20.0, 90.0]),
+    ]
+
+    persistent_interface = PersistentInterfaceToSolver()
+    rebuilds = []
+    for units, volumes, prices, demand in intervals:
+        fresh_market = build_market(units, volumes, prices, demand)
+        fresh_market.dispatch()
+        persistent_market = build_market(units, volumes, prices, demand)
+        persistent_market.persistent_solver_interface = persistent_interface
+        persistent_market.dispatch()
+        rebuilds.append(persistent_interface.last_update_was_rebuild)
+
+        assert_frame_equal(persistent_market.get_energy_prices(), fresh_market.get_energy_prices())
+        assert_frame_equal(persistent_market.get_unit_dispatch(), fresh_market.get_unit_dispatch())
+        assert_frame_equal(persistent_market.get_interconnector_flows(), fresh_market.get_interconnector_flows())
+
+    assert rebuilds[:3] == [True, False, False]
+
+
+@pytest.mark.parametrize('solver_name', ['CBC', 'HIGHS'])
+def test_infeasible_dispatch_reports_conflicting_constraint_sets(solver_name):
+    from nempy.spot_market_backend.solver_interface import InfeasibleModelError
+    if solver_name == 'HIGHS':
+        pytest.importorskip('highspy')
+
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        'region': ['NSW', 'NSW', 'VIC']
+    })
+
+    market = markets.SpotMarket(unit_info=unit_info, market_regions=['NSW', 'VIC'])
+    market.solver_name = solver_name
+
+    volume_bids = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        '1': [100.0, 100.0, 100.0]  # MW
+    })
+
+    market.set_unit_volume_bids(volume_bids)
+
+    price_bids = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        '1': [50.0, 60.0, 70.0]  # $/MW
+    })
+
+    market.set_unit_price_bids(price_bids)
+
+    # The capacity of A and B is too low to meet demand in NSW, C's capacity doesn't matter as VIC demand can be met.
+    capacity = pd.DataFrame({
+        'unit': ['A', 'B', 'C'],
+        'capacity': [60.0, 70.0, 80.0]  # MW
+    })
+
+    market.set_unit_bid_capacity_constraints(capacity)
+
+    demand = pd.DataFrame({
+        'region': ['NSW', 'VIC'],
+        'demand': [150.0, 50.0]  # MW
+    })
+
+    market.set_demand_constraints(demand)
+
+    with pytest.raises(InfeasibleModelError) as error:
+        market.dispatch()
+
+    expected_conflicts = pd.DataFrame({
+        'constraint_set': ['unit_bid_capacity', 'unit_bid_capacity', 'demand'],
+        'unit': ['A', 'B', None],
+        'region': [None, None, 'NSW']
+    })
+
+    conflicts = error.value.conflicting_constraints.loc[:, ['constraint_set', 'unit', 'region']]
+    assert_frame_equal(conflicts.astype(object).where(conflicts.notna(), None), expected_conflicts.astype(object))
+
+
+def test_dispatch_profile_records_phase_times_and_model_size():
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B'],
+        'region': ['NSW', 'NSW']
+    })
+
+    market = markets.SpotMarket(unit_info=unit_info, market_regions=['NSW'])
+
+    volume_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [20.0, 50.0],  # MW
+        '2': [20.0, 30.0]  # MW
+    })
+
+    market.set_unit_volume_bids(volume_bids)
+
+    price_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [50.0, 100.0],  # $/MW
+        '2': [100.0, 130.0]  # $/MW
+    })
+
+    market.set_unit_price_bids(price_bids)
+
+    capacity = pd.DataFrame({
+        'unit': ['A', 'B'],
+        'capacity': [30.0, 100.0]  # MW
+    })
+
+    market.set_unit_bid_capacity_constraints(capacity)
+
+    demand = pd.DataFrame({
+        'region': ['NSW'],
+        'demand': [60.0]  # MW
+    })
+
+    market.set_demand_constraints(demand)
+
+    market.dispatch()
+    assert market.last_dispatch_stats is None
+
+    market.dispatch(profile=True)
+    stats = market.last_dispatch_stats
+    market.dispatch()
+    assert market.last_dispatch_stats is None
+
+    expected_model_size = pd.DataFrame({
+        'constraint_set': ['unit_bid_capacity', 'demand'],
+        'constraints': [2, 1],
+        'non_zeros': [4, 4]
+    })
+
+    assert_frame_equal(stats.model_size, expected_model_size)
+    assert stats.variables == {'bids': 4}
+    assert list(stats.phase_times) == ['generic_lhs', 'create_lhs', 'lhs_concat', 'model_build', 'mip_solve',
+                                       'result_extraction', 'pricing_solve']
+    assert stats.total_time > 0.0
+    assert not stats.solver_status['solved_as_lp']
+    assert not stats.solver_status['over_constrained_re_run']
+
+
+@pytest.mark.parametrize('solver_name', ['CBC', 'HIGHS'])
+def test_over_constrained_dispatch_re_run_relaxes_violated_generic_constraints(solver_name):
+    if solver_name == 'HIGHS':
+        pytest.importorskip('highspy')
+
+    unit_info = pd.DataFrame({
+        'unit': ['A'],
+        'region': ['NSW']
+    })
+
+    volume_bids = pd.DataFrame({
+        'unit': ['A'],
+        '1': [100.0]  # MW
+    })
+
+    price_bids = pd.DataFrame({
+        'unit': ['A'],
+        '1': [50.0]  # $/MW
+    })
+
+    demand = pd.DataFrame({
+        'region': ['NSW'],
+        'demand': [80.0]  # MW
+    })
+
+    # A generic constraint limiting A to 50 MW, which has to be violated to meet demand.
+    generic_cons = pd.DataFrame({
+        'set': ['X'],
+        'type': ['<='],
+        'rhs': [50.0],
+    })
+
+    violation_costs = pd.DataFrame({
+        'set': ['X'],
+        'cost': [20000.0]
+    })
+
+    unit_coefficients = pd.DataFrame({
+        'set': ['X'],
+        'unit': ['A'],
+        'service': ['energy'],
+        'coefficient': [1.0]
+    })
+
+    market = markets.SpotMarket(unit_info=unit_info, market_regions=['NSW'])
+    market.solver_name = solver_name
+    market.set_unit_volume_bids(volume_bids)
+    market.set_unit_price_bids(price_bids)
+    market.set_demand_constraints(demand)
+    market.set_generic_constraints(generic_cons)
+    market.make_constraints_elastic('generic', violation_costs)
+    market.link_units_to_generic_constraints(unit_coefficients)
+    market.dispatch(energy_market_ceiling_price=15000.0, energy_market_floor_price=-1000.0,
+                    fcas_market_ceiling_price=1000.0, allow_over_constrained_dispatch_re_run=True)
+
+    # Without the re-run the price would include the cost of violating the generic constraint.
+    expected_prices = pd.DataFrame({
+        'region': ['NSW'],
+        'price': [50.0]
+    })
+
+    expected_dispatch = pd.DataFrame({
+        'unit': ['A'],
+        'dispatch_type': ['generator'],
+        'service': ['energy'],
+        'dispatch': [80.0]
+    })
+
+    assert_frame_equal(market.get_energy_prices(), expected_prices)
+    assert_frame_equal(market.get_unit_dispatch(), expected_dispatch)
+
+
+def test_over_constrained_dispatch_re_run_only_re_prices_groups_it_was_for(monkeypatch):
+    priced = []
+    price_constraints = solver_interface.InterfaceToSolver.price_constraints
+
+    def record_priced_constraints(si, constraint_ids_to_price):
+        priced.append(list(constraint_ids_to_price))
+        return price_constraints(si, constraint_ids_to_price)
+
+    monkeypatch.setattr(solver_interface.InterfaceToSolver, 'price_constraints', record_priced_constraints)
+
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A'], 'region': ['NSW']}), market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'A'], 'service': ['energy', 'raise_reg'],
+                                              '1': [100.0, 20.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'A'], 'service': ['energy', 'raise_reg'],
+                                             '1': [50.0, 20.0]}))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [80.0]}))
+    market.set_fcas_requirements_constraints(pd.DataFrame({'set': ['nsw_regulation_requirement'], 'region': ['NSW'],
+                                                           'service': ['raise_reg'], 'volume': [10.0]}))
+    # A generic constraint limiting A to 50 MW, which has to be violated to meet demand, setting the energy price
+    # above the market price cap, but not the fcas price.
+    market.set_generic_constraints(pd.DataFrame({'set': ['X'], 'type': ['<='], 'rhs': [50.0]}))
+    market.make_constraints_elastic('generic', pd.DataFrame({'set': ['X'], 'cost': [20000.0]}))
+    market.link_units_to_generic_constraints(pd.DataFrame({'set': ['X'], 'unit': ['A'], 'service': ['energy'],
+                                                           'coefficient': [1.0]}))
+    market.dispatch(energy_market_ceiling_price=15000.0, energy_market_floor_price=-1000.0,
+                    fcas_market_ceiling_price=1000.0, allow_over_constrained_dispatch_re_run=True)
+
+    demand_ids = list(market._market_constraints_rhs_and_type['demand']['constraint_id'])
+    fcas_ids = list(market._market_constraints_rhs_and_type['fcas']['constraint_id'])
+    assert priced == [demand_ids, fcas_ids, demand_ids]
+    assert list(market.get_energy_prices()['price']) == [50.0]
+    assert list(market.get_fcas_prices()['price']) == [20.0]
+
+
+def test_keep_solver_model_second_dispatch_matches_fresh_dispatch():
+    unit_info = pd.DataFrame({
+        'unit': ['A', 'B'],
+        'region': ['NSW', 'NSW']
+    })
+
+    volume_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [20.0, 50.0],  # MW
+        '2': [20.0, 30.0]  # MW
+    })
+
+    price_bids = pd.DataFrame({
+        'unit': ['A', 'B'],
+        '1': [50.0, 100.0],  # $/MW
+        '2': [60.0, 130.0]  # $/MW
+    })
+
+    demand = pd.DataFrame({
+        'region': ['NSW'],
+        'demand': [60.0]  # MW
+    })
+
+    first_run_ramp_rates = pd.DataFrame({
+        'unit': ['A', 'B'],
+        'initial_output': [20.0, 40.0],  # MW
+        'ramp_up_rate': [600.0, 600.0],  # MW/h
+        'ramp_down_rate': [600.0, 600.0]  # MW/h
+    })
+
+    # The second run tightens the ramp rate of A, as is done when fast start unit profiles are applied.
+    second_run_ramp_rates = first_run_ramp_rates.copy()
+    second_run_ramp_rates['ramp_up_rate'] = [120.0, 600.0]
+
+    def build_market():
+        market = markets.SpotMarket(unit_info=unit_info.copy(), market_regions=['NSW'])
+        market.set_unit_volume_bids(volume_bids.copy())
+        market.set_unit_price_bids(price_bids.copy())
+        market.set_demand_constraints(demand.copy())
+        market.set_unit_ramp_rate_constraints(first_run_ramp_rates.copy())
+        return market
+
+    market = build_market()
+    market.keep_solver_model = True
+    market.dispatch()
+    market.set_unit_ramp_rate_constraints(second_run_ramp_rates.copy())
+    market.dispatch()
+
+    assert not market.persistent_solver_interface.last_update_was_rebuild
+
+    fresh_market = build_market()
+    fresh_market.dispatch()
+    fresh_market.set_unit_ramp_rate_constraints(second_run_ramp_rates.copy())
+    fresh_market.dispatch()
+
+    assert_frame_equal(market.get_energy_prices(), fresh_market.get_energy_prices())
+    assert_frame_equal(market.get_unit_dispatch(), fresh_market.get_unit_dispatch())
+    assert market.get_unit_dispatch()['dispatch'].tolist() == [30.0, 30.0]
+
+
+@pytest.mark.parametrize('solver_name,losses', [('CBC', False), ('HIGHS', False), ('HIGHS', True)])
+def test_sweep_rhs_matches_fresh_dispatch_at_each_demand(solver_name, losses):
+    if solver_name == 'HIGHS':
+        pytest.importorskip('highspy')
+
+    def build_market(nsw_demand):
+        market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B', 'C'],
+                                                            'region': ['NSW', 'NSW', 'VIC']}),
+                                    market_regions=['NSW', 'VIC'])
+        market.solver_name = solver_name
+        market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B', 'C'], '1': [20.0, 50.0, 40.0],
+                                                  '2': [30.0, 30.0, 60.0]}))
+        market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B', 'C'], '1': [30.0, 70.0, 40.0],
+                                                 '2': [90.0, 120.0, 80.0]}))
+        market.set_unit_bid_capacity_constraints(pd.DataFrame({'unit': ['A', 'B', 'C'],
+                                                               'capacity': [45.0, 70.0, 100.0]}))
+        market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [nsw_demand, 50.0]}))
+        market.set_interconnectors(pd.DataFrame({'interconnector': ['I'], 'to_region': ['NSW'],
+                                                 'from_region': ['VIC'], 'max': [30.0], 'min': [-30.0]}))
+        if losses:
+            market.set_interconnector_losses(
+                pd.DataFrame({'interconnector': ['I'], 'from_region_loss_share': [0.5],
+                              'loss_function': [lambda flow: 0.002 * flow ** 2]}),
+                pd.DataFrame({'interconnector': ['I'] * 5, 'loss_segment': [1, 2, 3, 4, 5],
+                              'break_point': [-30.0, -15.0, 0.0, 15.0, 30.0]}))
+        return market
+
+    demands = [10.0, 60.0, 90.0, 120.0, 30.0]
+    market = build_market(demands[0])
+    original_demand = market._market_constraints_rhs_and_type['demand'].copy()
+    prices, dispatch = market.sweep_rhs('demand', 'NSW', demands)
+
+    for demand in demands:
+        fresh_market = build_market(demand)
+        fresh_market.dispatch()
+        assert_frame_equal(prices[prices['rhs'] == demand].drop(columns='rhs').reset_index(drop=True),
+                           fresh_market.get_energy_prices())
+        assert_frame_equal(dispatch[dispatch['rhs'] == demand].drop(columns='rhs').reset_index(drop=True),
+                           fresh_market.get_unit_dispatch())
+
+    assert_frame_equal(market._market_constraints_rhs_and_type['demand'].loc[:, original_demand.columns],
+                       original_demand)
+    assert market.persistent_solver_interface is None
+    assert_frame_equal(market.get_energy_prices(), fresh_market.get_energy_prices())
+
+
+@pytest.mark.parametrize('all_pairs', [False, True])
+def test_tie_break_constraints_balance_pro_rata_dispatch_of_equally_priced_bids(all_pairs):
+    units = ['A', 'B', 'C', 'D']
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': units, 'region': ['NSW'] * 4}),
+                                market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': units, '1': [20.0, 40.0, 10.0, 30.0],
+                                              '2': [10.0, 20.0, 40.0, 50.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': units, '1': [0.0, 0.0, 0.0, 10.0],
+                                             '2': [50.0, 50.0, 50.0, 50.0]}))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [140.0]}))
+    market.set_tie_break_constraints(1e-3, all_pairs=all_pairs)
+    market.dispatch()
+
+    # The $0/MWh and $10/MWh bands are fully dispatched, leaving 40 MW of the 120 MW of $50/MWh bands to be
+    # dispatched pro rata.
+    expected_dispatch = pd.DataFrame({
+        'unit': units,
+        'dispatch_type': ['generator'] * 4,
+        'service': ['energy'] * 4,
+        'dispatch': [20.0 + 10.0 / 3, 40.0 + 20.0 / 3, 10.0 + 40.0 / 3, 30.0 + 50.0 / 3]
+    })
+    assert_frame_equal(market.get_unit_dispatch(), expected_dispatch)
+    number_of_constraints = {False: 2 + 3, True: 3 + 6}
+    assert len(market._constraints_rhs_and_type['tie_break']) == number_of_constraints[all_pairs]
+
+
+def test_tie_break_constraints_only_link_bids_from_different_units():
+    units = ['A', 'B', 'C']
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': units, 'region': ['NSW'] * 3}),
+                                market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': units, '1': [20.0, 40.0, 10.0], '2': [10.0, 5.0, 5.0],
+                                              '3': [5.0, 5.0, 5.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': units, '1': [50.0, 50.0, 50.0], '2': [50.0, 60.0, 65.0],
+                                             '3': [50.0, 70.0, 75.0]}))
+    market.set_tie_break_constraints(1e-3)
+
+    # The five $50/MWh bids, three of them from unit A, are balanced by four constraints, each between two units.
+    bids = market._decision_variables['bids'].loc[:, ['variable_id', 'unit']]
+    lhs = pd.merge(market._lhs_coefficients['tie_break'], bids, on='variable_id')
+    assert len(market._constraints_rhs_and_type['tie_break']) == 4
+    assert (lhs.groupby('constraint_id')['unit'].nunique() == 2).all()
+
+
+def test_results_are_cached_until_the_next_dispatch():
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}),
+                                market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [20.0, 50.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0]}))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [30.0]}))
+    market.dispatch()
+
+    # Changing the returned results doesn't change the cached results.
+    dispatch = market.get_unit_dispatch()
+    dispatch['dispatch'] = 0.0
+    assert list(market.get_unit_dispatch()['dispatch']) == [20.0, 10.0]
+
+    arrays = market.get_result_arrays('unit_dispatch')
+    with pytest.raises(ValueError):
+        arrays['dispatch'][0] = 0.0
+
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [10.0]}))
+    market.dispatch()
+    assert list(market.get_unit_dispatch()['dispatch']) == [10.0, 0.0]
+    assert list(market.get_result_arrays('unit_dispatch')['dispatch']) == [10.0, 0.0]
+    assert list(market.get_energy_prices()['price']) == [50.0]
+
+
+def test_region_dispatch_summary_with_a_zero_loss_factor_on_flows_into_a_region():
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A'], 'region': ['NSW']}),
+                                market_regions=['NSW', 'VIC'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A'], '1': [100.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A'], '1': [80.0]}))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW', 'VIC'], 'demand': [0.0, 0.0]}))
+    # The flow into VIC is fixed at 90 MW, and with a loss factor of zero none of it counts towards VIC's demand.
+    market.set_interconnectors(pd.DataFrame({'interconnector': ['inter_one'], 'to_region': ['VIC'],
+                                             'from_region': ['NSW'], 'max': [90.0], 'min': [90.0],
+                                             'from_region_loss_factor': [0.9], 'to_region_loss_factor': [0.0]}))
+    market.dispatch()
+
+    summary = market.get_region_dispatch_summary()
+    assert list(summary['region']) == ['NSW', 'VIC']
+    assert list(summary['transmission_losses']) == pytest.approx([90.0 - 90.0 / 0.9, 90.0])
+    assert list(market.get_interconnector_flows()['flow']) == [90.0]
+
+
+def test_model_matrices_solved_by_another_solver_match_dispatch():
+    highspy = pytest.importorskip('highspy')
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}),
+                                market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B', 'B'], 'service': ['energy', 'energy', 'raise_reg'],
+                                              '1': [100.0, 110.0, 15.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B', 'B'], 'service': ['energy', 'energy', 'raise_reg'],
+                                             '1': [50.0, 60.0, 20.0]}))
+    fcas_trapeziums = pd.DataFrame({'unit': ['B'], 'service': ['raise_reg'], 'max_availability': [15.0],
+                                    'enablement_min': [50.0], 'low_break_point': [65.0],
+                                    'high_break_point': [95.0], 'enablement_max': [110.0]})
+    market.set_fcas_max_availability(fcas_trapeziums.loc[:, ['unit', 'service', 'max_availability']])
+    market.set_energy_and_regulation_capacity_constraints(fcas_trapeziums)
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [100.0]}))
+    market.set_fcas_requirements_constraints(pd.DataFrame({'set': ['nsw_regulation_requirement'], 'region': ['NSW'],
+                                                           'service': ['raise_reg'], 'volume': [10.0]}))
+    market.dispatch()
+
+    model = market.get_model_matrices()
+    assert set(model.constraints['constraint_set']) == {'demand', 'fcas', 'energy_and_regulation_capacity',
+                                                        'fcas_max_availability'}
+    lp = highspy.HighsLp()
+    lp.num_col_, lp.num_row_ = model.shape[1], model.shape[0]
+    lp.col_cost_, lp.col_lower_, lp.col_upper_ = model.c, model.lower_bounds, model.upper_bounds
+    lp.row_lower_ = np.where(model.senses == '<=', -highspy.kHighsInf, model.rhs)
+    lp.row_upper_ = np.where(model.senses == '>=', highspy.kHighsInf, model.rhs)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.start_, lp.a_matrix_.index_, lp.a_matrix_.value_ = model.indptr, model.indices, model.data
+    h = highspy.Highs()
+    h.silent()
+    h.passModel(lp)
+    h.run()
+
+    assert h.getInfo().objective_function_value == pytest.approx(market.objective_value)
+    bids = market._decision_variables['bids']
+    columns = model.variables.set_index('variable_id').loc[bids['variable_id'], 'column']
+    assert list(np.asarray(h.getSolution().col_value)[columns]) == pytest.approx([40.0, 60.0, 10.0])
+
+
+def test_model_matrices_constraint_matrix_as_scipy_sparse_matrix():
+    pytest.importorskip('scipy')
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A', 'B'], 'region': ['NSW', 'NSW']}),
+                                market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [20.0, 50.0], '2': [10.0, 10.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A', 'B'], '1': [50.0, 100.0], '2': [60.0, 110.0]}))
+    market.set_demand_constraints(pd.DataFrame({'region': ['NSW'], 'demand': [30.0]}))
+    market.set_unit_bid_capacity_constraints(pd.DataFrame({'unit': ['A', 'B'], 'capacity': [25.0, 60.0]}))
+    model = market.get_model_matrices()
+    assert model.A.shape == model.shape
+    assert model.A.nnz == len(model.data)
+
+
+def test_remove_unused_interpolation_weights_keeps_the_three_closest_weights_of_each_link():
+    class DisabledVariables:
+        def disable_variables(self, variables):
+            self.variable_ids = sorted(variables['variable_id'])
+
+    rng = np.random.default_rng(1)
+    links = pd.DataFrame({'interconnector': ['I', 'I', 'J'], 'link': ['I1', 'I2', 'J'],
+                          'value': [12.5, rng.uniform(-100, 100), 0.0]})
+    weights = pd.DataFrame({'interconnector': np.repeat(links['interconnector'], 9),
+                            'link': np.repeat(links['link'], 9),
+                            'loss_segment': np.tile(np.arange(1, 10), 3),
+                            'break_point': np.tile(np.linspace(-100.0, 100.0, 9), 3)})
+    weights['variable_id'] = np.arange(len(weights))
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A'], 'region': ['NSW']}), market_regions=['NSW'])
+    market._decision_variables = {'interconnectors': links, 'interpolation_weights': weights}
+
+    si = DisabledVariables()
+    market._remove_unused_interpolation_weights(si)
+
+    expected = []
+    for _, link in links.iterrows():
+        link_weights = weights[weights['link'] == link['link']]
+        distance = (link_weights['break_point'] - link['value']).abs()
+        expected += list(link_weights['variable_id'].to_numpy()[np.argsort(distance.to_numpy(), kind='stable')][3:])
+    assert si.variable_ids == sorted(expected)
+
+
+def test_constraint_sets_of_market_without_constraints():
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A'], 'region': ['NSW']}), market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A'], '1': [10.0]}))
+    assert list(market._constraint_sets_of([]).columns) == ['constraint_id', 'constraint_set']
+    assert market._constraint_sets_of([]).empty
+
+
+def test_dispatch_profile_of_market_without_constraints():
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A'], 'region': ['NSW']}), market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A'], '1': [10.0]}))
+    market.set_unit_price_bids(pd.DataFrame({'unit': ['A'], '1': [50.0]}))
+    market.dispatch(profile=True)
+    assert market.last_dispatch_stats.model_size.empty
+    assert list(market.last_dispatch_stats.model_size.columns) == ['constraint_set', 'constraints', 'non_zeros']
+
+
+def test_keep_solver_model_rejects_solvers_without_a_persistent_interface():
+    market = markets.SpotMarket(unit_info=pd.DataFrame({'unit': ['A'], 'region': ['NSW']}), market_regions=['NSW'])
+    market.set_unit_volume_bids(pd.DataFrame({'unit': ['A'], '1': [10.0]}))
+    market.solver_name = 'HIGHS'
+    market.keep_solver_model = True
+    with pytest.raises(ValueError, match="keep_solver_model is only supported for the solvers"):
+        market.dispatch()
@@ -0,0 +1,93 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from nempy.spot_market_backend.model_store import KeyCodes, ModelTable, dumps, loads
+
+
+def test_model_table_grows_and_compacts_in_dict_order():
+    table = ModelTable(['variable_id', 'cost'], key_columns=['unit'], capacity=2)
+    table['a'] = pd.DataFrame({'variable_id': [0, 1], 'cost': [1.0, 2.0], 'unit': ['A', 'B']})
+    table['b'] = pd.DataFrame({'variable_id': [2, 3, 4], 'cost': [3.0, 4.0, 5.0], 'unit': ['C', 'A', 'B']})
+    table['c'] = pd.DataFrame({'variable_id': [5], 'cost': [6.0]})
+    table['a'] = pd.DataFrame({'variable_id': [6], 'cost': [7.0], 'unit': ['D']})
+    del table['b']
+
+    expected = pd.DataFrame({
+        'variable_id': [6, 5],
+        'cost': [7.0, 6.0],
+        'unit': table.key_codes.encode(['D', None])})
+
+    assert list(table) == ['a', 'c']
+    assert_frame_equal(table.frame(), expected)
+    assert_frame_equal(table.frame(['cost'], groups=['c', 'a']), pd.DataFrame({'cost': [6.0, 7.0]}))
+
+    table['d'] = pd.DataFrame({'variable_id': [7, 8], 'cost': [8.0, 9.0], 'unit': ['A', 'A']})
+
+    assert_frame_equal(table.frame(['variable_id']), pd.DataFrame({'variable_id': [6, 5, 7, 8]}))
+
+
+def test_model_table_views_are_read_only():
+    table = ModelTable(['variable_id'])
+    table['a'] = pd.DataFrame({'variable_id': [0, 1]})
+    assert not table.frame()['variable_id'].to_numpy().flags.writeable
+
+
+def test_model_tables_share_key_codes_after_pickling():
+    key_codes = KeyCodes()
+    tables = {'variables': ModelTable(['variable_id'], key_columns=['unit'], key_codes=key_codes),
+              'constraints': ModelTable(['constraint_id'], key_columns=['unit'], key_codes=key_codes)}
+    tables['variables']['bids'] = pd.DataFrame({'variable_id': [0, 1], 'unit': ['A', 'B']})
+    tables['constraints']['capacity'] = pd.DataFrame({'constraint_id': [0, 1], 'unit': ['B', 'C']})
+
+    restored = pickle.loads(pickle.dumps(tables))
+
+    assert restored['variables'].key_codes is restored['constraints'].key_codes
+    assert_frame_equal(restored['variables']['bids'], tables['variables']['bids'])
+    assert_frame_equal(restored['variables'].frame(), tables['variables'].frame())
+    assert_frame_equal(restored['constraints'].frame(), tables['constraints'].frame())
+    joined = pd.merge(restored['variables'].frame(), restored['constraints'].frame(), on='unit')
+    assert joined.loc[:, ['variable_id', 'constraint_id']].to_numpy().tolist() == [[1, 0]]
+
+
+def test_key_codes_encode_missing_values_as_zero():
+    key_codes = KeyCodes()
+    codes = key_codes.encode(pd.Series(['A', np.nan, 'B', 'A']))
+    assert codes.tolist() == [1, 0, 2, 1]
+    assert key_codes.decode(codes[[0, 2]]).tolist() == ['A', 'B']
+
+
+def test_model_state_round_trips_through_arrays():
+    key_codes = KeyCodes()
+    table = ModelTable(['variable_id', 'type'], key_columns=['unit'], key_codes=key_codes, capacity=2)
+    table['a'] = pd.DataFrame({'unit': ['A', 'B'], 'variable_id': [0, 1], 'type': ['continuous', 'binary']})
+    table['b'] = pd.DataFrame({'variable_id': [2], 'type': ['continuous']})
+    table['c'] = pd.DataFrame({'unit': ['C'], 'variable_id': [3], 'type': ['continuous']})
+    del table['b']
+    frame = pd.DataFrame({'unit': ['A', np.nan, 'C'], 'value': [1.5, np.nan, 3.0]}, index=[5, 0, 5])
+    state = {'table': table, 'frames': {'frame': frame}, 'key_codes': key_codes, 'ids': ['A', 'B'],
+             'next_id': np.int64(4)}
+
+    restored = loads(dumps(state))
+
+    assert_frame_equal(restored['table'].frame(), table.frame())
+    assert_frame_equal(restored['table']['c'], table['c'])
+    assert_frame_equal(restored['frames']['frame'], frame)
+    assert restored['table'].key_codes is restored['key_codes']
+    assert restored['ids'] == ['A', 'B'] and restored['next_id'] == 4
+
+    # Restored tables keep growing, and new ids get new codes.
+    restored['table']['d'] = pd.DataFrame({'unit': ['D'], 'variable_id': [4], 'type': ['continuous']})
+    assert restored['table'].frame()['unit'].tolist() == [1, 2, 3, 4]
+
+
+def test_model_state_only_holds_arrays_and_json_values():
+    with pytest.raises(TypeError):
+        dumps({'function': lambda x: x})
+    with pytest.raises(TypeError):
+        dumps({'frame': pd.DataFrame({'function': [lambda x: x]})})
+    with pytest.raises(ValueError):
+        loads(b'not model state')
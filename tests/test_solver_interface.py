@@ -1,3 +1,4 @@
+import pytest
 import pandas as pd
 from pandas._testing import assert_frame_equal
 from nempy.spot_market_backend import solver_interface
@@ -73,3 +74,58 @@ def test_dispatch():
 
     assert_frame_equal(decision_variables, expected_decision_variables)
     assert_frame_equal(market_rhs_and_type, expected_market_rhs_and_type)
+
+
+def test_solution_values_looked_up_by_id_position():
+    si = solver_interface.InterfaceToSolver()
+
+    decision_variables = pd.DataFrame({
+            'variable_id': [10, 3, 7],
+            'lower_bound': [0.0, 0.0, 0.0],
+            'upper_bound': [4.0, 5.0, 6.0],
+            'type': ['continuous', 'continuous', 'continuous'],
+    }, index=['x', 'y', 'z'])
+
+    si.add_variables(decision_variables)
+
+    rhs_and_type = pd.DataFrame({
+            'constraint_id': [8, 2],
+            'type': ['=', '<='],
+            'rhs': [12.0, 100.0]
+    })
+
+    constraints_lhs_coefficient = pd.DataFrame({
+        'constraint_id': [8, 8, 8, 2],
+        'variable_id': [10, 3, 7, 7],
+        'coefficient': [1.0, 1.0, 1.0, 1.0]
+    })
+
+    si.add_constraints(constraints_lhs_coefficient, rhs_and_type)
+    si.add_objective_function(pd.DataFrame({'variable_id': [10, 3, 7], 'cost': [1.0, 2.0, 3.0]}))
+    si.optimize()
+    si.optimize_linear_model()
+
+    values = si.get_optimal_values_of_decision_variables(decision_variables)
+    assert values.to_dict() == {'x': 4.0, 'y': 5.0, 'z': 3.0}
+    assert si.get_optimal_values_of_decision_variables_lin(decision_variables).to_dict() == values.to_dict()
+
+    # Constraint 5 has no lhs terms so isn't in the solver model.
+    slack = si.get_slack_in_constraints(pd.DataFrame({'constraint_id': [2, 8, 5]}))
+    assert slack.to_list() == [97.0, 0.0, 0.0]
+
+    assert si.price_constraints([8]) == {8: 3.0}
+
+    with pytest.raises(KeyError):
+        si.get_optimal_values_of_decision_variables(pd.DataFrame({'variable_id': [4]}))
+
+
+def test_highs_special_ordered_sets_need_finite_bounds():
+    pytest.importorskip('highspy')
+    si = solver_interface.create_solver_interface('HIGHS')
+    si.add_variables(pd.DataFrame({
+        'variable_id': [0, 1],
+        'lower_bound': [0.0, 0.0],
+        'upper_bound': [5.0, float('inf')],
+        'type': ['continuous', 'continuous']}))
+    with pytest.raises(ValueError, match='finite bounds'):
+        si.add_sos_type_1(pd.DataFrame({'variable_id': [0, 1], 'sos_id': ['A', 'A']}))
@@ -0,0 +1,343 @@
+import io
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+from pandas._testing import assert_frame_equal
+from nempy.historical_inputs import xml_cache
+
+nemde_file = """<?xml version="1.0" encoding="utf-8"?>
+<NEMSPDCaseFile>
+  <NemSpdInputs>
+    <Case CaseID="1" EnergyDeficitPrice="2250000" VoLL="17500" InterconnectorPrice="0.0" GenericConstraintPrice="0.0"
+        RampRatePrice="0.0" CapacityPrice="0.0" OfferPrice="0.0" ASProfilePrice="0.0" ASMaxAvailPrice="0.0"
+        ASEnablementMinPrice="0.0" ASEnablementMaxPrice="0.0" FastStartPrice="0.0" MNSPRampRatePrice="0.0"
+        MNSPOfferPrice="0.0" MNSPCapacityPrice="0.0" UIGFSurplusPrice="0.0" TieBreakPrice="0.0"/>
+    <TraderCollection>
+      <Trader TraderID="A" TraderType="GENERATOR" CurrentMode="1" CurrentModeTime="2" MinLoadingMW="20" T1="5" T2="10"
+              T3="30" T4="60" WhatIfCurrentMode="2">
+        <TraderInitialConditionCollection>
+          <TraderInitialCondition InitialConditionID="InitialMW" Value="50.5"/>
+          <TraderInitialCondition InitialConditionID="WhatIfInitialMW" Value="40.0"/>
+          <TraderInitialCondition InitialConditionID="AGCStatus" Value="1"/>
+        </TraderInitialConditionCollection>
+        <TradePriceStructureCollection>
+          <TradePriceStructure>
+            <TradeTypePriceStructureCollection>
+              <TradeTypePriceStructure TradeType="ENOF" PriceBand1="-1000" PriceBand2="50"/>
+              <TradeTypePriceStructure TradeType="R6SE" Direction="GEN" PriceBand1="0.5" PriceBand2="5"/>
+            </TradeTypePriceStructureCollection>
+          </TradePriceStructure>
+        </TradePriceStructureCollection>
+      </Trader>
+      <Trader TraderID="B" TraderType="LOAD">
+        <TraderInitialConditionCollection>
+          <TraderInitialCondition InitialConditionID="InitialMW" Value="10.0"/>
+        </TraderInitialConditionCollection>
+        <TradePriceStructureCollection>
+          <TradePriceStructure>
+            <TradeTypePriceStructureCollection>
+              <TradeTypePriceStructure TradeType="LDOF" PriceBand1="300" PriceBand2="14000"/>
+            </TradeTypePriceStructureCollection>
+          </TradePriceStructure>
+        </TradePriceStructureCollection>
+      </Trader>
+    </TraderCollection>
+    <GenericConstraintCollection>
+      <GenericConstraint ConstraintID="X" Type="LE" ViolationPrice="435000">
+        <LHSFactorCollection>
+          <TraderFactor Factor="1" TraderID="A" TradeType="ENOF"/>
+          <InterconnectorFactor Factor="-0.5" InterconnectorID="N-Q-MNSP1"/>
+        </LHSFactorCollection>
+        <s:ConstraintScadaData xmlns:s="scada">
+          <s:ScadaValuesCollection><s:ScadaValue SpdID="X" Value="1"/></s:ScadaValuesCollection>
+        </s:ConstraintScadaData>
+      </GenericConstraint>
+      <GenericConstraint ConstraintID="Y" Type="GE" ViolationPrice="2500000">
+        <LHSFactorCollection/>
+      </GenericConstraint>
+    </GenericConstraintCollection>
+    <PeriodCollection>
+      <Period>
+        <TraderPeriodCollection>
+          <TraderPeriod TraderID="A" UIGF="80.0">
+            <TradeCollection>
+              <Trade TradeType="ENOF" MaxAvail="100" BandAvail1="60" BandAvail2="40" RampDnRate="120" RampUpRate="60"/>
+            </TradeCollection>
+          </TraderPeriod>
+          <TraderPeriod TraderID="B">
+            <TradeCollection>
+              <Trade TradeType="LDOF" Direction="LOAD" MaxAvail="30" BandAvail1="30" BandAvail2="0" RampDnRate="10"
+                     RampUpRate="20"/>
+            </TradeCollection>
+          </TraderPeriod>
+        </TraderPeriodCollection>
+        <InterconnectorPeriodCollection>
+          <InterconnectorPeriod InterconnectorID="N-Q-MNSP1" MNSP="0"/>
+          <InterconnectorPeriod InterconnectorID="T-V-MNSP1" MNSP="1">
+            <MNSPOfferCollection>
+              <MNSPOffer RegionID="TAS1" MaxAvail="478"/>
+              <MNSPOffer RegionID="VIC1" MaxAvail="594"/>
+            </MNSPOfferCollection>
+          </InterconnectorPeriod>
+        </InterconnectorPeriodCollection>
+      </Period>
+    </PeriodCollection>
+  </NemSpdInputs>
+  <NemSpdOutputs>
+    <CaseSolution Intervention="0" TotalGenericViolation="1.5" TotalUIGFViolation="0.0" TotalAreaGenViolation="0.0"
+        TotalInterconnectorViolation="0.0" TotalRampRateViolation="0.0" TotalUnitMWCapacityViolation="0.0"
+        TotalEnergyConstrViolation="0.0" TotalEnergyOfferViolation="0.0" TotalASProfileViolation="0.0"
+        TotalFastStartViolation="0.0" TotalMNSPRampRateViolation="0.0" TotalMNSPOfferViolation="0.0"
+        TotalMNSPCapacityViolation="0.0"/>
+    <CaseSolution Intervention="1" TotalGenericViolation="2.5" TotalUIGFViolation="0.0" TotalAreaGenViolation="0.0"
+        TotalInterconnectorViolation="0.0" TotalRampRateViolation="0.0" TotalUnitMWCapacityViolation="0.0"
+        TotalEnergyConstrViolation="0.0" TotalEnergyOfferViolation="0.0" TotalASProfileViolation="0.0"
+        TotalFastStartViolation="0.0" TotalMNSPRampRateViolation="0.0" TotalMNSPOfferViolation="0.0"
+        TotalMNSPCapacityViolation="0.0"/>
+    <PeriodSolution Intervention="0" TotalUIGFViolation="3.0"/>
+    <PeriodSolution Intervention="1" TotalUIGFViolation="4.0"/>
+    <RegionSolution RegionID="NSW1" Intervention="0" EnergyPrice="85.5" R6Price="1.2"/>
+    <RegionSolution RegionID="QLD1" Intervention="0" EnergyPrice="90.0"/>
+    <ConstraintSolution ConstraintID="X" Intervention="0" RHS="150.0"/>
+    <ConstraintSolution ConstraintID="X" Intervention="1" RHS="140.0"/>
+    <ConstraintSolution ConstraintID="Y" Intervention="0" RHS="-5.0"/>
+  </NemSpdOutputs>
+</NEMSPDCaseFile>
+"""
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = xml_cache.XMLCacheManager(str(tmp_path))
+    manager.interval = '2019/01/01 12:00:00'
+    with open(manager.get_file_path(), 'w') as file:
+        file.write(nemde_file)
+    manager.load_interval('2019/01/01 12:00:00')
+    return manager
+
+
+def test_unit_inputs(manager):
+    assert manager.is_intervention_period()
+
+    expected_initial_conditions = pd.DataFrame({
+        'DUID': ['A', 'B'],
+        'TRADERTYPE': ['GENERATOR', 'LOAD'],
+        'INITIALMW': [40.0, float('nan')],
+        'RAMPUPRATE': [float('nan'), float('nan')],
+        'RAMPDOWNRATE': [float('nan'), float('nan')],
+        'AGCSTATUS': [1.0, float('nan')]})
+    assert_frame_equal(manager.get_unit_initial_conditions(), expected_initial_conditions)
+
+    expected_fast_start = pd.DataFrame({
+        'DUID': ['A'], 'MinLoadingMW': [20], 'CurrentMode': [2], 'CurrentModeTime': [2], 'T1': [5], 'T2': [10],
+        'T3': [30], 'T4': [60]})
+    assert_frame_equal(manager.get_unit_fast_start_parameters(), expected_fast_start)
+
+    volume_bids = manager.get_unit_volume_bids()
+    assert list(volume_bids['BIDTYPE']) == ['ENERGY', 'ENERGY']
+    assert list(volume_bids['DIRECTION']) == [None, 'LOAD']
+    # Missing attributes take the value of the attribute before them.
+    assert list(volume_bids['ENABLEMENTMIN']) == [100.0, 30.0]
+    assert list(volume_bids['RAMPUPRATE']) == [60.0, 20.0]
+
+    price_bids = manager.get_unit_price_bids()
+    assert list(price_bids['DUID']) == ['A', 'A', 'B']
+    assert list(price_bids['BIDTYPE']) == ['ENERGY', 'RAISE6SEC', 'ENERGY']
+    assert list(price_bids['DIRECTION']) == ['GENERATOR', 'GENERATOR', 'LOAD']
+    assert list(price_bids['PRICEBAND2']) == [50.0, 5.0, 14000.0]
+    assert price_bids['PRICEBAND3'].isna().all()
+
+    assert_frame_equal(manager.get_UIGF_values(), pd.DataFrame({'DUID': ['A'], 'UIGF': [80.0]}))
+
+
+def test_constraint_and_market_inputs(manager):
+    assert_frame_equal(manager.get_constraint_rhs(), pd.DataFrame({'set': ['X', 'Y'], 'rhs': [150.0, -5.0]}))
+    assert_frame_equal(manager.get_constraint_type(),
+                       pd.DataFrame({'set': ['X', 'Y'], 'type': ['LE', 'GE'], 'cost': [435000.0, 2500000.0]}))
+    assert_frame_equal(manager.get_constraint_unit_lhs(),
+                       pd.DataFrame({'set': ['X'], 'unit': ['A'], 'service': ['ENOF'], 'coefficient': [1.0]}))
+    assert_frame_equal(manager.get_constraint_interconnector_lhs(),
+                       pd.DataFrame({'set': ['X'], 'interconnector': ['N-Q-MNSP1'], 'coefficient': [-0.5]}))
+    assert manager.get_constraint_region_lhs().empty
+    assert_frame_equal(manager.get_market_interconnector_link_bid_availability(),
+                       pd.DataFrame({'interconnector': ['T-V-MNSP1', 'T-V-MNSP1'], 'to_region': ['TAS1', 'VIC1'],
+                                     'availability': [478.0, 594.0]}))
+    assert_frame_equal(manager.get_service_prices(),
+                       pd.DataFrame({'region': ['NSW1', 'NSW1', 'QLD1'], 'service': ['ENERGY', 'RAISE6SEC', 'ENERGY'],
+                                     'price': ['85.5', '1.2', '90.0']}))
+    violations = manager.get_violations()
+    assert violations['ugif'] == 3.0
+    assert violations['generic_constraint'] == 1.5
+    assert manager.get_constraint_violation_prices()['voll'] == 17500.0
+
+
+def test_whole_file_is_still_available_as_nested_dictionaries(manager):
+    assert manager.xml['NEMSPDCaseFile']['NemSpdInputs']['Case']['@VoLL'] == '17500'
+
+
+def test_tables_are_read_from_extract_on_later_loads(manager, monkeypatch):
+    expected = manager.get_unit_price_bids()
+    assert manager.get_file_path().with_suffix('.npz').exists()
+
+    def read_xml_tables(source, tables):
+        raise AssertionError('NEMDE file read again.')
+
+    monkeypatch.setattr(xml_cache, 'read_xml_tables', read_xml_tables)
+    manager.load_interval('2019/01/01 12:00:00')
+    assert_frame_equal(manager.get_unit_price_bids(), expected)
+    assert_frame_equal(manager.get_constraint_unit_lhs(),
+                       pd.DataFrame({'set': ['X'], 'unit': ['A'], 'service': ['ENOF'], 'coefficient': [1.0]}))
+
+
+def test_extract_is_replaced_when_nemde_file_changes(manager):
+    assert manager.get_violations()['ugif'] == 3.0
+    with open(manager.get_file_path(), 'w') as file:
+        file.write(nemde_file.replace('TotalUIGFViolation="3.0"', 'TotalUIGFViolation="7.0"'))
+    manager.load_interval('2019/01/01 12:00:00')
+    assert manager.get_violations()['ugif'] == 7.0
+
+
+def test_intervals_read_from_zipped_cache(tmp_path, manager):
+    zipped_folder = tmp_path / 'zipped'
+    zipped_manager = xml_cache.XMLCacheManager(str(zipped_folder), zipped=True)
+    zipped_manager.interval = '2019/01/01 12:00:00'
+    with zipfile.ZipFile(zipped_folder / zipped_manager._get_zip_file_name(), 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.write(manager.get_file_path(), manager.get_file_name())
+
+    zipped_manager.load_interval('2019/01/01 12:00:00')
+    assert zipped_manager.get_file_name() == manager.get_file_name()
+    assert not zipped_manager.get_file_path().exists()
+    assert_frame_equal(zipped_manager.get_unit_price_bids(), manager.get_unit_price_bids())
+    assert zipped_manager.xml['NEMSPDCaseFile']['NemSpdInputs']['Case']['@VoLL'] == '17500'
+    # By default a zipped cache holds only the zip files.
+    assert [path.name for path in zipped_folder.iterdir()] == [zipped_manager._get_zip_file_name()]
+
+    # If extracts are used, they're used for later loads, and are replaced if the zip file changes.
+    zipped_manager = xml_cache.XMLCacheManager(str(zipped_folder), extract_cache=True, zipped=True)
+    zipped_manager.load_interval('2019/01/01 12:00:00')
+    assert zipped_manager.get_violations()['ugif'] == 3.0
+    assert zipped_manager.get_file_path().with_suffix('.npz').exists()
+    zipped_manager.load_interval('2019/01/01 12:00:00')
+    assert zipped_manager.get_violations()['ugif'] == 3.0
+    zipped_manager._close_archive()
+    with zipfile.ZipFile(zipped_folder / zipped_manager._get_zip_file_name(), 'w') as archive:
+        archive.writestr(manager.get_file_name(), nemde_file.replace('TotalUIGFViolation="3.0"',
+                                                                     'TotalUIGFViolation="7.0"'))
+    zipped_manager.load_interval('2019/01/01 12:00:00')
+    assert zipped_manager.get_violations()['ugif'] == 7.0
+
+    zipped_manager.interval = '2019/01/02 12:00:00'
+    assert not zipped_manager.interval_inputs_in_cache()
+
+
+def test_getter_results_are_cached_per_interval(manager, monkeypatch):
+    initial_conditions = manager.get_unit_initial_conditions()
+    initial_conditions['INITIALMW'] = 0.0
+    violations = manager.get_violations()
+    violations['ugif'] = 0.0
+
+    def read_tables(*names):
+        raise AssertionError('Tables read again.')
+
+    monkeypatch.setattr(manager, '_read_tables', read_tables)
+    assert list(manager.get_unit_initial_conditions()['INITIALMW'].fillna(-1.0)) == [40.0, -1.0]
+    assert manager.get_violations()['ugif'] == 3.0
+
+    monkeypatch.undo()
+    with open(manager.get_file_path(), 'w') as file:
+        file.write(nemde_file.replace('TotalUIGFViolation="3.0"', 'TotalUIGFViolation="7.0"'))
+    manager.load_interval('2019/01/01 12:00:00')
+    assert manager.get_violations()['ugif'] == 7.0
+
+
+def daily_zip(day):
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('NEMSPDOutputs_{}09600.loaded'.format(day), nemde_file)
+    return content.getvalue()
+
+
+@pytest.fixture
+def nemweb():
+    """A local stand in for NEMWeb, serving the responses queued for each daily zip file name, and then 404s."""
+    responses = {}
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = self.path.split('/')[-1]
+            requested.append(name)
+            status, body = responses[name].pop(0) if responses.get(name) else (404, b'')
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1]), responses, requested
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('zipped', [False, True])
+def test_populate_retries_checks_and_resumes_downloads(tmp_path, nemweb, zipped):
+    url, responses, requested = nemweb
+    manager = xml_cache.XMLCacheManager(str(tmp_path), zipped=zipped)
+    manager.nemweb_url = url
+    manager.download_backoff = 0.0
+    first_day, second_day, third_day = 'NemSpdOutputs_20181231_loaded.zip', 'NemSpdOutputs_20190101_loaded.zip', \
+        'NemSpdOutputs_20190102_loaded.zip'
+    responses[first_day] = [(500, b''), (200, daily_zip('20181231'))]
+    responses[second_day] = [(200, daily_zip('20190101')[:-100]), (200, daily_zip('20190101'))]
+
+    # The third day isn't available yet, but the other days are still downloaded.
+    with pytest.raises(xml_cache.MissingDataError):
+        manager.populate_by_day(2019, 1, 2019, 1, 2, 3, verbose=False, workers=2)
+    assert sorted(requested) == [first_day, first_day, second_day, second_day, third_day]
+    manager.load_interval('2019/01/01 12:00:00')
+    assert manager.get_violations()['ugif'] == 3.0
+    assert not list(tmp_path.glob('*.tmp'))
+
+    # Only the missing day is downloaded when the download is run again.
+    requested.clear()
+    responses[third_day] = [(200, daily_zip('20190102'))]
+    manager.populate_by_day(2019, 1, 2019, 1, 2, 3, verbose=False, workers=2)
+    assert requested == [third_day]
+    manager.load_interval('2019/01/02 12:00:00')
+    assert manager.get_violations()['ugif'] == 3.0
+    assert (tmp_path / second_day).exists() == zipped
+
+
+def test_failed_downloads_raise_download_error_and_are_not_retried_for_each_interval(tmp_path, nemweb):
+    url, responses, requested = nemweb
+    manager = xml_cache.XMLCacheManager(str(tmp_path))
+    manager.nemweb_url = url
+    manager.download_backoff = 0.0
+    manager.download_attempts = 2
+    day = 'NemSpdOutputs_20190101_loaded.zip'
+
+    # NEMWeb doesn't have the day, so each of its intervals is missing, but the day is only requested once.
+    for interval in ['2019/01/01 12:00:00', '2019/01/01 12:05:00']:
+        with pytest.raises(xml_cache.MissingDataError):
+            manager.load_interval(interval)
+    assert requested == [day]
+
+    # Downloads that fail on every attempt raise a DownloadError, which isn't skipped when searching for violations.
+    responses['NemSpdOutputs_20190201_loaded.zip'] = [(500, b''), (500, b'')]
+    with pytest.raises(xml_cache.DownloadError):
+        manager.find_intervals_with_violations(limit=1, start_year=2019, start_month=2, end_year=2019, end_month=2)
+    with pytest.raises(xml_cache.DownloadError):
+        manager.load_interval('2019/02/01 12:05:00')
+    # The intervals before 4 am are in the market day of 2019/01/31, which NEMWeb doesn't have, so are skipped.
+    assert requested == [day, 'NemSpdOutputs_20190131_loaded.zip'] + ['NemSpdOutputs_20190201_loaded.zip'] * 2
+
+    manager.nemweb_url = 'http://127.0.0.1:1'
+    with pytest.raises(xml_cache.DownloadError):
+        manager.populate_by_day(2019, 3, 2019, 3, 2, 2, verbose=False)